@@ -0,0 +1,322 @@
+import asyncio
+from datetime import date, timedelta
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import close_old_connections
+from django.http import JsonResponse
+
+from .exports import parse_date
+from .filters import (
+    filter_residents, filter_parking_slots, filter_subcontractors,
+    filter_payments, filter_work_orders, filter_units
+)
+from .models import Resident, Payment, WorkOrder, Unit, ParkingSlot, Subcontractor, MpesaReviewItem
+from .pagination import paginate
+from .stats import (
+    unit_stats, work_order_stats, tenant_stats, parking_stats,
+    services_stats, building_stats, subcontractor_stats, arrears_report
+)
+from .snapshots import SNAPSHOT_GROUPS, occupancy_series
+from .summaries import month_summary
+
+
+def rent_stats():
+    """Rent collection counters of the current month"""
+    return month_summary(date.today().strftime('%B %Y')).as_stats()
+
+
+# Stat groups served under /api/stats/<name>/
+STAT_ENDPOINTS = {
+    'dashboard': unit_stats,
+    'work_orders': work_order_stats,
+    'tenants': tenant_stats,
+    'parking': parking_stats,
+    'services': services_stats,
+    'building': building_stats,
+    'subcontractors': subcontractor_stats,
+    'rent': rent_stats,
+}
+
+
+def api_login_required(view):
+    """Like login_required, but answers 401 with JSON instead of redirecting"""
+    @wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        user = await request.auser()
+        if not user.is_authenticated:
+            return JsonResponse({'error': 'Authentication required'}, status=401)
+        return await view(request, *args, **kwargs)
+    return wrapper
+
+
+def _isolated(func):
+    # Runs in its own worker thread, so it gets (and must close) its own connection
+    def run():
+        close_old_connections()
+        try:
+            return func()
+        finally:
+            close_old_connections()
+    return run
+
+
+async def gather_stats(funcs):
+    """
+    Run independent stat functions concurrently.
+
+    Each function runs in its own thread with its own database connection.
+    With API_CONCURRENT_STATS off (e.g. in tests, where other connections
+    cannot see the test transaction) they run one after the other on the
+    request's thread instead.
+    """
+    if getattr(settings, 'API_CONCURRENT_STATS', True):
+        return await asyncio.gather(*(
+            sync_to_async(_isolated(func), thread_sensitive=False)()
+            for func in funcs
+        ))
+    return [await sync_to_async(func)() for func in funcs]
+
+
+async def list_response(request, queryset, filter_func, ordering, serialize):
+    """Filter, paginate and serialize a list endpoint"""
+    def fetch():
+        page = paginate(request, filter_func(queryset, request.GET), ordering)
+        return page, [serialize(obj) for obj in page]
+
+    page, results = await sync_to_async(fetch)()
+    return JsonResponse({
+        'results': results,
+        'page_size': page.page_size,
+        'next': page.next_cursor,
+        'previous': page.previous_cursor,
+    })
+
+
+def serialize_resident(resident):
+    return {
+        'id': resident.id,
+        'name': resident.user.get_full_name(),
+        'email': resident.user.email,
+        'unit_number': resident.unit_number,
+        'phone': resident.phone,
+        'move_in_date': resident.move_in_date,
+        'monthly_rent': resident.monthly_rent,
+        'status': resident.status,
+    }
+
+
+def serialize_payment(payment):
+    return {
+        'id': payment.id,
+        'resident_id': payment.resident_id,
+        'resident_name': payment.resident.user.get_full_name(),
+        'unit_number': payment.resident.unit_number,
+        'month': payment.month,
+        'payment_type': payment.payment_type,
+        'amount': payment.amount,
+        'amount_paid': payment.amount_paid,
+        'payment_method': payment.payment_method,
+        'transaction_code': payment.transaction_code,
+        'due_date': payment.due_date,
+        'paid_date': payment.paid_date,
+        'status': payment.status,
+    }
+
+
+def serialize_work_order(order):
+    return {
+        'id': order.id,
+        'order_id': order.order_id,
+        'title': order.title,
+        'unit_number': order.unit_number,
+        'category': order.category,
+        'priority': order.priority,
+        'status': order.status,
+        'assigned_to_id': order.assigned_to_id,
+        'assigned_to': order.assigned_to.name if order.assigned_to else None,
+        'resident_id': order.resident_id,
+        'cost': order.cost,
+        'due_date': order.due_date,
+        'completed_date': order.completed_date,
+        'created_at': order.created_at,
+    }
+
+
+def serialize_unit(unit):
+    return {
+        'id': unit.id,
+        'unit_number': unit.unit_number,
+        'unit_type': unit.unit_type,
+        'floor': unit.floor,
+        'size_sqm': unit.size_sqm,
+        'rent_amount': unit.rent_amount,
+        'status': unit.status,
+        'resident_id': unit.resident_id,
+        'resident_name': unit.resident.user.get_full_name() if unit.resident else None,
+    }
+
+
+def serialize_parking_slot(slot):
+    return {
+        'id': slot.id,
+        'slot_number': slot.slot_number,
+        'status': slot.status,
+        'resident_id': slot.resident_id,
+        'unit_number': slot.resident.unit_number if slot.resident else None,
+        'assigned_date': slot.assigned_date,
+    }
+
+
+def serialize_subcontractor(contractor):
+    return {
+        'id': contractor.id,
+        'name': contractor.name,
+        'company_name': contractor.company_name,
+        'category': contractor.category,
+        'phone': contractor.phone,
+        'email': contractor.email,
+        'status': contractor.status,
+        'rating': contractor.rating,
+        'active_orders': contractor.active_orders,
+        'completed_orders': contractor.completed_orders,
+        'total_cost': contractor.total_cost,
+    }
+
+
+def filter_review_items(queryset, params):
+    return queryset.filter(status=params.get('status', 'open'))
+
+
+def serialize_review_item(item):
+    return {
+        'id': item.id,
+        'receipt_no': item.receipt_no,
+        'paid_at': item.paid_at,
+        'amount': item.amount,
+        'phone': item.phone,
+        'account_number': item.account_number,
+        'details': item.details,
+        'reason': item.reason,
+        'suggested_payment_id': item.suggested_payment_id,
+        'status': item.status,
+    }
+
+
+@api_login_required
+async def tenants_api(request):
+    return await list_response(
+        request,
+        Resident.objects.select_related('user'),
+        filter_residents,
+        ['-id'],
+        serialize_resident,
+    )
+
+
+@api_login_required
+async def payments_api(request):
+    return await list_response(
+        request,
+        Payment.objects.filter(payment_type='rent').select_related('resident__user'),
+        filter_payments,
+        ['-due_date', 'resident__unit_number'],
+        serialize_payment,
+    )
+
+
+@api_login_required
+async def work_orders_api(request):
+    return await list_response(
+        request,
+        WorkOrder.objects.select_related('assigned_to'),
+        filter_work_orders,
+        ['-created_at'],
+        serialize_work_order,
+    )
+
+
+@api_login_required
+async def units_api(request):
+    return await list_response(
+        request,
+        Unit.objects.select_related('resident__user'),
+        filter_units,
+        ['unit_number'],
+        serialize_unit,
+    )
+
+
+@api_login_required
+async def parking_api(request):
+    return await list_response(
+        request,
+        ParkingSlot.objects.select_related('resident'),
+        filter_parking_slots,
+        ['-assigned_date', 'slot_number'],
+        serialize_parking_slot,
+    )
+
+
+@api_login_required
+async def subcontractors_api(request):
+    return await list_response(
+        request,
+        Subcontractor.objects.with_work_order_stats(),
+        filter_subcontractors,
+        ['name'],
+        serialize_subcontractor,
+    )
+
+
+@api_login_required
+async def mpesa_review_api(request):
+    """The M-Pesa reconciliation review queue, open items by default"""
+    return await list_response(
+        request,
+        MpesaReviewItem.objects.all(),
+        filter_review_items,
+        ['-created_at'],
+        serialize_review_item,
+    )
+
+
+@api_login_required
+async def arrears_api(request):
+    """Arrears aging report: portfolio totals and one row per resident in arrears"""
+    report = await sync_to_async(arrears_report)()
+    return JsonResponse(report)
+
+
+@api_login_required
+async def occupancy_api(request):
+    """
+    Daily occupancy and rent snapshots for charts.
+
+    `from` and `to` are ISO dates (the last year by default); `group` may
+    split each day by unit_type or floor.
+    """
+    end = parse_date(request.GET.get('to')) or date.today()
+    start = parse_date(request.GET.get('from')) or end - timedelta(days=365)
+    group = request.GET.get('group') or None
+    if group is not None and group not in SNAPSHOT_GROUPS:
+        return JsonResponse({'error': f'group must be one of {", ".join(SNAPSHOT_GROUPS)}'}, status=400)
+
+    series = await sync_to_async(occupancy_series)(start, end, group)
+    return JsonResponse({'from': start, 'to': end, 'group': group, 'results': series})
+
+
+@api_login_required
+async def stats_api(request):
+    """Every stat group at once, fetched concurrently"""
+    results = await gather_stats(STAT_ENDPOINTS.values())
+    return JsonResponse(dict(zip(STAT_ENDPOINTS, results)))
+
+
+@api_login_required
+async def stat_group_api(request, name):
+    if name not in STAT_ENDPOINTS:
+        return JsonResponse({'error': f'Unknown stat group {name}'}, status=404)
+    stats = await sync_to_async(STAT_ENDPOINTS[name])()
+    return JsonResponse(stats)
@@ -0,0 +1,18 @@
+from django.urls import path
+from . import api
+
+app_name = 'api'
+
+urlpatterns = [
+    path('tenants/', api.tenants_api, name='tenants'),
+    path('payments/', api.payments_api, name='payments'),
+    path('work-orders/', api.work_orders_api, name='work_orders'),
+    path('units/', api.units_api, name='units'),
+    path('parking/', api.parking_api, name='parking'),
+    path('subcontractors/', api.subcontractors_api, name='subcontractors'),
+    path('mpesa/review/', api.mpesa_review_api, name='mpesa_review'),
+    path('arrears/', api.arrears_api, name='arrears'),
+    path('occupancy/', api.occupancy_api, name='occupancy'),
+    path('stats/', api.stats_api, name='stats'),
+    path('stats/<str:name>/', api.stat_group_api, name='stat_group'),
+]
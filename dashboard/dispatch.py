@@ -0,0 +1,120 @@
+import heapq
+from collections import defaultdict
+
+from django.db import transaction
+from django.db.models import Case, Count, IntegerField, Q, Value, When
+from django.utils import timezone
+
+from . import stats
+from .jobs import record_run
+from .models import WorkOrder, Subcontractor
+
+# WorkOrder.category -> Subcontractor.category able to take it
+CATEGORY_MAP = {
+    'plumbing': 'plumber',
+    'electrical': 'electrician',
+    'hvac': 'hvac',
+    'cleaning': 'cleaner',
+    'security': 'security',
+    'landscaping': 'landscaper',
+    'painting': 'painter',
+    'carpentry': 'carpenter',
+    'pest_control': 'pest_control',
+    'general': 'general',
+}
+
+# Used when no active contractor of the mapped category exists
+FALLBACK_CATEGORY = 'general'
+
+PRIORITY_ORDER = Case(
+    *(When(priority=priority, then=Value(rank)) for rank, (priority, _) in enumerate(WorkOrder.PRIORITY_CHOICES)),
+    default=Value(len(WorkOrder.PRIORITY_CHOICES)),
+    output_field=IntegerField(),
+)
+
+
+class Dispatcher:
+    """
+    Active contractors in one min-heap per category, keyed on
+    (open work orders, -rating, id): the least loaded contractor comes
+    first and ties go to the best rated. Loaded with a single grouped
+    query; each assignment is then a heap replace, O(log n).
+    """
+
+    def __init__(self, categories=None):
+        contractors = Subcontractor.objects.filter(status='active')
+        if categories is not None:
+            contractors = contractors.filter(category__in=set(categories) | {FALLBACK_CATEGORY})
+        contractors = contractors.annotate(
+            open_orders=Count('work_orders', filter=Q(work_orders__status__in=WorkOrder.OPEN_STATUSES))
+        ).values_list('pk', 'category', 'rating', 'open_orders')
+
+        self.heaps = defaultdict(list)
+        for pk, category, rating, open_orders in contractors:
+            self.heaps[category].append((open_orders, -rating, pk))
+        for heap in self.heaps.values():
+            heapq.heapify(heap)
+
+    @classmethod
+    def for_work_order_categories(cls, categories):
+        return cls(categories=[CATEGORY_MAP.get(category, FALLBACK_CATEGORY) for category in categories])
+
+    def assign(self, work_order_category):
+        """Id of the contractor to give a new order of this category, or None"""
+        heap = self.heaps.get(CATEGORY_MAP.get(work_order_category, FALLBACK_CATEGORY)) or self.heaps.get(FALLBACK_CATEGORY)
+        if not heap:
+            return None
+        open_orders, rating, pk = heap[0]
+        heapq.heapreplace(heap, (open_orders + 1, rating, pk))
+        return pk
+
+
+def auto_assign(work_order_category):
+    """Least loaded, best rated active contractor for one new work order, or None"""
+    contractor_id = Dispatcher.for_work_order_categories([work_order_category]).assign(work_order_category)
+    if contractor_id is None:
+        return None
+    return Subcontractor.objects.get(pk=contractor_id)
+
+
+def backlog():
+    """Open work orders without an active contractor, most urgent and oldest first"""
+    return WorkOrder.objects.filter(
+        Q(assigned_to__isnull=True) | Q(assigned_to__status='inactive'),
+        status__in=WorkOrder.OPEN_STATUSES
+    ).order_by(PRIORITY_ORDER, 'created_at', 'pk')
+
+
+def dispatch_backlog(dry_run=False):
+    """
+    Assign every backlog order to a contractor.
+
+    Returns {contractor id: [order ids]}. Orders whose category has no
+    active contractor (and no general maintenance fallback) stay
+    unassigned. The assignments are written with one bulk_update.
+    """
+    with record_run('dispatch_backlog') as run:
+        orders = list(backlog().only('pk', 'category', 'assigned_to', 'updated_at'))
+        dispatcher = Dispatcher()
+
+        now = timezone.now()
+        assignments = defaultdict(list)
+        assigned = []
+        for order in orders:
+            contractor_id = dispatcher.assign(order.category)
+            if contractor_id is not None:
+                order.assigned_to_id = contractor_id
+                order.updated_at = now
+                assignments[contractor_id].append(order.pk)
+                assigned.append(order)
+
+        if not dry_run and assigned:
+            with transaction.atomic():
+                WorkOrder.objects.bulk_update(assigned, ['assigned_to', 'updated_at'], batch_size=500)
+            # bulk_update sends no signals
+            stats.invalidate(WorkOrder)
+
+        run.rows_affected = 0 if dry_run else len(assigned)
+        run.notes = f'{"Dry run: " if dry_run else ""}{len(orders)} orders in backlog'
+
+    return assignments
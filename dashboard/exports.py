@@ -0,0 +1,138 @@
+import csv
+import tempfile
+from datetime import date, datetime
+
+from django.utils import timezone
+
+from .filters import filter_payments, filter_work_orders
+from .models import Payment, WorkOrder
+
+try:
+    from openpyxl import Workbook
+except ImportError:  # XLSX export is optional
+    Workbook = None
+
+# Rows fetched from the database per round trip while streaming
+EXPORT_CHUNK_SIZE = 2000
+
+XLSX_CONTENT_TYPE = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+
+# Export name -> (base queryset, filter, ordering, date field, [(header, field)])
+EXPORTS = {
+    'payments': (
+        Payment.objects.filter(payment_type='rent'),
+        filter_payments,
+        ['-due_date', 'resident__unit_number', '-pk'],
+        'due_date',
+        [
+            ('Invoice', 'id'),
+            ('Month', 'month'),
+            ('Unit', 'resident__unit_number'),
+            ('First name', 'resident__user__first_name'),
+            ('Last name', 'resident__user__last_name'),
+            ('Amount', 'amount'),
+            ('Amount paid', 'amount_paid'),
+            ('Status', 'status'),
+            ('Due date', 'due_date'),
+            ('Paid date', 'paid_date'),
+            ('Method', 'payment_method'),
+            ('Transaction code', 'transaction_code'),
+        ],
+    ),
+    'work_orders': (
+        WorkOrder.objects.all(),
+        filter_work_orders,
+        ['-created_at', '-pk'],
+        'created_at__date',
+        [
+            ('Order', 'order_id'),
+            ('Title', 'title'),
+            ('Unit', 'unit_number'),
+            ('Category', 'category'),
+            ('Priority', 'priority'),
+            ('Status', 'status'),
+            ('Contractor', 'assigned_to__name'),
+            ('Cost', 'cost'),
+            ('Due date', 'due_date'),
+            ('Completed', 'completed_date'),
+            ('Days late', 'days_late'),
+            ('Created', 'created_at'),
+        ],
+    ),
+}
+
+
+class Echo:
+    """File-like object whose write() just hands the line back to csv.writer's caller"""
+
+    def write(self, value):
+        return value
+
+
+def parse_date(value):
+    try:
+        return date.fromisoformat(value) if value else None
+    except ValueError:
+        return None
+
+
+def export_queryset(name, params):
+    """
+    Filtered rows of an export as a values_list queryset.
+
+    Takes the same parameters as the matching list page plus optional
+    `from` and `to` ISO dates, e.g. a month or a full year.
+    """
+    queryset, filter_func, ordering, date_field, columns = EXPORTS[name]
+    queryset = filter_func(queryset, params)
+
+    start, end = parse_date(params.get('from')), parse_date(params.get('to'))
+    if start:
+        queryset = queryset.filter(**{f'{date_field}__gte': start})
+    if end:
+        queryset = queryset.filter(**{f'{date_field}__lte': end})
+
+    return queryset.order_by(*ordering).values_list(*(field for _, field in columns))
+
+
+def export_rows(name, params):
+    """Header plus data rows, fetched EXPORT_CHUNK_SIZE rows at a time"""
+    columns = EXPORTS[name][-1]
+    yield [header for header, _ in columns]
+    yield from export_queryset(name, params).iterator(chunk_size=EXPORT_CHUNK_SIZE)
+
+
+def iter_csv(name, params):
+    """CSV lines of an export, one at a time"""
+    writer = csv.writer(Echo())
+    for row in export_rows(name, params):
+        yield writer.writerow(row)
+
+
+def write_xlsx(name, params, output):
+    """Write an export to `output` as XLSX using openpyxl's write-only mode"""
+    if Workbook is None:
+        raise RuntimeError('XLSX export needs openpyxl (pip install openpyxl)')
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet(name)
+    for row in export_rows(name, params):
+        # Excel has no time zones, so write datetimes as local time
+        sheet.append([
+            timezone.localtime(value).replace(tzinfo=None)
+            if isinstance(value, datetime) and timezone.is_aware(value) else value
+            for value in row
+        ])
+    workbook.save(output)
+
+
+def xlsx_file(name, params):
+    """
+    XLSX export written in full to a temporary file on disk.
+
+    Unlike iter_csv this is buffered: nothing can be sent until the
+    workbook is saved, but rows never all sit in memory at once.
+    """
+    output = tempfile.TemporaryFile()
+    write_xlsx(name, params, output)
+    output.seek(0)
+    return output
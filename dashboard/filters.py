@@ -0,0 +1,145 @@
+from django.db.models import Q
+
+from .search import search_q
+
+# Filters shared by the list pages and the JSON API. Each takes a queryset
+# and the request's GET parameters and returns the filtered queryset.
+
+
+def filter_residents(queryset, params):
+    """Status filter and search box of the tenants page"""
+    filter_status = params.get('status', 'all')
+    search_query = params.get('search', '')
+
+    if filter_status in ('active', 'pending', 'moved_out'):
+        queryset = queryset.filter(status=filter_status)
+
+    if search_query:
+        queryset = queryset.filter(search_q(
+            search_query,
+            Q(user__first_name__icontains=search_query) |
+            Q(user__last_name__icontains=search_query) |
+            Q(unit_number__icontains=search_query) |
+            Q(phone__icontains=search_query),
+            pk='resident'
+        ))
+
+    return queryset
+
+
+def filter_parking_slots(queryset, params):
+    """Status filter and search box of the parking page"""
+    filter_status = params.get('status', 'all')
+    search_query = params.get('search', '')
+
+    if filter_status in ('assigned', 'available'):
+        queryset = queryset.filter(status=filter_status)
+
+    if search_query:
+        queryset = queryset.filter(
+            Q(slot_number__icontains=search_query) |
+            Q(resident__unit_number__icontains=search_query)
+        )
+
+    return queryset
+
+
+def filter_subcontractors(queryset, params):
+    """Category and status filters and search box of the subcontractors page"""
+    filter_category = params.get('category', 'all')
+    filter_status = params.get('status', 'all')
+    search_query = params.get('search', '')
+
+    if filter_category != 'all':
+        queryset = queryset.filter(category=filter_category)
+
+    if filter_status in ('active', 'inactive'):
+        queryset = queryset.filter(status=filter_status)
+
+    if search_query:
+        queryset = queryset.filter(search_q(
+            search_query,
+            Q(name__icontains=search_query) |
+            Q(company_name__icontains=search_query) |
+            Q(phone__icontains=search_query) |
+            Q(email__icontains=search_query),
+            pk='subcontractor'
+        ))
+
+    return queryset
+
+
+def filter_payments(queryset, params):
+    """Status filter and search box of the rent collection page"""
+    filter_status = params.get('status', 'all')
+    search_query = params.get('search', '')
+
+    if filter_status != 'all':
+        queryset = queryset.filter(status=filter_status)
+
+    if search_query:
+        queryset = queryset.filter(search_q(
+            search_query,
+            Q(resident__user__first_name__icontains=search_query) |
+            Q(resident__user__last_name__icontains=search_query) |
+            Q(resident__unit_number__icontains=search_query) |
+            Q(transaction_code__icontains=search_query),
+            pk='payment',
+            resident='resident'
+        ))
+
+    return queryset
+
+
+def filter_work_orders(queryset, params):
+    """Status, priority and category filters and search box of the services page"""
+    filter_status = params.get('status', 'all')
+    filter_priority = params.get('priority', 'all')
+    filter_category = params.get('category', 'all')
+    search_query = params.get('search', '')
+
+    if filter_status != 'all':
+        queryset = queryset.filter(status=filter_status)
+
+    if filter_priority != 'all':
+        queryset = queryset.filter(priority=filter_priority)
+
+    if filter_category != 'all':
+        queryset = queryset.filter(category=filter_category)
+
+    if search_query:
+        queryset = queryset.filter(search_q(
+            search_query,
+            Q(order_id__icontains=search_query) |
+            Q(title__icontains=search_query) |
+            Q(unit_number__icontains=search_query) |
+            Q(description__icontains=search_query),
+            pk='workorder'
+        ))
+
+    return queryset
+
+
+def filter_units(queryset, params):
+    """Status and type filters and search box of the building page"""
+    filter_status = params.get('status', 'all')
+    filter_type = params.get('type', 'all')
+    search_query = params.get('search', '')
+
+    if filter_status != 'all':
+        queryset = queryset.filter(status=filter_status)
+
+    if filter_type != 'all':
+        queryset = queryset.filter(unit_type=filter_type)
+
+    if search_query:
+        queryset = queryset.filter(search_q(
+            search_query,
+            Q(unit_number__icontains=search_query) |
+            Q(resident__user__first_name__icontains=search_query) |
+            Q(resident__user__last_name__icontains=search_query),
+            pk='unit',
+            resident='resident'
+        ))
+
+    return queryset
@@ -0,0 +1,66 @@
+from datetime import date
+
+from django.db import transaction
+
+from .models import Resident, Payment
+from .summaries import refresh_month_summary
+from . import stats
+
+INVOICE_DUE_DAY = 5
+
+
+def invoice_period(month_date):
+    """Return the month label and due date used for a month's rent invoices"""
+    return month_date.strftime('%B %Y'), month_date.replace(day=INVOICE_DUE_DAY)
+
+
+def generate_invoices(month_date, residents=None):
+    """
+    Create the missing rent invoices for a month.
+
+    Residents that already have a rent invoice for the month are loaded in
+    one query and skipped, so re-running for the same month is a no-op;
+    the payment_one_rent_per_month constraint guarantees it. The new rows
+    are inserted with a single bulk_create that skips rows the constraint
+    rejects, so a concurrent run (or a double-clicked button) creates each
+    invoice once instead of failing. Returns the number of invoices
+    created, counted from the table afterwards.
+    """
+    month_str, due_date = invoice_period(month_date)
+
+    if residents is None:
+        residents = Resident.objects.filter(status='active')
+
+    # bulk_create skips Payment.save(), so set the status it would have set
+    status = 'overdue' if date.today() > due_date else 'pending'
+
+    month_invoices = Payment.objects.filter(month=month_str, payment_type='rent')
+
+    with transaction.atomic():
+        invoiced = set(month_invoices.values_list('resident_id', flat=True))
+
+        payments = [
+            Payment(
+                resident_id=resident_id,
+                month=month_str,
+                amount=monthly_rent,
+                amount_paid=0,
+                payment_type='rent',
+                due_date=due_date,
+                status=status
+            )
+            for resident_id, monthly_rent in residents.values_list('id', 'monthly_rent')
+            if resident_id not in invoiced
+        ]
+        created = 0
+        if payments:
+            before = month_invoices.count()
+            Payment.objects.bulk_create(payments, batch_size=500, ignore_conflicts=True)
+            created = month_invoices.count() - before
+
+        # bulk_create sends no post_save, so refresh the month's summary here
+        if created:
+            refresh_month_summary(month_str, 'rent')
+            stats.invalidate(Payment)
+
+    return created
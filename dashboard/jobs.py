@@ -0,0 +1,138 @@
+import time
+from contextlib import contextmanager
+from datetime import date
+
+from django.db import transaction
+from django.db.models import Case, DateField, Func, IntegerField, Max, Min, Value, When
+from django.utils import timezone
+
+from .models import Payment, WorkOrder, JobRun
+from .summaries import refresh_month_summary
+from . import stats
+
+
+@contextmanager
+def record_run(name):
+    """
+    Time a batch job and store a JobRun for it.
+
+    The block sets run.rows_affected (and optionally run.notes); the run
+    is saved when the block exits, even if it raised.
+    """
+    run = JobRun(name=name, started_at=timezone.now())
+    start = time.monotonic()
+    try:
+        yield run
+    except Exception as e:
+        run.notes = f'Failed: {e}'
+        raise
+    finally:
+        run.duration_ms = int((time.monotonic() - start) * 1000)
+        run.finished_at = timezone.now()
+        run.save()
+
+
+def mark_overdue_payments(today=None):
+    """Flip every unpaid, past-due pending payment to overdue in one UPDATE"""
+    today = today or date.today()
+
+    with transaction.atomic():
+        stale = Payment.objects.filter(status='pending', due_date__lt=today)
+        touched = set(stale.order_by().values_list('month', 'payment_type').distinct())
+        count = stale.update(status='overdue', updated_at=timezone.now())
+
+        # .update() sends no signals, so refresh the affected summaries here
+        for month, payment_type in touched:
+            refresh_month_summary(month, payment_type)
+        if count:
+            stats.invalidate(Payment)
+
+    return count
+
+
+# Work orders updated per statement by refresh_work_order_lateness
+LATENESS_CHUNK_SIZE = 5000
+
+# Work orders that are still running late or may become late
+OPEN_WORK_ORDER_STATUSES = WorkOrder.OPEN_STATUSES
+
+
+class DaysBetween(Func):
+    """Whole days from the second date expression to the first"""
+    arg_joiner = ' - '
+    template = '(%(expressions)s)'
+    output_field = IntegerField()
+
+    def as_sqlite(self, compiler, connection, **extra_context):
+        return super().as_sql(
+            compiler, connection,
+            template='CAST(julianday(%(expressions)s) AS INTEGER)',
+            arg_joiner=') - julianday(',
+            **extra_context
+        )
+
+    def as_mysql(self, compiler, connection, **extra_context):
+        return super().as_sql(
+            compiler, connection,
+            template='DATEDIFF(%(expressions)s)',
+            arg_joiner=', ',
+            **extra_context
+        )
+
+
+def refresh_work_order_lateness(today=None, chunk_size=LATENESS_CHUNK_SIZE):
+    """
+    Recompute days_late of open work orders and flip overdue ones to delayed.
+
+    The table is walked in primary key ranges of chunk_size rows, each
+    updated in its own short transaction: one UPDATE sets days_late (a
+    date difference computed by the database) and the delayed status of
+    the late orders, a second resets orders that are no longer late.
+    Delayed orders whose due date was moved into the future go back to
+    the status they were delayed from (open if it is not known). Returns
+    the number of rows updated.
+    """
+    today = today or date.today()
+    now = timezone.now()
+    open_orders = WorkOrder.objects.filter(status__in=OPEN_WORK_ORDER_STATUSES)
+
+    bounds = open_orders.aggregate(first=Min('pk'), last=Max('pk'))
+    if bounds['first'] is None:
+        return 0
+
+    count = 0
+    for start in range(bounds['first'], bounds['last'] + 1, chunk_size):
+        chunk = open_orders.filter(pk__gte=start, pk__lt=start + chunk_size)
+        late = chunk.filter(due_date__lt=today)
+
+        with transaction.atomic():
+            count += late.update(
+                days_late=DaysBetween(Value(today, output_field=DateField()), 'due_date'),
+                status=Case(
+                    When(status__in=WorkOrder.ACTIVE_STATUSES, then=Value('delayed')),
+                    default='status',
+                ),
+                status_before_delay=Case(
+                    When(status__in=WorkOrder.ACTIVE_STATUSES, then='status'),
+                    default='status_before_delay',
+                ),
+                updated_at=now
+            )
+
+            on_time = chunk.exclude(due_date__lt=today)
+            count += on_time.filter(days_late__gt=0).exclude(status='delayed').update(days_late=0, updated_at=now)
+            count += on_time.filter(status='delayed', due_date__isnull=False).update(
+                status=Case(
+                    When(status_before_delay__in=WorkOrder.ACTIVE_STATUSES, then='status_before_delay'),
+                    default=Value('open'),
+                ),
+                status_before_delay='',
+                days_late=0,
+                updated_at=now
+            )
+
+    if count:
+        # .update() sends no signals
+        stats.invalidate(WorkOrder)
+
+    return count
@@ -0,0 +1,116 @@
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Case, DecimalField, F, OuterRef, Subquery, Sum, Value, When
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from . import search, stats
+from .jobs import record_run
+from .models import Payment, PaymentTransaction
+from .summaries import SUMMARY_FIELDS, adjust_month_summaries, refresh_month_summary, summary_values
+
+
+def record_transaction(payment_id, amount, payment_method='', transaction_code='',
+                       paid_date=None, notes='', recorded_by=None):
+    """
+    Append a receipt to the ledger and add it to the payment's amount_paid.
+
+    Only the one payment row is locked (select_for_update), and the new
+    amount_paid, status and paid flag are computed by the database in a
+    single UPDATE, so concurrent receipts for the same invoice queue up
+    instead of overwriting each other. The month summary is adjusted by
+    the difference rather than recomputed.
+    """
+    amount = Decimal(amount)
+    if amount <= 0:
+        raise ValueError('Amount must be greater than zero')
+
+    with transaction.atomic():
+        locked = Payment.objects.select_for_update().only(*SUMMARY_FIELDS).get(pk=payment_id)
+
+        entry = PaymentTransaction.objects.create(
+            payment_id=payment_id,
+            amount=amount,
+            payment_method=payment_method,
+            transaction_code=transaction_code,
+            paid_date=paid_date,
+            notes=notes,
+            recorded_by=recorded_by
+        )
+
+        # The latest receipt's details are kept on the payment for display
+        amount_paid = F('amount_paid') + amount
+        updates = {
+            'amount_paid': amount_paid,
+            'status': Payment.status_expression(amount_paid),
+            'paid': Payment.paid_expression(amount_paid),
+            'updated_at': timezone.now(),
+        }
+        if payment_method:
+            updates['payment_method'] = payment_method
+        if transaction_code:
+            updates['transaction_code'] = transaction_code
+        if paid_date:
+            updates['paid_date'] = paid_date
+        Payment.objects.filter(pk=payment_id).update(**updates)
+
+        payment = Payment.objects.select_related('resident__user').get(pk=payment_id)
+
+        # .update() sends no signals; the summary gets the difference, under the lock
+        adjust_month_summaries(old=summary_values(locked), new=summary_values(payment))
+
+    stats.invalidate(Payment)
+    search.index_object('payment', payment)
+
+    return entry, payment
+
+
+def ledger_total():
+    """Sum of a payment's ledger entries, for use in annotate() and update()"""
+    totals = PaymentTransaction.objects.filter(
+        payment=OuterRef('pk')
+    ).order_by().values('payment').annotate(total=Sum('amount')).values('total')
+    return Coalesce(
+        Subquery(totals),
+        Value(Decimal('0')),
+        output_field=DecimalField(max_digits=10, decimal_places=2)
+    )
+
+
+def ledger_mismatches():
+    """Payments whose amount_paid differs from the sum of their ledger entries"""
+    return Payment.objects.annotate(ledger_total=ledger_total()).exclude(
+        amount_paid=F('ledger_total')
+    ).order_by('pk')
+
+
+def reconcile_payments(fix=False):
+    """
+    Compare every payment's amount_paid with its ledger.
+
+    Returns the mismatched payments as (id, amount_paid, ledger_total)
+    rows. With fix=True the ledger wins: amount_paid, status and paid are
+    reset from it in one set-based UPDATE.
+    """
+    with record_run('reconcile_payments') as run:
+        mismatches = list(ledger_mismatches().values_list('pk', 'amount_paid', 'ledger_total'))
+        run.notes = f'{len(mismatches)} payments differ from their ledger'
+
+        if fix and mismatches:
+            ids = [pk for pk, _, _ in mismatches]
+            with transaction.atomic():
+                fixed = Payment.objects.filter(pk__in=ids)
+                touched = set(fixed.order_by().values_list('month', 'payment_type').distinct())
+                total = ledger_total()
+                run.rows_affected = fixed.update(
+                    amount_paid=total,
+                    status=Payment.status_expression(total),
+                    paid=Case(When(amount__lte=total, then=Value(True)), default=Value(False)),
+                    updated_at=timezone.now(),
+                )
+                for month, payment_type in touched:
+                    refresh_month_summary(month, payment_type)
+            stats.invalidate(Payment)
+
+    return mismatches
@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+
+from dashboard.parking import allocate_parking
+
+
+class Command(BaseCommand):
+    help = "Give every unit's parking slots (P-101A, P-101B...) to the unit's active resident"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help='Print the changes without saving them')
+
+    def handle(self, *args, **options):
+        plan = allocate_parking(dry_run=options['dry_run'])
+
+        for change in plan.changes:
+            old = change.old_resident_id or '-'
+            new = change.new_resident_id or '-'
+            self.stdout.write(f'{change.slot_number}: resident {old} -> {new}')
+        for unit_number in plan.units_without_slots:
+            self.stdout.write(self.style.WARNING(f'Unit {unit_number} has an active resident but no parking slots'))
+
+        self.stdout.write(self.style.SUCCESS(
+            f'{"Dry run: " if options["dry_run"] else ""}{len(plan.assigned)} slots assigned, '
+            f'{len(plan.released)} released, {plan.unchanged} unchanged'
+        ))
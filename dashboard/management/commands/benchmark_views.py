@@ -0,0 +1,138 @@
+import json
+import statistics
+import time
+import tracemalloc
+
+import django
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from dashboard.models import Resident, Payment, WorkOrder, Unit, ParkingSlot, Subcontractor
+from dashboard.querycount import QueryRecorder
+from dashboard.urls import urlpatterns
+
+# Views that take no URL arguments but should not be benchmarked
+SKIPPED = {'logout', 'signup'}
+
+
+def percentile(values, pct):
+    values = sorted(values)
+    index = min(len(values) - 1, max(0, round(pct / 100 * len(values) + 0.5) - 1))
+    return values[index]
+
+
+class Command(BaseCommand):
+    help = 'Benchmark every page in dashboard/urls.py through the test client'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--runs', type=int, default=20, help='Timed requests per page')
+        parser.add_argument('--warmup', type=int, default=2, help='Untimed requests per page')
+        parser.add_argument('--user', help='Username to log in as (defaults to the first active resident)')
+        parser.add_argument('--path', action='append', default=[],
+                            help='Extra path to benchmark, e.g. "/rent/?search=kamau" (repeatable)')
+        parser.add_argument('--output', help='Write the results as JSON to this file')
+
+    def handle(self, *args, **options):
+        if options['runs'] < 1:
+            raise CommandError('--runs must be at least 1')
+
+        user = self.get_user(options['user'])
+        client = Client()
+        client.force_login(user)
+
+        pages = [
+            (pattern.name, reverse(pattern.name))
+            for pattern in urlpatterns
+            if not pattern.pattern.converters and pattern.name not in SKIPPED
+        ]
+        pages += [(path, path) for path in options['path']]
+
+        results = []
+        with override_settings(ALLOWED_HOSTS=['testserver']):
+            for name, path in pages:
+                result = self.benchmark(client, name, path, options['runs'], options['warmup'])
+                if result:
+                    results.append(result)
+
+        self.report(results)
+
+        if options['output']:
+            report = {
+                'timestamp': timezone.now().isoformat(),
+                'django': django.get_version(),
+                'database': connection.vendor,
+                'runs': options['runs'],
+                'rows': {
+                    'residents': Resident.objects.count(),
+                    'payments': Payment.objects.count(),
+                    'work_orders': WorkOrder.objects.count(),
+                    'units': Unit.objects.count(),
+                    'parking_slots': ParkingSlot.objects.count(),
+                    'subcontractors': Subcontractor.objects.count(),
+                },
+                'results': results,
+            }
+            with open(options['output'], 'w') as f:
+                json.dump(report, f, indent=2)
+            self.stdout.write(self.style.SUCCESS(f'Wrote {options["output"]}'))
+
+    def get_user(self, username):
+        if username:
+            try:
+                return User.objects.get(username=username)
+            except User.DoesNotExist:
+                raise CommandError(f'User {username} not found')
+
+        # dashboard_view needs a user with a resident profile
+        resident = Resident.objects.filter(status='active').select_related('user').first()
+        if resident is None:
+            raise CommandError('No active resident to log in as; run generate_portfolio first or pass --user')
+        return resident.user
+
+    def benchmark(self, client, name, path, runs, warmup):
+        response = client.get(path)
+        if response.status_code != 200:
+            # Form endpoints only redirect on GET
+            self.stdout.write(f'Skipping {path} ({response.status_code})')
+            return None
+
+        for _ in range(warmup):
+            client.get(path)
+
+        timings, queries, db_times = [], [], []
+        for _ in range(runs):
+            with QueryRecorder() as recorder:
+                start = time.perf_counter()
+                client.get(path)
+                timings.append((time.perf_counter() - start) * 1000)
+            queries.append(recorder.count)
+            db_times.append(recorder.duration_ms)
+
+        # Measure memory in a separate request, tracemalloc slows everything down
+        tracemalloc.start()
+        client.get(path)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        return {
+            'name': name,
+            'path': path,
+            'p50_ms': round(statistics.median(timings), 2),
+            'p95_ms': round(percentile(timings, 95), 2),
+            'mean_ms': round(statistics.mean(timings), 2),
+            'queries': max(queries),
+            'db_ms': round(statistics.median(db_times), 2),
+            'peak_memory_kb': round(peak / 1024, 1),
+        }
+
+    def report(self, results):
+        self.stdout.write(f'{"page":<32}{"p50 ms":>10}{"p95 ms":>10}{"queries":>9}{"db ms":>9}{"peak KB":>10}')
+        for result in results:
+            self.stdout.write(
+                f'{result["path"]:<32}{result["p50_ms"]:>10}{result["p95_ms"]:>10}'
+                f'{result["queries"]:>9}{result["db_ms"]:>9}{result["peak_memory_kb"]:>10}'
+            )
@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+
+from dashboard.occupancy import DRIFT_CHECKS, repair_occupancy
+
+
+class Command(BaseCommand):
+    help = 'Find drift between Unit.resident, Unit.status and Resident.unit_number, and repair it with --fix'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--fix', action='store_true', help='Repair the drift instead of only reporting it')
+
+    def handle(self, *args, **options):
+        repaired = repair_occupancy(dry_run=not options['fix'])
+
+        for check, description in DRIFT_CHECKS:
+            style = self.style.WARNING if repaired[check] else self.style.SUCCESS
+            self.stdout.write(style(f'{repaired[check]:>6}  {description}'))
+
+        total = sum(repaired.values())
+        if options['fix']:
+            self.stdout.write(self.style.SUCCESS(f'Repaired {total} rows'))
+        elif total:
+            self.stdout.write(self.style.WARNING(f'{total} rows drifted; run with --fix to repair them'))
+        else:
+            self.stdout.write(self.style.SUCCESS('Occupancy is consistent'))
@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+
+from dashboard.dispatch import backlog, dispatch_backlog
+
+
+class Command(BaseCommand):
+    help = 'Assign unassigned open work orders to the least loaded active contractor of their category'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help='Show the assignments without saving them')
+
+    def handle(self, *args, **options):
+        pending = backlog().count()
+        assignments = dispatch_backlog(dry_run=options['dry_run'])
+
+        for contractor_id, order_ids in sorted(assignments.items()):
+            self.stdout.write(f'Contractor {contractor_id}: {len(order_ids)} orders')
+
+        assigned = sum(len(ids) for ids in assignments.values())
+        self.stdout.write(self.style.SUCCESS(
+            f'{"Would dispatch" if options["dry_run"] else "Dispatched"} {assigned} of {pending} backlog work orders'
+        ))
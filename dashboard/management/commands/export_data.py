@@ -0,0 +1,50 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from dashboard.exports import EXPORTS, iter_csv, parse_date, write_xlsx
+
+
+class Command(BaseCommand):
+    help = 'Export the rent ledger or work orders as CSV or XLSX, streaming rows in chunks'
+
+    def add_arguments(self, parser):
+        parser.add_argument('name', choices=sorted(EXPORTS))
+        parser.add_argument('--status', default='all')
+        parser.add_argument('--priority', default='all', help='Work orders only')
+        parser.add_argument('--category', default='all', help='Work orders only')
+        parser.add_argument('--search', default='')
+        parser.add_argument('--from', dest='from', help='First date to include, YYYY-MM-DD')
+        parser.add_argument('--to', help='Last date to include, YYYY-MM-DD')
+        parser.add_argument('--year', type=int, help='Shortcut for --from YYYY-01-01 --to YYYY-12-31')
+        parser.add_argument('--format', choices=['csv', 'xlsx'], default='csv')
+        parser.add_argument('--output', help='File to write (CSV defaults to stdout)')
+
+    def handle(self, *args, **options):
+        params = {
+            key: options[key]
+            for key in ('status', 'priority', 'category', 'search', 'from', 'to')
+            if options[key]
+        }
+        if options['year']:
+            params['from'] = f'{options["year"]}-01-01'
+            params['to'] = f'{options["year"]}-12-31'
+        for key in ('from', 'to'):
+            if key in params and parse_date(params[key]) is None:
+                raise CommandError(f'--{key} must be in YYYY-MM-DD format')
+
+        if options['format'] == 'xlsx':
+            if not options['output']:
+                raise CommandError('XLSX export needs --output')
+            try:
+                write_xlsx(options['name'], params, options['output'])
+            except RuntimeError as e:
+                raise CommandError(str(e))
+        elif options['output']:
+            with open(options['output'], 'w', newline='') as f:
+                f.writelines(iter_csv(options['name'], params))
+        else:
+            sys.stdout.writelines(iter_csv(options['name'], params))
+
+        if options['output']:
+            self.stdout.write(self.style.SUCCESS(f'Wrote {options["output"]}'))
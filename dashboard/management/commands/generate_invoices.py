@@ -0,0 +1,44 @@
+from datetime import date, datetime
+
+from dateutil.relativedelta import relativedelta
+from django.core.management.base import BaseCommand, CommandError
+
+from dashboard.invoices import generate_invoices, invoice_period
+
+
+class Command(BaseCommand):
+    help = 'Generate monthly rent invoices for all active tenants'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--month',
+            help='First month to invoice as YYYY-MM (defaults to next month)'
+        )
+        parser.add_argument(
+            '--months',
+            type=int,
+            default=1,
+            help='Number of consecutive months to invoice'
+        )
+
+    def handle(self, *args, **options):
+        if options['month']:
+            try:
+                start = datetime.strptime(options['month'], '%Y-%m').date()
+            except ValueError:
+                raise CommandError('--month must be in YYYY-MM format')
+        else:
+            start = (date.today() + relativedelta(months=1)).replace(day=1)
+
+        if options['months'] < 1:
+            raise CommandError('--months must be at least 1')
+
+        total = 0
+        for offset in range(options['months']):
+            month_date = start + relativedelta(months=offset)
+            month_str, _ = invoice_period(month_date)
+            created_count = generate_invoices(month_date)
+            total += created_count
+            self.stdout.write(f'{month_str}: {created_count} invoices created')
+
+        self.stdout.write(self.style.SUCCESS(f'Generated {total} invoices'))
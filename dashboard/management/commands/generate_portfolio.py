@@ -0,0 +1,239 @@
+import random
+import time
+from datetime import date, timedelta
+from decimal import Decimal
+
+from dateutil.relativedelta import relativedelta
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from dashboard import search, stats
+from dashboard.models import Resident, Payment, PaymentTransaction, WorkOrder, Unit, ParkingSlot, Subcontractor
+from dashboard.sequences import next_work_order_ids
+from dashboard.summaries import rebuild_month_summaries
+
+FIRST_NAMES = [
+    'Amina', 'Brian', 'Cynthia', 'David', 'Esther', 'Felix', 'Grace', 'Hassan', 'Irene', 'James',
+    'Kevin', 'Lucy', 'Mercy', 'Njeri', 'Otieno', 'Peter', 'Purity', 'Samuel', 'Wanjiku', 'Zawadi',
+]
+LAST_NAMES = [
+    'Achieng', 'Baraka', 'Chege', 'Kamau', 'Kiprop', 'Mutua', 'Mwangi', 'Njoroge', 'Odhiambo', 'Ochieng',
+    'Omondi', 'Otieno', 'Wafula', 'Wambui', 'Wanjala', 'Karanja', 'Kariuki', 'Muthoni', 'Nyambura', 'Rotich',
+]
+UNITS_PER_FLOOR = 20
+BATCH_SIZE = 5000
+
+
+class Command(BaseCommand):
+    help = (
+        'Generate a synthetic portfolio of residents, units, parking, payments, work orders '
+        'and subcontractors for benchmarking. Meant for an empty database.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--residents', type=int, default=1000)
+        parser.add_argument('--payments', type=int, default=None,
+                            help='Total payments (defaults to 12 months of rent per resident)')
+        parser.add_argument('--work-orders', type=int, default=None,
+                            help='Total work orders (defaults to 5 per resident)')
+        parser.add_argument('--subcontractors', type=int, default=None,
+                            help='Total subcontractors (defaults to 1 per 50 residents)')
+        parser.add_argument('--vacancy', type=float, default=0.1,
+                            help='Share of extra vacant units on top of the occupied ones')
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        residents = options['residents']
+        if residents < 1:
+            raise CommandError('--residents must be at least 1')
+
+        self.random = random.Random(options['seed'])
+        # Unique per run so usernames and emails never collide with earlier runs
+        self.prefix = f'gen{int(time.time())}'
+        payments = options['payments'] if options['payments'] is not None else residents * 12
+        work_orders = options['work_orders'] if options['work_orders'] is not None else residents * 5
+        subcontractors = options['subcontractors'] or max(1, residents // 50)
+
+        resident_ids = self.create_residents(residents)
+        self.create_units_and_parking(resident_ids, options['vacancy'])
+        contractor_ids = self.create_subcontractors(subcontractors)
+        self.create_payments(resident_ids, payments)
+        self.create_work_orders(resident_ids, contractor_ids, work_orders)
+
+        # bulk_create sends no signals, so rebuild the derived data once
+        self.stdout.write('Rebuilding search index and rent summaries...')
+        search.rebuild()
+        rebuild_month_summaries()
+        stats.invalidate(Resident, Payment, WorkOrder, Unit, ParkingSlot, Subcontractor)
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Generated {residents} residents, {payments} payments, {work_orders} work orders '
+            f'and {subcontractors} subcontractors'
+        ))
+
+    def batches(self, total):
+        for start in range(0, total, BATCH_SIZE):
+            yield range(start, min(start + BATCH_SIZE, total))
+
+    def unit_number(self, index):
+        return f'{index // UNITS_PER_FLOOR + 1}{index % UNITS_PER_FLOOR + 1:02d}'
+
+    def create_residents(self, total):
+        password = make_password('password123')
+        today = date.today()
+        resident_ids = []
+
+        for batch in self.batches(total):
+            with transaction.atomic():
+                users = User.objects.bulk_create([
+                    User(
+                        username=f'{self.prefix}.{i}',
+                        first_name=self.random.choice(FIRST_NAMES),
+                        last_name=self.random.choice(LAST_NAMES),
+                        email=f'{self.prefix}.{i}@example.com',
+                        password=password
+                    )
+                    for i in batch
+                ])
+                created = Resident.objects.bulk_create([
+                    Resident(
+                        user=user,
+                        unit_number=self.unit_number(i),
+                        phone=f'07{self.random.randint(10000000, 99999999)}',
+                        move_in_date=today - timedelta(days=self.random.randint(30, 2000)),
+                        monthly_rent=Decimal(self.random.choice([8000, 12000, 15000, 25000, 40000])),
+                        status=self.random.choices(['active', 'pending', 'moved_out'], [90, 5, 5])[0]
+                    )
+                    for i, user in zip(batch, users)
+                ])
+            resident_ids.extend((resident.id, resident.monthly_rent) for resident in created)
+            self.stdout.write(f'  residents: {len(resident_ids)}/{total}')
+
+        return resident_ids
+
+    def create_units_and_parking(self, resident_ids, vacancy):
+        total = int(len(resident_ids) * (1 + vacancy))
+        existing = set(Unit.objects.values_list('unit_number', flat=True))
+
+        for batch in self.batches(total):
+            units, slots = [], []
+            for i in batch:
+                number = self.unit_number(i)
+                if number in existing:
+                    continue
+                resident_id, rent = resident_ids[i] if i < len(resident_ids) else (None, Decimal(15000))
+                units.append(Unit(
+                    unit_number=number,
+                    unit_type=self.random.choice(['studio', '1br', '2br', '3br', '4br']),
+                    floor=i // UNITS_PER_FLOOR + 1,
+                    size_sqm=Decimal(self.random.randint(25, 160)),
+                    rent_amount=rent,
+                    status='occupied' if resident_id else self.random.choice(['vacant', 'maintenance']),
+                    resident_id=resident_id
+                ))
+                for suffix in 'AB':
+                    slots.append(ParkingSlot(
+                        slot_number=f'P-{number}{suffix}',
+                        resident_id=resident_id,
+                        status='assigned' if resident_id else 'available',
+                        assigned_date=date.today() if resident_id else None
+                    ))
+            with transaction.atomic():
+                Unit.objects.bulk_create(units)
+                ParkingSlot.objects.bulk_create(slots, ignore_conflicts=True)
+            self.stdout.write(f'  units: {batch.stop}/{total}')
+
+    def create_subcontractors(self, total):
+        categories = [category for category, _ in Subcontractor.CATEGORY_CHOICES]
+        created = Subcontractor.objects.bulk_create([
+            Subcontractor(
+                name=f'{self.random.choice(FIRST_NAMES)} {self.random.choice(LAST_NAMES)}',
+                company_name=f'{self.random.choice(LAST_NAMES)} Services',
+                category=categories[i % len(categories)],
+                phone=f'07{self.random.randint(10000000, 99999999)}',
+                email=f'{self.prefix}.contractor{i}@example.com',
+                status=self.random.choices(['active', 'inactive'], [85, 15])[0],
+                rating=Decimal(self.random.randint(20, 50)) / 10
+            )
+            for i in range(total)
+        ])
+        return [contractor.id for contractor in created]
+
+    def create_payments(self, resident_ids, total):
+        today = date.today()
+        months = max(1, -(-total // len(resident_ids)))
+
+        for batch in self.batches(total):
+            payments = []
+            for i in batch:
+                resident_id, rent = resident_ids[i % len(resident_ids)]
+                month_date = today.replace(day=1) - relativedelta(months=i // len(resident_ids) % months)
+                due_date = month_date.replace(day=5)
+                outcome = self.random.random()
+                if outcome < 0.8:
+                    amount_paid, status = rent, 'paid'
+                elif outcome < 0.9:
+                    amount_paid, status = (rent / 2).quantize(Decimal('0.01')), 'partial'
+                else:
+                    amount_paid, status = Decimal(0), 'overdue' if due_date < today else 'pending'
+                payments.append(Payment(
+                    resident_id=resident_id,
+                    month=month_date.strftime('%B %Y'),
+                    amount=rent,
+                    amount_paid=amount_paid,
+                    payment_type='rent',
+                    payment_method='mpesa' if amount_paid else '',
+                    transaction_code=f'{self.prefix.upper()}{i:08d}' if amount_paid else '',
+                    due_date=due_date,
+                    paid=status == 'paid',
+                    paid_date=due_date if amount_paid else None,
+                    status=status
+                ))
+            with transaction.atomic():
+                Payment.objects.bulk_create(payments)
+                # Keep reconcile_payments happy: one receipt per paid amount
+                PaymentTransaction.objects.bulk_create([
+                    PaymentTransaction(
+                        payment=payment,
+                        amount=payment.amount_paid,
+                        payment_method=payment.payment_method,
+                        transaction_code=payment.transaction_code,
+                        paid_date=payment.paid_date
+                    )
+                    for payment in payments
+                    if payment.amount_paid
+                ])
+            self.stdout.write(f'  payments: {batch.stop}/{total}')
+
+    def create_work_orders(self, resident_ids, contractor_ids, total):
+        today = date.today()
+        categories = [category for category, _ in WorkOrder.CATEGORY_CHOICES]
+        priorities = [priority for priority, _ in WorkOrder.PRIORITY_CHOICES]
+        statuses = [status for status, _ in WorkOrder.STATUS_CHOICES]
+
+        for batch in self.batches(total):
+            orders = []
+            # One block of order IDs per batch
+            for order_id in next_work_order_ids(len(batch)):
+                index = self.random.randrange(len(resident_ids))
+                resident_id, _ = resident_ids[index]
+                status = self.random.choice(statuses)
+                due_date = today + timedelta(days=self.random.randint(-60, 30))
+                orders.append(WorkOrder(
+                    order_id=order_id,
+                    title=f'{self.random.choice(categories).replace("_", " ").title()} issue',
+                    description='Generated work order',
+                    unit_number=self.unit_number(index),
+                    category=self.random.choice(categories),
+                    priority=self.random.choice(priorities),
+                    status=status,
+                    assigned_to_id=self.random.choice(contractor_ids) if self.random.random() < 0.8 else None,
+                    resident_id=resident_id,
+                    cost=Decimal(self.random.randint(0, 20000)),
+                    due_date=due_date,
+                    completed_date=due_date if status == 'completed' else None
+                ))
+            WorkOrder.objects.bulk_create(orders, ignore_conflicts=True)
+            self.stdout.write(f'  work orders: {batch.stop}/{total}')
@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from dashboard.tenant_import import DEFAULT_PASSWORD, REQUIRED_COLUMNS, OPTIONAL_COLUMNS, import_tenants
+
+
+class Command(BaseCommand):
+    help = (
+        f'Create tenants in bulk from a CSV file with the columns {", ".join(REQUIRED_COLUMNS)} '
+        f'and optionally {", ".join(OPTIONAL_COLUMNS)}'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='CSV file to import')
+        parser.add_argument('--password', default=DEFAULT_PASSWORD, help='Initial password of every imported user')
+        parser.add_argument('--dry-run', action='store_true', help='Only validate the file')
+
+    def handle(self, *args, **options):
+        try:
+            with open(options['path'], newline='', encoding='utf-8-sig') as f:
+                result = import_tenants(f, password=options['password'], dry_run=options['dry_run'])
+        except OSError as e:
+            raise CommandError(str(e))
+
+        for line, error in result.errors:
+            self.stderr.write(f'Line {line}: {error}')
+
+        if options['dry_run']:
+            self.stdout.write(f'{result.valid} valid rows, {len(result.errors)} with errors')
+        else:
+            self.stdout.write(self.style.SUCCESS(
+                f'Imported {result.created} tenants, skipped {len(result.errors)} rows with errors'
+            ))
@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from dashboard.jobs import mark_overdue_payments, record_run
+
+
+class Command(BaseCommand):
+    help = (
+        'Mark all pending payments past their due date as overdue. '
+        'Meant to run daily from cron, e.g. "5 0 * * * python manage.py mark_overdue_payments".'
+    )
+
+    def handle(self, *args, **options):
+        with record_run('mark_overdue_payments') as run:
+            run.rows_affected = mark_overdue_payments()
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Marked {run.rows_affected} payments overdue in {run.duration_ms} ms'
+        ))
@@ -0,0 +1,39 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from dashboard.models import Resident
+from dashboard.move_out import move_out
+
+
+class Command(BaseCommand):
+    help = (
+        'Move out the tenants of the given units in one transaction, freeing their parking slots '
+        'and units, cancelling unpaid future invoices and detaching their open work orders.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('units', nargs='*', help='Unit numbers whose tenants move out')
+        parser.add_argument('--file', help='Text file with one unit number per line, for end-of-lease batches')
+        parser.add_argument('--date', help='Move-out date (YYYY-MM-DD), defaults to today')
+        parser.add_argument('--dry-run', action='store_true', help='Show what would change without saving')
+
+    def handle(self, *args, **options):
+        units = set(options['units'])
+        if options['file']:
+            with open(options['file'], encoding='utf-8') as f:
+                units.update(line.strip() for line in f if line.strip())
+        if not units:
+            raise CommandError('Give unit numbers or --file')
+
+        try:
+            move_out_date = date.fromisoformat(options['date']) if options['date'] else None
+        except ValueError:
+            raise CommandError(f'--date must be YYYY-MM-DD, got {options["date"]}')
+
+        resident_ids = Resident.objects.filter(
+            unit_number__in=units
+        ).exclude(status='moved_out').values_list('pk', flat=True)
+        result = move_out(resident_ids, move_out_date=move_out_date, dry_run=options['dry_run'])
+
+        self.stdout.write(self.style.SUCCESS(f'{"Dry run: " if options["dry_run"] else ""}{result}'))
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from dashboard.summaries import rebuild_month_summaries
+
+
+class Command(BaseCommand):
+    help = 'Recompute the monthly rent ledger summaries from all payments'
+
+    def handle(self, *args, **options):
+        count = rebuild_month_summaries()
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt {count} month summaries'))
@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from dashboard import search
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the full-text search index for tenants, payments, work orders, subcontractors and units'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'kinds',
+            nargs='*',
+            help=f'Only rebuild these kinds: {", ".join(search.KIND_CODES)} (defaults to all)'
+        )
+
+    def handle(self, *args, **options):
+        if not search.search_enabled():
+            raise CommandError('The search index requires SQLite with FTS5; run migrate first')
+
+        kinds = options['kinds'] or list(search.KIND_CODES)
+        unknown = [kind for kind in kinds if kind not in search.KIND_CODES]
+        if unknown:
+            raise CommandError(f'Unknown kind(s): {", ".join(unknown)}')
+
+        with transaction.atomic():
+            search.rebuild(kinds)
+
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt search index for {", ".join(kinds)}'))
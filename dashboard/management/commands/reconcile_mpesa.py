@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from dashboard.mpesa import reconcile_statement
+
+
+class Command(BaseCommand):
+    help = 'Match an M-Pesa statement CSV against open invoices and queue the rest for review'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Statement CSV exported from the M-Pesa portal')
+        parser.add_argument('--dry-run', action='store_true', help='Report the matches without recording them')
+
+    def handle(self, *args, **options):
+        try:
+            with open(options['path'], newline='', encoding='utf-8-sig') as f:
+                result = reconcile_statement(f, dry_run=options['dry_run'])
+        except OSError as e:
+            raise CommandError(str(e))
+
+        for line, error in result.errors:
+            self.stderr.write(f'Line {line}: {error}')
+
+        for reason, count in sorted(result.queued.items()):
+            self.stdout.write(f'{count} queued for review: {reason}')
+        self.stdout.write(
+            f'{result.duplicates} already recorded, {result.skipped} skipped (withdrawals, failed)'
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f'{"Would match" if options["dry_run"] else "Matched"} {result.matched} transactions'
+        ))
@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+
+from dashboard.ledger import reconcile_payments
+
+
+class Command(BaseCommand):
+    help = 'Check that every payment\'s amount_paid equals the sum of its ledger transactions'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--fix', action='store_true',
+                            help='Reset amount_paid and status of mismatched payments from the ledger')
+
+    def handle(self, *args, **options):
+        mismatches = reconcile_payments(fix=options['fix'])
+
+        for payment_id, amount_paid, total in mismatches:
+            self.stdout.write(f'Payment {payment_id}: amount_paid {amount_paid}, ledger {total}')
+
+        if not mismatches:
+            self.stdout.write(self.style.SUCCESS('All payments match their ledger'))
+        elif options['fix']:
+            self.stdout.write(self.style.SUCCESS(f'Reset {len(mismatches)} payments from their ledger'))
+        else:
+            self.stdout.write(self.style.WARNING(
+                f'{len(mismatches)} payments differ from their ledger; run with --fix to reset them'
+            ))
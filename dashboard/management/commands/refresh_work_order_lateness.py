@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+
+from dashboard.jobs import LATENESS_CHUNK_SIZE, record_run, refresh_work_order_lateness
+
+
+class Command(BaseCommand):
+    help = (
+        'Recompute days_late of open work orders and mark overdue ones as delayed. '
+        'Meant to run daily from cron, e.g. "10 0 * * * python manage.py refresh_work_order_lateness".'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--chunk-size', type=int, default=LATENESS_CHUNK_SIZE,
+            help='Work orders updated per statement'
+        )
+
+    def handle(self, *args, **options):
+        with record_run('refresh_work_order_lateness') as run:
+            run.rows_affected = refresh_work_order_lateness(chunk_size=options['chunk_size'])
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Updated {run.rows_affected} work orders in {run.duration_ms} ms'
+        ))
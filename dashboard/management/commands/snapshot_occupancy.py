@@ -0,0 +1,29 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from dashboard.jobs import record_run
+from dashboard.snapshots import take_occupancy_snapshot
+
+
+class Command(BaseCommand):
+    help = (
+        'Store the day\'s occupancy and rent snapshot per unit type and floor. '
+        'Meant to run daily from cron, e.g. "55 23 * * * python manage.py snapshot_occupancy".'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--date', help='Snapshot date (YYYY-MM-DD), defaults to today')
+
+    def handle(self, *args, **options):
+        try:
+            day = date.fromisoformat(options['date']) if options['date'] else date.today()
+        except ValueError:
+            raise CommandError(f'--date must be YYYY-MM-DD, got {options["date"]}')
+
+        with record_run('snapshot_occupancy') as run:
+            run.rows_affected = take_occupancy_snapshot(day)
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Stored {run.rows_affected} snapshot rows for {day} in {run.duration_ms} ms'
+        ))
@@ -0,0 +1,84 @@
+import logging
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+
+from .querycount import QueryRecorder
+
+logger = logging.getLogger('dashboard.queries')
+
+DEFAULT_QUERY_BUDGET = {
+    'MAX_QUERIES': 30,
+    'DUPLICATE_THRESHOLD': 5,
+    'SERVER_TIMING': False,
+}
+
+
+class QueryBudgetMiddleware:
+    """
+    Count the SQL queries of every request and warn when a view goes over budget.
+
+    Configured with the QUERY_BUDGET setting: MAX_QUERIES per request,
+    DUPLICATE_THRESHOLD for how many times one query shape may repeat
+    before it is reported as a likely N+1, and SERVER_TIMING to add a
+    Server-Timing header with the query count and database time.
+
+    Runs natively under both WSGI and ASGI, like Django's own middleware.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        # Under ASGI the async API views are not forced through a thread
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+
+        with QueryRecorder() as recorder:
+            response = self.get_response(request)
+
+        return self.check_budget(request, response, recorder)
+
+    async def __acall__(self, request):
+        # Connections are per thread: the ORM calls of an async view run in
+        # the request's thread-sensitive sync_to_async thread, so the
+        # recorder is attached to that thread's connection. Stat functions
+        # the API runs in worker threads of their own are not counted.
+        recorder = QueryRecorder()
+        await sync_to_async(recorder.__enter__)()
+        try:
+            response = await self.get_response(request)
+        finally:
+            await sync_to_async(recorder.__exit__)(None, None, None)
+
+        return self.check_budget(request, response, recorder)
+
+    def check_budget(self, request, response, recorder):
+        """Log the request if it went over budget and add the Server-Timing header"""
+        budget = {**DEFAULT_QUERY_BUDGET, **getattr(settings, 'QUERY_BUDGET', {})}
+
+        if recorder.count > budget['MAX_QUERIES']:
+            logger.warning(
+                '%s %s ran %d queries (budget %d, %.1f ms in the database)',
+                request.method, request.path, recorder.count,
+                budget['MAX_QUERIES'], recorder.duration_ms
+            )
+
+        for sql, count in recorder.repeated(budget['DUPLICATE_THRESHOLD']).items():
+            logger.warning(
+                '%s %s repeated the same query %d times (possible N+1): %s',
+                request.method, request.path, count, sql
+            )
+
+        if budget['SERVER_TIMING']:
+            response['Server-Timing'] = (
+                f'db;dur={recorder.duration_ms:.1f};desc="{recorder.count} queries"'
+            )
+
+        return response
@@ -0,0 +1,67 @@
+from django.db import migrations
+from django.db.utils import OperationalError
+
+# Frozen copy of the statements in dashboard.search.REBUILD_SQL
+POPULATE_SQL = [
+    """
+    INSERT INTO dashboard_search (rowid, kind, content)
+    SELECT r.id * 8 + 1, 'resident',
+           u.first_name || ' ' || u.last_name || ' ' || u.email || ' ' || r.unit_number || ' ' || r.phone
+    FROM dashboard_resident r JOIN auth_user u ON u.id = r.user_id
+    """,
+    """
+    INSERT INTO dashboard_search (rowid, kind, content)
+    SELECT id * 8 + 2, 'payment', transaction_code
+    FROM dashboard_payment WHERE transaction_code != ''
+    """,
+    """
+    INSERT INTO dashboard_search (rowid, kind, content)
+    SELECT id * 8 + 3, 'workorder', order_id || ' ' || title || ' ' || unit_number || ' ' || description
+    FROM dashboard_workorder
+    """,
+    """
+    INSERT INTO dashboard_search (rowid, kind, content)
+    SELECT id * 8 + 4, 'subcontractor', name || ' ' || company_name || ' ' || phone || ' ' || email
+    FROM dashboard_subcontractor
+    """,
+    """
+    INSERT INTO dashboard_search (rowid, kind, content)
+    SELECT id * 8 + 5, 'unit', unit_number || ' ' || description
+    FROM dashboard_unit
+    """,
+]
+
+
+def create_search_table(apps, schema_editor):
+    # Full-text search is only available on SQLite builds with FTS5; other
+    # backends fall back to icontains filters in the views.
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    with schema_editor.connection.cursor() as cursor:
+        try:
+            cursor.execute(
+                "CREATE VIRTUAL TABLE dashboard_search USING fts5(kind, content, tokenize='unicode61')"
+            )
+        except OperationalError:
+            return
+        for sql in POPULATE_SQL:
+            cursor.execute(sql)
+
+
+def drop_search_table(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute('DROP TABLE IF EXISTS dashboard_search')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dashboard', '0013_composite_indexes'),
+        ('auth', '0012_alter_user_first_name_max_length'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_table, drop_search_table),
+    ]
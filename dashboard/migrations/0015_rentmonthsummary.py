@@ -0,0 +1,35 @@
+# Generated by Django 5.2.18 on 2026-10-18 12:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dashboard', '0014_search_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RentMonthSummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('month', models.CharField(max_length=20)),
+                ('period', models.DateField(blank=True, null=True)),
+                ('payment_type', models.CharField(choices=[('rent', 'Rent'), ('additional', 'Additional Services'), ('maintenance', 'Maintenance'), ('debt', 'Debt')], default='rent', max_length=20)),
+                ('total_expected', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('total_collected', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('total_balance', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('paid_count', models.PositiveIntegerField(default=0)),
+                ('pending_count', models.PositiveIntegerField(default=0)),
+                ('overdue_count', models.PositiveIntegerField(default=0)),
+                ('partial_count', models.PositiveIntegerField(default=0)),
+                ('collection_rate', models.DecimalField(decimal_places=1, default=0, max_digits=5)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'ordering': ['-period'],
+                'constraints': [models.UniqueConstraint(fields=('month', 'payment_type'), name='unique_month_summary')],
+            },
+        ),
+    ]
@@ -0,0 +1,62 @@
+# Generated by Django 5.2.18 on 2026-10-18 12:50
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+BATCH_SIZE = 1000
+
+
+def backfill_transactions(apps, schema_editor):
+    """One opening ledger entry per payment that already has money against it"""
+    Payment = apps.get_model('dashboard', 'Payment')
+    PaymentTransaction = apps.get_model('dashboard', 'PaymentTransaction')
+
+    rows = Payment.objects.filter(amount_paid__gt=0).order_by('pk').values_list(
+        'pk', 'amount_paid', 'payment_method', 'transaction_code', 'paid_date'
+    )
+    batch = []
+    for payment_id, amount_paid, method, code, paid_date in rows.iterator(chunk_size=BATCH_SIZE):
+        batch.append(PaymentTransaction(
+            payment_id=payment_id,
+            amount=amount_paid,
+            payment_method=method,
+            transaction_code=code,
+            paid_date=paid_date,
+            notes='Opening balance from before the payment ledger'
+        ))
+        if len(batch) == BATCH_SIZE:
+            PaymentTransaction.objects.bulk_create(batch)
+            batch = []
+    PaymentTransaction.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dashboard', '0016_jobrun'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PaymentTransaction',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('amount', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('payment_method', models.CharField(blank=True, choices=[('mpesa', 'M-Pesa'), ('bank', 'Bank Transfer'), ('cash', 'Cash'), ('cheque', 'Cheque')], max_length=20)),
+                ('transaction_code', models.CharField(blank=True, max_length=100)),
+                ('paid_date', models.DateField(blank=True, null=True)),
+                ('notes', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('payment', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='transactions', to='dashboard.payment')),
+                ('recorded_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['created_at'],
+                'indexes': [models.Index(fields=['payment', 'created_at'], name='paymenttx_payment_created_idx'), models.Index(fields=['transaction_code'], name='paymenttx_code_idx')],
+            },
+        ),
+        migrations.RunPython(backfill_transactions, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 5.2.18 on 2026-10-18 12:51
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dashboard', '0017_paymenttransaction'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MpesaReviewItem',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('receipt_no', models.CharField(max_length=100, unique=True)),
+                ('paid_at', models.DateTimeField(blank=True, null=True)),
+                ('amount', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('phone', models.CharField(blank=True, max_length=15)),
+                ('account_number', models.CharField(blank=True, max_length=50)),
+                ('details', models.CharField(blank=True, max_length=255)),
+                ('reason', models.CharField(choices=[('unmatched', 'No open invoice found'), ('ambiguous', 'Several open invoices match'), ('amount_mismatch', 'Amount does not match any open invoice of the tenant')], max_length=20)),
+                ('status', models.CharField(choices=[('open', 'Open'), ('resolved', 'Resolved'), ('ignored', 'Ignored')], default='open', max_length=20)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('suggested_payment', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='dashboard.payment')),
+            ],
+            options={
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['status', '-created_at'], name='mpesareview_status_idx')],
+            },
+        ),
+    ]
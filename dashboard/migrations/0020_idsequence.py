@@ -0,0 +1,48 @@
+# Generated by Django 5.2.18 on 2026-10-18 12:57
+
+import re
+
+from django.db import migrations, models
+
+
+def seed_work_order_sequences(apps, schema_editor):
+    # Legacy ids (WO-1234, WO-000123) keep their values and cannot clash
+    # with the WO-YYYY-NNNNNN format; per-year counters start after any
+    # ids already in that format.
+    WorkOrder = apps.get_model('dashboard', 'WorkOrder')
+    IdSequence = apps.get_model('dashboard', 'IdSequence')
+
+    last_values = {}
+    order_ids = WorkOrder.objects.filter(order_id__regex=r'^WO-[0-9]{4}-').values_list('order_id', flat=True)
+    for order_id in order_ids.iterator(chunk_size=5000):
+        found = re.match(r'^WO-(\d{4})-(\d+)$', order_id)
+        if found:
+            name = f'work_order:{found.group(1)}'
+            last_values[name] = max(last_values.get(name, 0), int(found.group(2)))
+
+    IdSequence.objects.bulk_create([
+        IdSequence(name=name, last_value=last_value) for name, last_value in last_values.items()
+    ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dashboard', '0019_workorder_status_late_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='IdSequence',
+            fields=[
+                ('name', models.CharField(max_length=50, primary_key=True, serialize=False)),
+                ('last_value', models.PositiveBigIntegerField(default=0)),
+            ],
+        ),
+        migrations.AlterField(
+            model_name='workorder',
+            name='order_id',
+            field=models.CharField(max_length=20, unique=True),
+        ),
+        migrations.RunPython(seed_work_order_sequences, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 5.2.18 on 2026-10-18 13:01
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def unlink_duplicate_units(apps, schema_editor):
+    # A resident linked to several units keeps the one matching their
+    # unit_number (or the first one); the others become vacant
+    Unit = apps.get_model('dashboard', 'Unit')
+
+    shared = Unit.objects.filter(resident__isnull=False).values('resident').annotate(
+        units=Count('pk')
+    ).filter(units__gt=1).values_list('resident', flat=True)
+
+    extra = []
+    for resident_id in shared:
+        units = list(Unit.objects.filter(resident_id=resident_id).select_related('resident').order_by('pk'))
+        keep = next((unit for unit in units if unit.unit_number == unit.resident.unit_number), units[0])
+        extra.extend(unit.pk for unit in units if unit.pk != keep.pk)
+
+    Unit.objects.filter(pk__in=extra).update(resident=None, status='vacant')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dashboard', '0020_idsequence'),
+    ]
+
+    operations = [
+        migrations.RunPython(unlink_duplicate_units, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='unit',
+            name='resident',
+            field=models.OneToOneField(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='unit', to='dashboard.resident'),
+        ),
+    ]
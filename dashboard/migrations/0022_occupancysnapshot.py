@@ -0,0 +1,31 @@
+# Generated by Django 5.2.18 on 2026-10-18 13:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dashboard', '0021_unit_resident_one_to_one'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OccupancySnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('unit_type', models.CharField(choices=[('studio', 'Studio'), ('1br', '1 Bedroom'), ('2br', '2 Bedrooms'), ('3br', '3 Bedrooms'), ('4br', '4 Bedrooms')], max_length=20)),
+                ('floor', models.IntegerField()),
+                ('occupied', models.PositiveIntegerField(default=0)),
+                ('vacant', models.PositiveIntegerField(default=0)),
+                ('maintenance', models.PositiveIntegerField(default=0)),
+                ('expected_rent', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('collected_rent', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+            ],
+            options={
+                'ordering': ['date', 'floor', 'unit_type'],
+                'constraints': [models.UniqueConstraint(fields=('date', 'unit_type', 'floor'), name='unique_occupancy_snapshot')],
+            },
+        ),
+    ]
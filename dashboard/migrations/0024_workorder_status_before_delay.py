@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 13:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dashboard', '0023_updated_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='workorder',
+            name='status_before_delay',
+            field=models.CharField(blank=True, choices=[('new', 'New'), ('open', 'Open'), ('in_progress', 'In Progress'), ('completed', 'Completed'), ('delayed', 'Delayed')], max_length=20),
+        ),
+    ]
@@ -0,0 +1,67 @@
+# Generated by Django 5.2.18 on 2026-10-18 13:16
+
+from datetime import date
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def merge_duplicate_rent_invoices(apps, schema_editor):
+    # The oldest rent invoice of a resident and month is kept; the receipts
+    # and amounts paid of the others move onto it before they are deleted
+    Payment = apps.get_model('dashboard', 'Payment')
+    PaymentTransaction = apps.get_model('dashboard', 'PaymentTransaction')
+    RentMonthSummary = apps.get_model('dashboard', 'RentMonthSummary')
+
+    groups = Payment.objects.filter(payment_type='rent').order_by().values('resident', 'month').annotate(
+        invoices=Count('pk')
+    ).filter(invoices__gt=1).values_list('resident', 'month')
+
+    today = date.today()
+    removed = []
+    months = set()
+    for resident_id, month in groups:
+        keep, *duplicates = Payment.objects.filter(resident_id=resident_id, month=month, payment_type='rent').order_by('pk')
+        duplicate_ids = [payment.pk for payment in duplicates]
+        PaymentTransaction.objects.filter(payment_id__in=duplicate_ids).update(payment=keep)
+
+        # Same status rules as Payment.save()
+        keep.amount_paid += sum(payment.amount_paid for payment in duplicates)
+        if keep.amount_paid >= keep.amount:
+            keep.status, keep.paid = 'paid', True
+        elif keep.amount_paid > 0:
+            keep.status = 'partial'
+        elif today > keep.due_date:
+            keep.status = 'overdue'
+        else:
+            keep.status = 'pending'
+        keep.save()
+
+        removed.extend(duplicate_ids)
+        months.add(month)
+
+    if not removed:
+        return
+    Payment.objects.filter(pk__in=removed).delete()
+
+    # Dropped summaries are recomputed on first use
+    RentMonthSummary.objects.filter(month__in=months, payment_type='rent').delete()
+    if 'dashboard_search' in schema_editor.connection.introspection.table_names():
+        with schema_editor.connection.cursor() as cursor:
+            for payment_id in removed:
+                cursor.execute('DELETE FROM dashboard_search WHERE rowid = %s', [payment_id * 8 + 2])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dashboard', '0024_workorder_status_before_delay'),
+    ]
+
+    operations = [
+        migrations.RunPython(merge_duplicate_rent_invoices, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='payment',
+            constraint=models.UniqueConstraint(condition=models.Q(('payment_type', 'rent')), fields=('resident', 'month', 'payment_type'), name='payment_one_rent_per_month'),
+        ),
+    ]
@@ -1,7 +1,15 @@
 from django.db import models
+from django.db.models import Avg, Case, Count, F, Q, Sum, Value, When
+from django.db.models.functions import TruncDate
+from django.db.models.lookups import GreaterThan
 from django.contrib.auth.models import User
 from datetime import date
 
+class ResidentQuerySet(models.QuerySet):
+    def unassigned(self):
+        """Residents no unit points at (an anti-join on the unique Unit.resident index)"""
+        return self.filter(unit__isnull=True)
+
 class Resident(models.Model):
     STATUS_CHOICES = [
         ('active', 'Active'),
@@ -16,6 +24,15 @@ class Resident(models.Model):
     monthly_rent = models.DecimalField(max_digits=10, decimal_places=2, default=10000.00)
     is_active = models.BooleanField(default=True)
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='active')
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    objects = ResidentQuerySet.as_manager()
+    
+    class Meta:
+        indexes = [
+            models.Index(fields=['status'], name='resident_status_idx'),
+            models.Index(fields=['unit_number'], name='resident_unit_idx'),
+        ]
     
     def __str__(self):
         return f"{self.user.get_full_name()} - Unit {self.unit_number}"
@@ -66,9 +83,28 @@ class Payment(models.Model):
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
     notes = models.TextField(blank=True)
     created_at = models.DateTimeField(auto_now_add=True, null=True)
+    updated_at = models.DateTimeField(auto_now=True)
     
     class Meta:
         ordering = ['-due_date']
+        indexes = [
+            # Monthly stats and invoice generation: rent for a given month, by status
+            models.Index(fields=['payment_type', 'month', 'status'], name='payment_type_month_status_idx'),
+            # Per-resident invoice lookups
+            models.Index(fields=['resident', 'month', 'payment_type'], name='payment_resident_month_idx'),
+            # Rent ledger listing, newest due date first
+            models.Index(fields=['payment_type', '-due_date'], name='payment_type_due_idx'),
+            # Overdue and arrears scans
+            models.Index(fields=['status', 'due_date'], name='payment_status_due_idx'),
+        ]
+        constraints = [
+            # One rent invoice per resident and month, which generate_invoices relies on
+            models.UniqueConstraint(
+                fields=['resident', 'month', 'payment_type'],
+                condition=Q(payment_type='rent'),
+                name='payment_one_rent_per_month'
+            ),
+        ]
     
     def __str__(self):
         return f"{self.resident.unit_number} - {self.payment_type} - Ksh.{self.amount}"
@@ -77,6 +113,32 @@ class Payment(models.Model):
     def balance(self):
         return self.amount - self.amount_paid
     
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Field values as stored, so the month summary receivers can tell what a save changed
+        instance._stored_values = dict(zip(field_names, values))
+        return instance
+    
+    @staticmethod
+    def status_expression(amount_paid, today=None):
+        """SQL version of the status rules in save(), for set-based updates"""
+        today = today or date.today()
+        return Case(
+            When(amount__lte=amount_paid, then=Value('paid')),
+            When(GreaterThan(amount_paid, 0), then=Value('partial')),
+            When(due_date__lt=today, then=Value('overdue')),
+            default=Value('pending'),
+        )
+    
+    @staticmethod
+    def paid_expression(amount_paid):
+        """SQL version of the paid flag in save(); it is never reset once set"""
+        return Case(
+            When(amount__lte=amount_paid, then=Value(True)),
+            default=F('paid'),
+        )
+    
     def save(self, *args, **kwargs):
         # Auto-update status
         if self.amount_paid >= self.amount:
@@ -90,6 +152,132 @@ class Payment(models.Model):
             self.status = 'pending'
         super().save(*args, **kwargs)
 
+class PaymentTransaction(models.Model):
+    """One receipt recorded against a payment; the ledger is append-only"""
+    payment = models.ForeignKey(Payment, on_delete=models.CASCADE, related_name='transactions')
+    amount = models.DecimalField(max_digits=10, decimal_places=2)
+    payment_method = models.CharField(max_length=20, choices=Payment.PAYMENT_METHODS, blank=True)
+    transaction_code = models.CharField(max_length=100, blank=True)
+    paid_date = models.DateField(null=True, blank=True)
+    notes = models.TextField(blank=True)
+    recorded_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        ordering = ['created_at']
+        indexes = [
+            models.Index(fields=['payment', 'created_at'], name='paymenttx_payment_created_idx'),
+            models.Index(fields=['transaction_code'], name='paymenttx_code_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.payment_id} - Ksh.{self.amount} ({self.transaction_code or self.payment_method})"
+    
+    def save(self, *args, **kwargs):
+        if not self._state.adding:
+            raise ValueError('Payment transactions are append-only; record a correcting entry instead')
+        super().save(*args, **kwargs)
+    
+    def delete(self, *args, **kwargs):
+        raise ValueError('Payment transactions are append-only; record a correcting entry instead')
+
+class MpesaReviewItem(models.Model):
+    """An M-Pesa statement line the reconciliation could not match on its own"""
+    REASON_CHOICES = [
+        ('unmatched', 'No open invoice found'),
+        ('ambiguous', 'Several open invoices match'),
+        ('amount_mismatch', 'Amount does not match any open invoice of the tenant'),
+    ]
+    
+    STATUS_CHOICES = [
+        ('open', 'Open'),
+        ('resolved', 'Resolved'),
+        ('ignored', 'Ignored'),
+    ]
+    
+    receipt_no = models.CharField(max_length=100, unique=True)
+    paid_at = models.DateTimeField(null=True, blank=True)
+    amount = models.DecimalField(max_digits=10, decimal_places=2)
+    phone = models.CharField(max_length=15, blank=True)
+    account_number = models.CharField(max_length=50, blank=True)
+    details = models.CharField(max_length=255, blank=True)
+    reason = models.CharField(max_length=20, choices=REASON_CHOICES)
+    suggested_payment = models.ForeignKey(Payment, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='open')
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['status', '-created_at'], name='mpesareview_status_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.receipt_no} - Ksh.{self.amount} ({self.reason})"
+
+class RentMonthSummary(models.Model):
+    """Pre-aggregated totals of the Payment rows for one month and payment type"""
+    month = models.CharField(max_length=20)  # e.g., "December 2025", as on Payment
+    period = models.DateField(null=True, blank=True)  # first day of the month, for ordering
+    payment_type = models.CharField(max_length=20, choices=Payment.PAYMENT_TYPES, default='rent')
+    total_expected = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    total_collected = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    total_balance = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    paid_count = models.PositiveIntegerField(default=0)
+    pending_count = models.PositiveIntegerField(default=0)
+    overdue_count = models.PositiveIntegerField(default=0)
+    partial_count = models.PositiveIntegerField(default=0)
+    collection_rate = models.DecimalField(max_digits=5, decimal_places=1, default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        ordering = ['-period']
+        constraints = [
+            models.UniqueConstraint(fields=['month', 'payment_type'], name='unique_month_summary'),
+        ]
+    
+    def __str__(self):
+        return f"{self.month} - {self.payment_type}"
+    
+    def as_stats(self):
+        """Stats dict in the shape rent_collection.html expects"""
+        return {
+            'total_expected': self.total_expected,
+            'total_collected': self.total_collected,
+            'total_balance': self.total_balance,
+            'paid_count': self.paid_count,
+            'pending_count': self.pending_count,
+            'overdue_count': self.overdue_count,
+            'partial_count': self.partial_count,
+            'collection_rate': self.collection_rate,
+        }
+
+class JobRun(models.Model):
+    """One run of a scheduled batch job, with its timing and rows touched"""
+    name = models.CharField(max_length=100)
+    started_at = models.DateTimeField()
+    finished_at = models.DateTimeField(null=True, blank=True)
+    duration_ms = models.PositiveIntegerField(default=0)
+    rows_affected = models.PositiveIntegerField(default=0)
+    notes = models.TextField(blank=True)
+    
+    class Meta:
+        ordering = ['-started_at']
+        indexes = [
+            models.Index(fields=['name', '-started_at'], name='jobrun_name_started_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.name} @ {self.started_at:%Y-%m-%d %H:%M} ({self.rows_affected} rows)"
+
+class IdSequence(models.Model):
+    """A named counter handing out increasing numbers, see dashboard.sequences"""
+    name = models.CharField(max_length=50, primary_key=True)
+    last_value = models.PositiveBigIntegerField(default=0)
+    
+    def __str__(self):
+        return f"{self.name} = {self.last_value}"
+
 class Request(models.Model):
     STATUS_CHOICES = [
         ('pending', 'Pending'),
@@ -135,13 +323,21 @@ class WorkOrder(models.Model):
         ('general', 'General Maintenance'),
     ]
     
-    order_id = models.CharField(max_length=10, unique=True)
+    # Statuses of work in hand, which the lateness job flips to delayed when overdue
+    ACTIVE_STATUSES = ['new', 'open', 'in_progress']
+
+    # Statuses that count towards a contractor's open workload
+    OPEN_STATUSES = ACTIVE_STATUSES + ['delayed']
+    
+    order_id = models.CharField(max_length=20, unique=True)
     title = models.CharField(max_length=200, default='')
     description = models.TextField(default='')
     unit_number = models.CharField(max_length=10)
     category = models.CharField(max_length=50, choices=CATEGORY_CHOICES)
     priority = models.CharField(max_length=20, choices=PRIORITY_CHOICES)
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='new')
+    # Status the lateness job delayed the order from, restored once it is no longer late
+    status_before_delay = models.CharField(max_length=20, choices=STATUS_CHOICES, blank=True)
     assigned_to = models.ForeignKey('Subcontractor', on_delete=models.SET_NULL, null=True, blank=True, related_name='work_orders')
     resident = models.ForeignKey('Resident', on_delete=models.CASCADE, null=True, blank=True)
     cost = models.DecimalField(max_digits=10, decimal_places=2, default=0)
@@ -153,6 +349,13 @@ class WorkOrder(models.Model):
     
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['status', '-created_at'], name='workorder_status_created_idx'),
+            models.Index(fields=['assigned_to', 'status'], name='workorder_assigned_status_idx'),
+            models.Index(fields=['priority', 'status'], name='workorder_priority_status_idx'),
+            models.Index(fields=['category', 'status'], name='workorder_category_status_idx'),
+            models.Index(fields=['status', '-days_late'], name='workorder_status_late_idx'),
+        ]
     
     def __str__(self):
         return f"{self.order_id} - {self.title if self.title else self.category}"
@@ -161,20 +364,6 @@ class WorkOrder(models.Model):
     def contractor_name(self):
         return self.assigned_to.name if self.assigned_to else 'Unassigned'
 
-class Unit(models.Model):
-    UNIT_STATUS = [
-        ('vacant', 'Vacant'),
-        ('occupied', 'Occupied'),
-        ('upcoming', 'Upcoming'),
-    ]
-    
-    unit_number = models.CharField(max_length=10, unique=True)
-    status = models.CharField(max_length=20, choices=UNIT_STATUS)
-    image = models.ImageField(upload_to='units/', null=True, blank=True)
-    
-    def __str__(self):
-        return f"Unit {self.unit_number}"
-
 class Announcement(models.Model):
     title = models.CharField(max_length=200)
     content = models.TextField()
@@ -198,6 +387,9 @@ class ParkingSlot(models.Model):
     
     class Meta:
         ordering = ['slot_number']
+        indexes = [
+            models.Index(fields=['status', 'slot_number'], name='parkingslot_status_slot_idx'),
+        ]
     
     def __str__(self):
         return f"{self.slot_number} - {self.status}"
@@ -212,6 +404,20 @@ class ParkingSlot(models.Model):
         """Get tenant name from resident"""
         return self.resident.user.get_full_name() if self.resident else ''
     
+class SubcontractorQuerySet(models.QuerySet):
+    def with_work_order_stats(self):
+        """Annotate work order counts, total cost and average completion time in one grouped query"""
+        completed = Q(work_orders__status='completed')
+        return self.annotate(
+            active_orders=Count('work_orders', filter=Q(work_orders__status__in=WorkOrder.OPEN_STATUSES)),
+            completed_orders=Count('work_orders', filter=completed),
+            total_cost=Sum('work_orders__cost', default=0),
+            avg_completion_time=Avg(
+                F('work_orders__completed_date') - TruncDate('work_orders__created_at'),
+                filter=completed & Q(work_orders__completed_date__isnull=False)
+            ),
+        )
+
 class Subcontractor(models.Model):
     CATEGORY_CHOICES = [
         ('plumber', 'Plumber'),
@@ -240,6 +446,9 @@ class Subcontractor(models.Model):
     rating = models.DecimalField(max_digits=3, decimal_places=2, default=0.00)  # 0.00 to 5.00
     joined_date = models.DateField(default=date.today)
     notes = models.TextField(blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    objects = SubcontractorQuerySet.as_manager()
     
     def __str__(self):
         return f"{self.name} - {self.get_category_display()}"
@@ -248,7 +457,7 @@ class Subcontractor(models.Model):
      """Count active work orders assigned to this contractor"""
      return WorkOrder.objects.filter(
         assigned_to=self,
-        status__in=['new', 'open', 'in_progress']
+        status__in=WorkOrder.OPEN_STATUSES
     ).count()
 
 class Unit(models.Model):
@@ -272,14 +481,19 @@ class Unit(models.Model):
     size_sqm = models.DecimalField(max_digits=6, decimal_places=2, default=0, help_text="Size in square meters")
     rent_amount = models.DecimalField(max_digits=10, decimal_places=2, default=0)
     status = models.CharField(max_length=20, choices=UNIT_STATUS, default='vacant')
-    resident = models.OneToOneField(Resident, on_delete=models.SET_NULL, null=True, blank=True, related_name='assigned_unit')
+    # The one authoritative occupancy link; Resident.unit_number is a display copy of it
+    resident = models.OneToOneField(Resident, on_delete=models.SET_NULL, null=True, blank=True, related_name='unit')
     description = models.TextField(blank=True)
     image = models.ImageField(upload_to='units/', null=True, blank=True)
     last_maintenance = models.DateField(null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True, null=True)
-    resident = models.ForeignKey('Resident', on_delete=models.SET_NULL, null=True, blank=True, related_name='unit')
+    updated_at = models.DateTimeField(auto_now=True)
     class Meta:
         ordering = ['unit_number']
+        indexes = [
+            models.Index(fields=['status', 'unit_number'], name='unit_status_number_idx'),
+            models.Index(fields=['unit_type', 'status'], name='unit_type_status_idx'),
+        ]
     
     def __str__(self):
         return f"Unit {self.unit_number}"
@@ -294,4 +508,23 @@ class Unit(models.Model):
     def tenant_phone(self):
         if self.resident:
             return self.resident.phone
-        return '-'
\ No newline at end of file
+        return '-'
+class OccupancySnapshot(models.Model):
+    """Unit counts and rent of one unit type on one floor, as they stood on one day"""
+    date = models.DateField()
+    unit_type = models.CharField(max_length=20, choices=Unit.UNIT_TYPE_CHOICES)
+    floor = models.IntegerField()
+    occupied = models.PositiveIntegerField(default=0)
+    vacant = models.PositiveIntegerField(default=0)
+    maintenance = models.PositiveIntegerField(default=0)
+    expected_rent = models.DecimalField(max_digits=14, decimal_places=2, default=0)  # rent of occupied units
+    collected_rent = models.DecimalField(max_digits=14, decimal_places=2, default=0)  # paid so far this month
+    
+    class Meta:
+        ordering = ['date', 'floor', 'unit_type']
+        constraints = [
+            models.UniqueConstraint(fields=['date', 'unit_type', 'floor'], name='unique_occupancy_snapshot'),
+        ]
+    
+    def __str__(self):
+        return f"{self.date} floor {self.floor} {self.unit_type}"
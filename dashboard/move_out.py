@@ -0,0 +1,100 @@
+from datetime import date
+
+from django.db import transaction
+from django.utils import timezone
+
+from . import search, stats
+from .jobs import OPEN_WORK_ORDER_STATUSES, record_run
+from .models import Resident, Payment, WorkOrder, Unit, ParkingSlot
+from .signals import deferred_index_updates
+from .summaries import refresh_month_summary
+
+
+class MoveOutResult:
+    def __init__(self):
+        self.residents = 0
+        self.parking_slots = 0
+        self.units = 0
+        self.payments = 0
+        self.work_orders = 0
+
+    def __str__(self):
+        return (
+            f'{self.residents} tenants moved out: {self.parking_slots} parking slots and '
+            f'{self.units} units freed, {self.payments} future invoices cancelled, '
+            f'{self.work_orders} open work orders detached'
+        )
+
+
+def move_out(resident_ids, move_out_date=None, dry_run=False):
+    """
+    Move residents out and clean up everything that still points at them.
+
+    One transaction and one set-based statement per table, however many
+    residents move out:
+
+    - residents are set to moved_out
+    - their parking slots and units are freed
+    - rent and other invoices due after move_out_date with nothing paid
+      on them are deleted, with one pass over their month summaries and
+      search entries instead of per-row receivers
+    - their open work orders stay on the unit but are detached from them
+
+    With dry_run the counts are computed and the transaction rolled back.
+    """
+    move_out_date = move_out_date or date.today()
+    resident_ids = list(resident_ids)
+    result = MoveOutResult()
+    now = timezone.now()
+
+    with record_run('move_out') as run:
+        with transaction.atomic():
+            residents = Resident.objects.filter(pk__in=resident_ids).exclude(status='moved_out')
+            resident_ids = list(residents.select_for_update().values_list('pk', flat=True))
+
+            result.residents = residents.update(status='moved_out', updated_at=now)
+
+            result.parking_slots = ParkingSlot.objects.filter(resident_id__in=resident_ids).update(
+                resident=None, status='available', assigned_date=None
+            )
+
+            # Unit.resident is the occupancy link; Resident.unit_number is only a copy
+            result.units = Unit.objects.filter(resident_id__in=resident_ids).update(
+                resident=None, status='vacant', updated_at=now
+            )
+
+            future = Payment.objects.filter(
+                resident_id__in=resident_ids,
+                due_date__gt=move_out_date,
+                amount_paid=0,
+                transactions__isnull=True
+            )
+            payment_ids = list(future.values_list('pk', flat=True))
+            payments = Payment.objects.filter(pk__in=payment_ids)
+            touched = set(payments.order_by().values_list('month', 'payment_type').distinct())
+
+            # The per-row summary and index receivers are skipped...
+            with deferred_index_updates():
+                result.payments = payments.delete()[1].get(Payment._meta.label, 0)
+
+            # ...and their month summaries and search entries updated here, once
+            for month, payment_type in touched:
+                refresh_month_summary(month, payment_type)
+            search.remove_objects('payment', payment_ids)
+
+            result.work_orders = WorkOrder.objects.filter(
+                resident_id__in=resident_ids,
+                status__in=OPEN_WORK_ORDER_STATUSES
+            ).update(resident=None, updated_at=now)
+
+            if dry_run:
+                transaction.set_rollback(True)
+
+        if not dry_run:
+            # .update() sends no signals
+            stats.invalidate(Resident, ParkingSlot, Unit, WorkOrder, Payment)
+
+        run.rows_affected = 0 if dry_run else result.residents
+        run.notes = f'{"Dry run: " if dry_run else ""}{result}'
+
+    return result
@@ -0,0 +1,321 @@
+import csv
+import re
+from collections import defaultdict, namedtuple
+from datetime import datetime
+from decimal import Decimal, InvalidOperation
+from itertools import islice
+
+from django.db import transaction
+from django.db.models import F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from . import search, stats
+from .jobs import record_run
+from .ledger import ledger_total, record_transaction
+from .models import Payment, PaymentTransaction, MpesaReviewItem
+from .summaries import refresh_month_summary
+
+# Statement columns, with the spellings used by the M-Pesa portal export and the C2B API
+COLUMNS = {
+    'receipt_no': ['Receipt No.', 'Receipt No', 'TransID'],
+    'paid_at': ['Completion Time', 'Initiation Time', 'TransTime'],
+    'details': ['Details'],
+    'status': ['Transaction Status'],
+    'amount': ['Paid In', 'Amount', 'TransAmount'],
+    'account_number': ['A/C No.', 'Account No.', 'BillRefNumber'],
+    'other_party': ['Other Party Info', 'MSISDN'],
+}
+REQUIRED_COLUMNS = ['receipt_no', 'amount']
+
+TIME_FORMATS = ['%Y-%m-%d %H:%M:%S', '%d-%m-%Y %H:%M:%S', '%d/%m/%Y %H:%M:%S', '%Y%m%d%H%M%S']
+
+OPEN_STATUSES = ['pending', 'partial', 'overdue']
+
+# Statement lines checked against already recorded receipts per query
+CHUNK_SIZE = 1000
+
+StatementLine = namedtuple(
+    'StatementLine', 'line receipt_no paid_at amount phone account_number details'
+)
+
+
+class OpenInvoice:
+    def __init__(self, payment_id, balance, due_date):
+        self.payment_id = payment_id
+        self.balance = balance
+        self.due_date = due_date
+
+
+class ReconciliationResult:
+    def __init__(self):
+        self.matched = 0
+        self.duplicates = 0
+        self.queued = defaultdict(int)  # reason -> count
+        self.skipped = 0
+        self.errors = []  # (line number, message)
+
+
+def normalize_phone(value):
+    """07XXXXXXXX form of a Kenyan phone number in any common spelling, or ''"""
+    found = re.search(r'\+?\d[\d ]{7,}', value or '')
+    if not found:
+        return ''
+    digits = re.sub(r'\D', '', found.group())
+    if digits.startswith('254') and len(digits) == 12:
+        return '0' + digits[3:]
+    if len(digits) == 9:
+        return '0' + digits
+    return digits
+
+
+def normalize_unit(value):
+    return re.sub(r'[\s-]', '', value or '').upper()
+
+
+def parse_time(value):
+    for time_format in TIME_FORMATS:
+        try:
+            return timezone.make_aware(datetime.strptime(value.strip(), time_format))
+        except ValueError:
+            continue
+    return None
+
+
+def parse_statement(lines, result):
+    """Yield the completed incoming transactions of a statement CSV, one at a time"""
+    reader = csv.DictReader(lines)
+    fieldnames = reader.fieldnames or []
+    columns = {
+        field: next((name for name in names if name in fieldnames), None)
+        for field, names in COLUMNS.items()
+    }
+    missing = [field for field in REQUIRED_COLUMNS if columns[field] is None]
+    if missing:
+        result.errors.append((1, f'missing columns: {", ".join(COLUMNS[field][0] for field in missing)}'))
+        return
+
+    def value(row, field):
+        return (row.get(columns[field]) or '').strip() if columns[field] else ''
+
+    for row in reader:
+        status = value(row, 'status')
+        if status and status.lower() != 'completed':
+            result.skipped += 1
+            continue
+
+        raw_amount = value(row, 'amount').replace(',', '')
+        if not raw_amount:
+            # Withdrawals and charges have no Paid In amount
+            result.skipped += 1
+            continue
+        try:
+            amount = Decimal(raw_amount)
+        except InvalidOperation:
+            result.errors.append((reader.line_num, f'invalid amount {raw_amount}'))
+            continue
+        if amount <= 0 or not value(row, 'receipt_no'):
+            result.skipped += 1
+            continue
+
+        yield StatementLine(
+            line=reader.line_num,
+            receipt_no=value(row, 'receipt_no'),
+            paid_at=parse_time(value(row, 'paid_at')),
+            amount=amount,
+            phone=normalize_phone(value(row, 'other_party')),
+            account_number=value(row, 'account_number'),
+            details=value(row, 'details')[:255],
+        )
+
+
+class OpenInvoiceIndex:
+    """Open invoices in hash maps keyed by unit number, tenant phone and balance"""
+
+    def __init__(self):
+        self.by_unit = defaultdict(list)
+        self.by_phone = defaultdict(list)
+        self.by_amount = defaultdict(list)
+
+    @classmethod
+    def build(cls):
+        index = cls()
+        rows = Payment.objects.filter(status__in=OPEN_STATUSES).order_by('due_date', 'pk').values_list(
+            'pk', 'amount', 'amount_paid', 'due_date', 'resident__unit_number', 'resident__phone'
+        )
+        for payment_id, amount, amount_paid, due_date, unit_number, phone in rows.iterator(chunk_size=5000):
+            invoice = OpenInvoice(payment_id, amount - amount_paid, due_date)
+            index.by_unit[normalize_unit(unit_number)].append(invoice)
+            if normalize_phone(phone):
+                index.by_phone[normalize_phone(phone)].append(invoice)
+            index.by_amount[invoice.balance].append(invoice)
+        return index
+
+    def candidates(self, line):
+        """Open invoices of the tenant the line identifies, oldest first, or None"""
+        by_unit = self.by_unit.get(normalize_unit(line.account_number)) if line.account_number else None
+        by_phone = self.by_phone.get(line.phone) if line.phone else None
+        if by_unit and by_phone:
+            # The account number is what the payer typed; the phone only narrows it down
+            both = [invoice for invoice in by_unit if invoice in by_phone]
+            return both or by_unit
+        return by_unit or by_phone
+
+    def match(self, line):
+        """
+        Return (invoice, None) for an automatic match, or (suggestion, reason).
+
+        A line matches automatically when it identifies the tenant (unit
+        number or phone) and either exactly one of their open invoices has
+        that balance, or they have a single open invoice the amount fits in.
+        """
+        candidates = self.candidates(line)
+
+        if candidates is None:
+            same_amount = [invoice for invoice in self.by_amount.get(line.amount, []) if invoice.balance == line.amount]
+            if same_amount:
+                return same_amount[0], 'ambiguous'
+            return None, 'unmatched'
+
+        open_invoices = [invoice for invoice in candidates if invoice.balance > 0]
+        exact = [invoice for invoice in open_invoices if invoice.balance == line.amount]
+        if len(exact) == 1:
+            return exact[0], None
+        if exact:
+            return exact[0], 'ambiguous'
+        if len(open_invoices) == 1 and line.amount < open_invoices[0].balance:
+            return open_invoices[0], None
+        return (open_invoices[0] if open_invoices else None), 'amount_mismatch'
+
+
+def chunks(iterable, size):
+    iterator = iter(iterable)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
+
+
+def reconcile_statement(lines, dry_run=False):
+    """
+    Match an M-Pesa statement against open invoices.
+
+    The statement is read as a stream. Receipts already in the payment
+    ledger or the review queue are skipped, so a statement can be
+    ingested more than once. Automatic matches are applied together by
+    apply_matches(); everything else goes to the MpesaReviewItem queue.
+    """
+    result = ReconciliationResult()
+
+    with record_run('reconcile_mpesa') as run:
+        index = OpenInvoiceIndex.build()
+        matches, reviews, seen = [], [], set()
+
+        for chunk in chunks(parse_statement(lines, result), CHUNK_SIZE):
+            receipts = [line.receipt_no for line in chunk]
+            seen.update(PaymentTransaction.objects.filter(
+                transaction_code__in=receipts
+            ).values_list('transaction_code', flat=True))
+            seen.update(MpesaReviewItem.objects.filter(
+                receipt_no__in=receipts
+            ).values_list('receipt_no', flat=True))
+
+            for line in chunk:
+                if line.receipt_no in seen:
+                    result.duplicates += 1
+                    continue
+                seen.add(line.receipt_no)
+
+                invoice, reason = index.match(line)
+                if reason is None:
+                    invoice.balance -= line.amount
+                    matches.append((line, invoice.payment_id))
+                else:
+                    result.queued[reason] += 1
+                    reviews.append(MpesaReviewItem(
+                        receipt_no=line.receipt_no,
+                        paid_at=line.paid_at,
+                        amount=line.amount,
+                        phone=line.phone,
+                        account_number=line.account_number[:50],
+                        details=line.details,
+                        reason=reason,
+                        suggested_payment_id=invoice.payment_id if invoice else None
+                    ))
+
+        result.matched = len(matches)
+        if not dry_run:
+            apply_matches(matches)
+            MpesaReviewItem.objects.bulk_create(reviews, batch_size=500, ignore_conflicts=True)
+
+        run.rows_affected = result.matched
+        run.notes = (
+            f'{"Dry run: " if dry_run else ""}{result.matched} matched, '
+            f'{sum(result.queued.values())} queued for review, {result.duplicates} already recorded'
+        )
+
+    return result
+
+
+def apply_matches(matches):
+    """
+    Record matched statement lines in the ledger and update their payments.
+
+    The matched payment rows are locked, the receipts bulk inserted, and
+    amount_paid, status and the latest receipt details of every touched
+    payment are recomputed from the ledger in one UPDATE.
+    """
+    if not matches:
+        return
+
+    ids = {payment_id for _, payment_id in matches}
+    with transaction.atomic():
+        payments = Payment.objects.filter(pk__in=ids)
+        list(payments.select_for_update().values_list('pk', flat=True))
+        touched = set(payments.order_by().values_list('month', 'payment_type').distinct())
+
+        PaymentTransaction.objects.bulk_create([
+            PaymentTransaction(
+                payment_id=payment_id,
+                amount=line.amount,
+                payment_method='mpesa',
+                transaction_code=line.receipt_no,
+                paid_date=line.paid_at.date() if line.paid_at else None,
+                notes=line.details
+            )
+            for line, payment_id in matches
+        ], batch_size=500)
+
+        total = ledger_total()
+        latest = PaymentTransaction.objects.filter(payment=OuterRef('pk')).order_by('-created_at', '-pk')
+        payments.update(
+            amount_paid=total,
+            status=Payment.status_expression(total),
+            paid=Payment.paid_expression(total),
+            payment_method='mpesa',
+            transaction_code=Subquery(latest.values('transaction_code')[:1]),
+            paid_date=Coalesce(Subquery(latest.values('paid_date')[:1]), F('paid_date')),
+            updated_at=timezone.now(),
+        )
+
+        # .update() and bulk_create() send no signals
+        for month, payment_type in touched:
+            refresh_month_summary(month, payment_type)
+        search.reindex('payment', ids)
+
+    stats.invalidate(Payment)
+
+
+def resolve_review_item(item, payment_id, recorded_by=None):
+    """Record a queued statement line against the payment chosen by a clerk"""
+    with transaction.atomic():
+        record_transaction(
+            payment_id,
+            item.amount,
+            payment_method='mpesa',
+            transaction_code=item.receipt_no,
+            paid_date=item.paid_at.date() if item.paid_at else None,
+            notes=item.details,
+            recorded_by=recorded_by
+        )
+        item.status = 'resolved'
+        item.suggested_payment_id = payment_id
+        item.save(update_fields=['status', 'suggested_payment'])
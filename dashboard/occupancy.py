@@ -0,0 +1,96 @@
+from collections import defaultdict
+
+from django.db import transaction
+from django.db.models import F, OuterRef, Subquery
+from django.utils import timezone
+
+from . import search, stats
+from .jobs import record_run
+from .models import Resident, Unit
+
+# Drift repaired by repair_occupancy(), in the order it is repaired
+DRIFT_CHECKS = [
+    ('moved_out', 'units still linked to a moved-out resident'),
+    ('unlinked', 'active residents whose unit_number names a free unit they are not linked to'),
+    ('unit_number', 'residents whose unit_number differs from their unit'),
+    ('not_occupied', 'units with a resident but marked vacant'),
+    ('not_vacant', 'units without a resident but marked occupied'),
+]
+
+
+def link_unlinked_residents():
+    """
+    Link active residents without a unit to the free unit their unit_number names.
+
+    Units claimed by more than one resident are left for a person to sort out.
+    """
+    claims = defaultdict(list)
+    rows = Resident.objects.filter(status='active').unassigned().exclude(unit_number='').values_list('pk', 'unit_number')
+    for pk, unit_number in rows:
+        claims[unit_number].append(pk)
+
+    units = Unit.objects.filter(resident__isnull=True, unit_number__in=list(claims)).only('pk', 'unit_number', 'status')
+    now = timezone.now()
+    linked = []
+    for unit in units:
+        if len(claims[unit.unit_number]) == 1:
+            unit.resident_id = claims[unit.unit_number][0]
+            if unit.status == 'vacant':
+                unit.status = 'occupied'
+            unit.updated_at = now
+            linked.append(unit)
+
+    Unit.objects.bulk_update(linked, ['resident', 'status', 'updated_at'], batch_size=500)
+    return len(linked)
+
+
+def repair_occupancy(dry_run=False):
+    """
+    Make Unit.resident, Unit.status and Resident.unit_number agree, in bulk.
+
+    Unit.resident is the authoritative link. Each kind of drift in
+    DRIFT_CHECKS is repaired with one set-based statement, in one
+    transaction. Returns {check: rows repaired}; with dry_run the counts
+    are computed and the transaction rolled back, which makes it a check.
+    """
+    repaired = {}
+    now = timezone.now()
+
+    with record_run('repair_occupancy') as run:
+        with transaction.atomic():
+            repaired['moved_out'] = Unit.objects.filter(resident__status='moved_out').update(
+                resident=None, status='vacant', updated_at=now
+            )
+
+            repaired['unlinked'] = link_unlinked_residents()
+
+            unit_number = Subquery(Unit.objects.filter(resident=OuterRef('pk')).values('unit_number')[:1])
+            renumbered = list(Resident.objects.filter(unit__isnull=False).exclude(
+                unit_number=F('unit__unit_number')
+            ).values_list('pk', flat=True))
+            repaired['unit_number'] = Resident.objects.filter(pk__in=renumbered).update(
+                unit_number=unit_number, updated_at=now
+            )
+            # .update() sends no signals
+            search.reindex('resident', renumbered)
+
+            repaired['not_occupied'] = Unit.objects.filter(resident__isnull=False, status='vacant').update(
+                status='occupied', updated_at=now
+            )
+            repaired['not_vacant'] = Unit.objects.filter(resident__isnull=True, status='occupied').update(
+                status='vacant', updated_at=now
+            )
+
+            if dry_run:
+                transaction.set_rollback(True)
+
+        if not dry_run and any(repaired.values()):
+            # .update() and bulk_update() send no signals
+            stats.invalidate(Unit, Resident)
+
+        run.rows_affected = 0 if dry_run else sum(repaired.values())
+        run.notes = f'{"Dry run: " if dry_run else ""}' + ', '.join(
+            f'{count} {check}' for check, count in repaired.items()
+        )
+
+    return repaired
@@ -0,0 +1,231 @@
+import base64
+import binascii
+import json
+from datetime import date, datetime
+from decimal import Decimal
+from urllib.parse import urlencode
+
+from django.core.exceptions import ValidationError
+from django.db.models import F, Q
+
+DEFAULT_PAGE_SIZE = 25
+MAX_PAGE_SIZE = 100
+
+
+def encode_cursor(values):
+    """Encode the ordering key values of a row into a URL-safe cursor"""
+    data = []
+    for value in values:
+        if isinstance(value, (date, datetime)):
+            value = value.isoformat()
+        elif isinstance(value, Decimal):
+            value = str(value)
+        data.append(value)
+    raw = json.dumps(data, separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(cursor, length):
+    """Decode a cursor back into key values, or None if it is malformed"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        values = json.loads(raw)
+    except (binascii.Error, ValueError):
+        return None
+    if not isinstance(values, list) or len(values) != length:
+        return None
+    return values
+
+
+class KeysetPage:
+    def __init__(self, object_list, page_size, next_cursor=None, previous_cursor=None, params=None):
+        self.object_list = object_list
+        self.page_size = page_size
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+        self.params = params
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+    @property
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def _query(self, key, cursor):
+        params = self.params.copy() if self.params is not None else {}
+        params.pop('after', None)
+        params.pop('before', None)
+        params[key] = cursor
+        if hasattr(params, 'urlencode'):
+            return params.urlencode()
+        return urlencode(params)
+
+    @property
+    def next_query(self):
+        """Query string for the next page, keeping the current filters"""
+        return self._query('after', self.next_cursor) if self.has_next else ''
+
+    @property
+    def previous_query(self):
+        """Query string for the previous page, keeping the current filters"""
+        return self._query('before', self.previous_cursor) if self.has_previous else ''
+
+
+class KeysetPaginator:
+    """
+    Seek pagination over a fixed ordering.
+
+    Instead of OFFSET, each page filters on the ordering key of the last
+    (or first) row it has seen, so the cost of a page does not grow with
+    how deep into the table it is. The primary key is appended to the
+    ordering to make cursors stable when the other keys tie.
+    """
+
+    def __init__(self, queryset, ordering, page_size=DEFAULT_PAGE_SIZE):
+        self.queryset = queryset
+        self.page_size = page_size
+        self.keys = []
+        for key in ordering:
+            descending = key.startswith('-')
+            name = key.lstrip('-')
+            self.keys.append((name, descending, self._is_nullable(name)))
+        if not any(name in ('pk', 'id') for name, _, _ in self.keys):
+            self.keys.append(('pk', self.keys[-1][1] if self.keys else False, False))
+
+    def _fields(self, name):
+        """The fields a key name follows, from the queryset's model to the ordered field"""
+        model = self.queryset.model
+        fields = []
+        for part in name.split('__'):
+            field = model._meta.pk if part == 'pk' else model._meta.get_field(part)
+            fields.append(field)
+            if field.is_relation:
+                model = field.related_model
+        return fields
+
+    def _is_nullable(self, name):
+        if name == 'pk':
+            return False
+        return any(field.null for field in self._fields(name))
+
+    def _to_python(self, values):
+        """
+        Convert decoded cursor values to their key fields' types.
+
+        Returns None when a value does not fit its field, so a tampered
+        cursor is ignored like a malformed one instead of failing the query.
+        """
+        converted = []
+        for (name, _, _), value in zip(self.keys, values):
+            if value is not None:
+                field = self._fields(name)[-1]
+                if field.is_relation:
+                    field = field.target_field
+                try:
+                    value = field.to_python(value)
+                except (TypeError, ValueError, ValidationError):
+                    return None
+            converted.append(value)
+        return converted
+
+    def _order_by(self, reverse):
+        ordering = []
+        for name, descending, nullable in self.keys:
+            if reverse:
+                descending = not descending
+            # Nulls always sort after every value in the forward direction
+            nulls = {}
+            if nullable:
+                nulls = {'nulls_first': True} if reverse else {'nulls_last': True}
+            ordering.append(F(name).desc(**nulls) if descending else F(name).asc(**nulls))
+        return ordering
+
+    def _seek(self, values, reverse):
+        """Build the filter matching rows strictly after (or before) the given key"""
+        condition = Q(pk__in=[])
+        equal = Q()
+        for (name, descending, nullable), value in zip(self.keys, values):
+            if value is None:
+                beyond = Q(**{f'{name}__isnull': False}) if reverse else Q(pk__in=[])
+                same = Q(**{f'{name}__isnull': True})
+            else:
+                lookup = 'lt' if descending != reverse else 'gt'
+                beyond = Q(**{f'{name}__{lookup}': value})
+                if nullable and not reverse:
+                    beyond |= Q(**{f'{name}__isnull': True})
+                same = Q(**{name: value})
+            condition |= equal & beyond
+            equal &= same
+        return condition
+
+    def _key(self, obj):
+        values = []
+        for name, _, _ in self.keys:
+            value = obj
+            for part in name.split('__'):
+                value = getattr(value, part) if value is not None else None
+            values.append(value)
+        return encode_cursor(values)
+
+    def page(self, after=None, before=None, params=None):
+        queryset = self.queryset
+        cursor = None
+
+        if before:
+            cursor = decode_cursor(before, len(self.keys))
+        elif after:
+            cursor = decode_cursor(after, len(self.keys))
+        if cursor is not None:
+            cursor = self._to_python(cursor)
+        reverse = cursor is not None and bool(before)
+
+        if cursor is not None:
+            queryset = queryset.filter(self._seek(cursor, reverse))
+
+        rows = list(queryset.order_by(*self._order_by(reverse))[:self.page_size + 1])
+        has_more = len(rows) > self.page_size
+        rows = rows[:self.page_size]
+
+        if reverse:
+            rows.reverse()
+            has_next, has_previous = True, has_more
+        else:
+            has_next, has_previous = has_more, cursor is not None
+
+        return KeysetPage(
+            rows,
+            self.page_size,
+            next_cursor=self._key(rows[-1]) if rows and has_next else None,
+            previous_cursor=self._key(rows[0]) if rows and has_previous else None,
+            params=params,
+        )
+
+
+def get_page_size(value, default=DEFAULT_PAGE_SIZE):
+    try:
+        page_size = int(value)
+    except (TypeError, ValueError):
+        return default
+    return max(1, min(page_size, MAX_PAGE_SIZE))
+
+
+def paginate(request, queryset, ordering):
+    """Return the keyset page selected by the request's after/before/page_size params"""
+    paginator = KeysetPaginator(
+        queryset,
+        ordering,
+        page_size=get_page_size(request.GET.get('page_size')),
+    )
+    return paginator.page(
+        after=request.GET.get('after'),
+        before=request.GET.get('before'),
+        params=request.GET,
+    )
@@ -0,0 +1,105 @@
+import re
+from collections import namedtuple
+from datetime import date
+
+from django.db import transaction
+
+from . import stats
+from .jobs import record_run
+from .models import ParkingSlot, Unit
+
+# Unit slots are named after their unit: Unit 101 -> P-101A & P-101B.
+# Anything else (visitor slots, extra slots let by management) is left alone.
+UNIT_SLOT_PATTERN = re.compile(r'^P-(?P<unit>[0-9A-Z-]+?)(?P<bay>[A-Z])$')
+
+SlotChange = namedtuple('SlotChange', 'slot_number unit_number old_resident_id new_resident_id')
+
+
+def slot_unit(slot_number):
+    """Unit number a slot belongs to under the P-{unit}{bay} naming scheme, or None"""
+    found = UNIT_SLOT_PATTERN.match(slot_number.strip().upper())
+    return found.group('unit') if found else None
+
+
+class AllocationPlan:
+    """Slot changes needed for every unit's slots to belong to its active resident"""
+
+    def __init__(self):
+        self.changes = []
+        self.slots = []  # ParkingSlot instances to write
+        self.unchanged = 0
+        self.units_without_slots = []
+
+    @property
+    def assigned(self):
+        return [change for change in self.changes if change.new_resident_id is not None]
+
+    @property
+    def released(self):
+        return [change for change in self.changes if change.new_resident_id is None]
+
+    def apply(self):
+        """Write the plan with one bulk_update in one transaction"""
+        if not self.slots:
+            return 0
+        with transaction.atomic():
+            ParkingSlot.objects.bulk_update(self.slots, ['resident', 'status', 'assigned_date'], batch_size=500)
+        # bulk_update sends no signals
+        stats.invalidate(ParkingSlot)
+        return len(self.slots)
+
+
+def plan_parking_allocation(today=None):
+    """
+    Work out the allocation of every unit slot in memory.
+
+    Two queries: units with their resident and all slots. A unit's slots
+    go to the active resident Unit.resident links it to and are released
+    when it has none. Slots named after no known unit are not touched.
+    """
+    today = today or date.today()
+    plan = AllocationPlan()
+
+    residents = {}
+    units = set()
+    for unit_number, resident_id, status in Unit.objects.values_list('unit_number', 'resident_id', 'resident__status'):
+        unit = unit_number.strip().upper()
+        units.add(unit)
+        if status == 'active':
+            residents[unit] = resident_id
+
+    units_with_slots = set()
+    for slot in ParkingSlot.objects.only('pk', 'slot_number', 'resident', 'status', 'assigned_date').order_by('slot_number'):
+        unit = slot_unit(slot.slot_number)
+        if unit not in units:
+            continue
+        units_with_slots.add(unit)
+
+        resident_id = residents.get(unit)
+        status = 'assigned' if resident_id else 'available'
+        if slot.resident_id == resident_id and slot.status == status:
+            plan.unchanged += 1
+            continue
+
+        plan.changes.append(SlotChange(slot.slot_number, unit, slot.resident_id, resident_id))
+        if slot.resident_id != resident_id:
+            slot.assigned_date = today if resident_id else None
+        slot.resident_id = resident_id
+        slot.status = status
+        plan.slots.append(slot)
+
+    plan.units_without_slots = sorted(set(residents) - units_with_slots)
+    return plan
+
+
+def allocate_parking(dry_run=False):
+    """Compute the allocation plan and, unless dry_run, apply it"""
+    with record_run('allocate_parking') as run:
+        plan = plan_parking_allocation()
+        if not dry_run:
+            run.rows_affected = plan.apply()
+        run.notes = (
+            f'{"Dry run: " if dry_run else ""}{len(plan.assigned)} assigned, '
+            f'{len(plan.released)} released, {plan.unchanged} unchanged'
+        )
+    return plan
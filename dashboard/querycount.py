@@ -0,0 +1,56 @@
+import re
+import time
+from collections import Counter
+
+from django.db import connection
+
+# Collapse the parts of a statement that vary between otherwise identical queries
+_IN_LIST = re.compile(r'\((?:\s*%s\s*,)+\s*%s\s*\)')
+_NUMBER = re.compile(r'\b\d+\b')
+
+
+def fingerprint(sql):
+    """Normalised query shape, so the same query with different values compares equal"""
+    sql = _IN_LIST.sub('(...)', sql)
+    return _NUMBER.sub('?', sql)
+
+
+class QueryRecorder:
+    """
+    Record the queries run on a connection while the block is active.
+
+    Uses connection.execute_wrapper, so it works without DEBUG and counts
+    every statement including those inside templates.
+    """
+
+    def __init__(self, using=None):
+        self.connection = using or connection
+        self.count = 0
+        self.duration = 0.0
+        self.shapes = Counter()
+        self._wrapper = None
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - start
+            self.count += 1
+            self.shapes[fingerprint(sql)] += 1
+
+    def __enter__(self):
+        self._wrapper = self.connection.execute_wrapper(self)
+        self._wrapper.__enter__()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._wrapper.__exit__(*exc_info)
+
+    @property
+    def duration_ms(self):
+        return self.duration * 1000
+
+    def repeated(self, threshold):
+        """Query shapes run at least `threshold` times, the N+1 signature"""
+        return {sql: count for sql, count in self.shapes.items() if count >= threshold}
@@ -0,0 +1,182 @@
+from django.db import connection
+from django.db.models import Q
+from django.db.models.expressions import RawSQL
+
+SEARCH_TABLE = 'dashboard_search'
+
+# Each indexed object gets rowid = object_id * 8 + kind code, so a single
+# entry can be replaced or removed by rowid without scanning the table.
+KIND_CODES = {
+    'resident': 1,
+    'payment': 2,
+    'workorder': 3,
+    'subcontractor': 4,
+    'unit': 5,
+}
+KIND_SHIFT = 8
+
+# Set-based statements used to (re)build the index per kind
+REBUILD_SQL = {
+    'resident': """
+        SELECT r.id * 8 + 1 AS entry_id, 'resident',
+               u.first_name || ' ' || u.last_name || ' ' || u.email || ' ' || r.unit_number || ' ' || r.phone
+        FROM dashboard_resident r JOIN auth_user u ON u.id = r.user_id
+    """,
+    'payment': """
+        SELECT id * 8 + 2 AS entry_id, 'payment', transaction_code
+        FROM dashboard_payment WHERE transaction_code != ''
+    """,
+    'workorder': """
+        SELECT id * 8 + 3 AS entry_id, 'workorder',
+               order_id || ' ' || title || ' ' || unit_number || ' ' || description
+        FROM dashboard_workorder
+    """,
+    'subcontractor': """
+        SELECT id * 8 + 4 AS entry_id, 'subcontractor',
+               name || ' ' || company_name || ' ' || phone || ' ' || email
+        FROM dashboard_subcontractor
+    """,
+    'unit': """
+        SELECT id * 8 + 5 AS entry_id, 'unit', unit_number || ' ' || description
+        FROM dashboard_unit
+    """,
+}
+
+_enabled = None
+
+
+def search_enabled():
+    """True when the FTS5 search table exists on the default database"""
+    global _enabled
+    if connection.vendor != 'sqlite':
+        return False
+    if _enabled is None:
+        _enabled = SEARCH_TABLE in connection.introspection.table_names()
+    return _enabled
+
+
+def document(kind, instance):
+    """Text indexed for a model instance"""
+    if kind == 'resident':
+        user = instance.user
+        parts = [user.first_name, user.last_name, user.email, instance.unit_number, instance.phone]
+    elif kind == 'payment':
+        parts = [instance.transaction_code]
+    elif kind == 'workorder':
+        parts = [instance.order_id, instance.title, instance.unit_number, instance.description]
+    elif kind == 'subcontractor':
+        parts = [instance.name, instance.company_name, instance.phone, instance.email]
+    else:
+        parts = [instance.unit_number, instance.description]
+    return ' '.join(str(part) for part in parts if part)
+
+
+def _rowid(kind, object_id):
+    return object_id * KIND_SHIFT + KIND_CODES[kind]
+
+
+def index_object(kind, instance):
+    """Add or replace the index entry for one object"""
+    if not search_enabled():
+        return
+    rowid = _rowid(kind, instance.pk)
+    content = document(kind, instance)
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {SEARCH_TABLE} WHERE rowid = %s', [rowid])
+        if content:
+            cursor.execute(
+                f'INSERT INTO {SEARCH_TABLE} (rowid, kind, content) VALUES (%s, %s, %s)',
+                [rowid, kind, content]
+            )
+
+
+def remove_object(kind, object_id):
+    """Drop the index entry for one object"""
+    if not search_enabled():
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {SEARCH_TABLE} WHERE rowid = %s', [_rowid(kind, object_id)])
+
+
+def remove_objects(kind, ids, batch_size=500):
+    """Drop the index entries of many objects of one kind, a batch of ids per statement"""
+    if not search_enabled():
+        return
+    rowids = [_rowid(kind, object_id) for object_id in ids]
+    with connection.cursor() as cursor:
+        for start in range(0, len(rowids), batch_size):
+            batch = rowids[start:start + batch_size]
+            placeholders = ', '.join(['%s'] * len(batch))
+            cursor.execute(f'DELETE FROM {SEARCH_TABLE} WHERE rowid IN ({placeholders})', batch)
+
+
+def rebuild(kinds=None):
+    """Recreate the index entries for the given kinds (all by default)"""
+    if not search_enabled():
+        return
+    with connection.cursor() as cursor:
+        for kind in kinds or KIND_CODES:
+            cursor.execute(f'DELETE FROM {SEARCH_TABLE} WHERE kind = %s', [kind])
+            cursor.execute(f'INSERT INTO {SEARCH_TABLE} (rowid, kind, content) {REBUILD_SQL[kind]}')
+
+
+def reindex(kind, ids, batch_size=500):
+    """Recreate the index entries of some objects of one kind, a batch of ids per statement"""
+    if not search_enabled():
+        return
+    rowids = [_rowid(kind, object_id) for object_id in ids]
+    with connection.cursor() as cursor:
+        for start in range(0, len(rowids), batch_size):
+            batch = rowids[start:start + batch_size]
+            placeholders = ', '.join(['%s'] * len(batch))
+            cursor.execute(f'DELETE FROM {SEARCH_TABLE} WHERE rowid IN ({placeholders})', batch)
+            cursor.execute(
+                f'INSERT INTO {SEARCH_TABLE} (rowid, kind, content) '
+                f'SELECT * FROM ({REBUILD_SQL[kind]}) WHERE entry_id IN ({placeholders})',
+                batch
+            )
+
+
+def match_expression(kind, query):
+    """Turn free text into an FTS5 query: every term must match as a prefix"""
+    terms = [term.replace('"', '') for term in query.split()]
+    terms = [f'"{term}"*' for term in terms if term]
+    if not terms:
+        return None
+    return f'kind:{kind} AND content:({" ".join(terms)})'
+
+
+def matching_ids(kind, query):
+    """
+    Subquery of the ids of objects of one kind matching the query, or None
+    when the query has no terms.
+
+    It is meant for an __in filter, so the database joins the matches
+    with the rest of the list query instead of sending them back here.
+    """
+    expression = match_expression(kind, query)
+    if expression is None:
+        return None
+    return RawSQL(
+        f'SELECT rowid / {KIND_SHIFT} FROM {SEARCH_TABLE} WHERE {SEARCH_TABLE} MATCH %s',
+        [expression]
+    )
+
+
+def search_q(query, fallback, **lookups):
+    """
+    Build the filter for a list view's search box.
+
+    `lookups` maps a lookup on the filtered model to the index kind whose
+    ids it should match, e.g. search_q(q, fallback, pk='payment',
+    resident='resident'). Without the FTS5 table (other database backends)
+    the `fallback` Q is returned unchanged.
+    """
+    if not search_enabled():
+        return fallback
+    condition = Q(pk__in=[])
+    for lookup, kind in lookups.items():
+        ids = matching_ids(kind, query)
+        if ids is not None:
+            condition |= Q(**{f'{lookup}__in': ids})
+    return condition
@@ -0,0 +1,46 @@
+from datetime import date
+
+from django.db import transaction
+from django.db.models import F
+
+from .models import IdSequence
+
+WORK_ORDER_ID_FORMAT = 'WO-{year}-{number:06d}'
+
+
+def allocate(name, count=1):
+    """
+    Reserve `count` consecutive numbers of the named sequence.
+
+    The counter row is bumped with a single UPDATE ... SET last_value =
+    last_value + count, which holds its row lock until the transaction
+    ends, so concurrent callers always get disjoint ranges. Numbers are
+    never reused, even if the caller's transaction rolls back later.
+    """
+    if count < 1:
+        raise ValueError('count must be at least 1')
+
+    with transaction.atomic():
+        IdSequence.objects.get_or_create(name=name)
+        sequence = IdSequence.objects.filter(name=name)
+        sequence.update(last_value=F('last_value') + count)
+        last = sequence.values_list('last_value', flat=True).get()
+
+    return range(last - count + 1, last + 1)
+
+
+def work_order_sequence(year):
+    return f'work_order:{year}'
+
+
+def next_work_order_ids(count, year=None):
+    """`count` new work order ids such as WO-2026-000123, reserved in one round trip"""
+    year = year or date.today().year
+    return [
+        WORK_ORDER_ID_FORMAT.format(year=year, number=number)
+        for number in allocate(work_order_sequence(year), count)
+    ]
+
+
+def next_work_order_id(year=None):
+    return next_work_order_ids(1, year)[0]
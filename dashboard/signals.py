@@ -0,0 +1,108 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.contrib.auth.models import User
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from django.utils import timezone
+
+from . import search, stats
+from .summaries import adjust_month_summaries, refresh_month_summary, stored_summary_values, summary_values
+from .models import Resident, Payment, WorkOrder, Unit, ParkingSlot, Subcontractor
+
+# Models kept in the full-text search index, by index kind
+SEARCH_KINDS = {
+    Resident: 'resident',
+    Payment: 'payment',
+    WorkOrder: 'workorder',
+    Subcontractor: 'subcontractor',
+    Unit: 'unit',
+}
+
+# Models the cached stat groups are computed from
+STATS_MODELS = {Resident, Payment, WorkOrder, Unit, ParkingSlot, Subcontractor}
+
+
+# Set by deferred_index_updates() while a bulk change runs
+_deferred = ContextVar('deferred_index_updates', default=False)
+
+
+@contextmanager
+def deferred_index_updates():
+    """
+    Skip the per-row search index and month summary receivers in the block.
+
+    For bulk changes made through the ORM (so cascades still apply) whose
+    caller updates the index and the summaries itself, once, afterwards.
+    """
+    token = _deferred.set(True)
+    try:
+        yield
+    finally:
+        _deferred.reset(token)
+
+
+def update_search_index(sender, instance, **kwargs):
+    if not _deferred.get():
+        search.index_object(SEARCH_KINDS[sender], instance)
+
+
+def remove_from_search_index(sender, instance, **kwargs):
+    if not _deferred.get():
+        search.remove_object(SEARCH_KINDS[sender], instance.pk)
+
+
+@receiver(post_save, sender=User)
+def update_resident_search_index(sender, instance, **kwargs):
+    # Resident names and emails live on the user
+    for resident in Resident.objects.filter(user=instance).select_related('user'):
+        search.index_object('resident', resident)
+
+
+@receiver(post_save, sender=User)
+def touch_resident(sender, instance, created, update_fields=None, **kwargs):
+    # Cached tenant and payment rows show the user's name and are keyed on Resident.updated_at
+    if not created and update_fields != frozenset(['last_login']):
+        if Resident.objects.filter(user=instance).update(updated_at=timezone.now()):
+            # update() sends no post_save, and the arrears report caches tenant names
+            stats.invalidate(Resident)
+
+
+@receiver(post_save, sender=Payment)
+def update_month_summary(sender, instance, created, **kwargs):
+    if _deferred.get():
+        return
+    # An edit moves the payment's old values out of their month and the new ones in
+    old = None if created else stored_summary_values(instance)
+    if created or old is not None:
+        adjust_month_summaries(old=old, new=summary_values(instance))
+    else:
+        # Saved without being loaded first, so its old values are unknown
+        refresh_month_summary(instance.month, instance.payment_type)
+    instance._stored_values = {**getattr(instance, '_stored_values', {}), **summary_values(instance)}
+
+
+@receiver(post_delete, sender=Payment)
+def remove_from_month_summary(sender, instance, **kwargs):
+    if _deferred.get():
+        return
+    old = stored_summary_values(instance)
+    if old is not None:
+        adjust_month_summaries(old=old)
+    else:
+        refresh_month_summary(instance.month, instance.payment_type)
+
+
+def invalidate_stats(sender, **kwargs):
+    stats.invalidate(sender)
+
+
+# Connected per model rather than for every sender: a delete receiver
+# without a sender stops Django from fast-deleting any model's rows.
+for model in SEARCH_KINDS:
+    post_save.connect(update_search_index, sender=model)
+    post_delete.connect(remove_from_search_index, sender=model)
+
+for model in STATS_MODELS:
+    post_save.connect(invalidate_stats, sender=model)
+    post_delete.connect(invalidate_stats, sender=model)
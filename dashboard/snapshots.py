@@ -0,0 +1,70 @@
+from datetime import date
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Count, DecimalField, OuterRef, Q, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+
+from .models import Payment, Unit, OccupancySnapshot
+
+SNAPSHOT_FIELDS = ['occupied', 'vacant', 'maintenance', 'expected_rent', 'collected_rent']
+
+# Ways a range of snapshots can be grouped, besides the building total per day
+SNAPSHOT_GROUPS = ['unit_type', 'floor']
+
+
+def snapshot_rows(day):
+    """
+    Per unit type and floor counts and rent for `day`, in one grouped query.
+
+    Rent collected is what the current residents have paid on their rent
+    invoice of the day's month, summed through a correlated subquery so
+    the payments do not multiply the unit rows.
+    """
+    money = DecimalField(max_digits=14, decimal_places=2)
+    collected = Payment.objects.filter(
+        resident=OuterRef('resident'),
+        payment_type='rent',
+        month=day.strftime('%B %Y')
+    ).order_by().values('resident').annotate(total=Sum('amount_paid')).values('total')
+
+    return Unit.objects.order_by().values('unit_type', 'floor').annotate(
+        occupied=Count('pk', filter=Q(status='occupied')),
+        vacant=Count('pk', filter=Q(status='vacant')),
+        maintenance=Count('pk', filter=Q(status='maintenance')),
+        expected_rent=Coalesce(Sum('rent_amount', filter=Q(status='occupied')), Value(Decimal('0')), output_field=money),
+        collected_rent=Coalesce(Sum(Subquery(collected, output_field=money)), Value(Decimal('0')), output_field=money),
+    )
+
+
+def take_occupancy_snapshot(day=None):
+    """Store (or replace) the snapshot rows of a day and return how many were written"""
+    day = day or date.today()
+    snapshots = [OccupancySnapshot(date=day, **row) for row in snapshot_rows(day)]
+
+    with transaction.atomic():
+        OccupancySnapshot.objects.filter(date=day).delete()
+        OccupancySnapshot.objects.bulk_create(snapshots, batch_size=500)
+
+    return len(snapshots)
+
+
+def occupancy_series(start, end, group=None):
+    """
+    Snapshot totals per day between two dates, optionally split by unit type or floor.
+
+    Served from the pre-aggregated snapshot rows, which the unique
+    (date, unit_type, floor) index keeps in date order.
+    """
+    keys = ['date'] + ([group] if group else [])
+    rows = OccupancySnapshot.objects.filter(date__range=(start, end)).order_by(*keys).values(*keys).annotate(
+        **{field: Sum(field) for field in SNAPSHOT_FIELDS}
+    )
+    return [with_occupancy_rate(row) for row in rows]
+
+
+def with_occupancy_rate(row):
+    """Add the occupancy rate, computed like building_stats does"""
+    total = row['occupied'] + row['vacant'] + row['maintenance']
+    row['occupancy_rate'] = round((row['occupied'] / total) * 100, 1) if total else 0
+    return row
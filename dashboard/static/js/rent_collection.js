@@ -2,30 +2,6 @@
 
 document.addEventListener('DOMContentLoaded', function() {
     
-    // Real-time search
-    const searchInput = document.getElementById('searchInput');
-    const tableRows = document.querySelectorAll('.tenants-table tbody tr[data-payment-id]');
-
-    if (searchInput) {
-        searchInput.addEventListener('input', function() {
-            const searchTerm = this.value.toLowerCase().trim();
-            
-            tableRows.forEach(row => {
-                const tenant = (row.dataset.tenant || '').toLowerCase();
-                const unit = (row.dataset.unit || '').toLowerCase();
-                const month = row.dataset.monthName;
-                const phone = (row.dataset.phone || '').toLowerCase();
-                
-                const matches = tenant.includes(searchTerm) || 
-                               unit.includes(searchTerm) || 
-                               month.includes(searchTerm) ||
-                               phone.includes(searchTerm);
-                
-                row.style.display = matches ? '' : 'none';
-            });
-        });
-    }
-    
     // Record Payment Modal
     const recordPaymentModal = document.getElementById('recordPaymentModal');
     const paymentModalOverlay = document.getElementById('paymentModalOverlay');
@@ -2,28 +2,6 @@
 
 document.addEventListener('DOMContentLoaded', function() {
     
-    // Real-time search
-    const searchInput = document.getElementById('searchInput');
-    const tableRows = document.querySelectorAll('.tenants-table tbody tr[data-order-id]');
-
-    if (searchInput) {
-        searchInput.addEventListener('input', function() {
-            const searchTerm = this.value.toLowerCase().trim();
-            
-            tableRows.forEach(row => {
-                const title = (row.dataset.title || '').toLowerCase();
-                const unit = (row.dataset.unit || '').toLowerCase();
-                const orderNum = (row.dataset.ordernum || '').toLowerCase();
-                
-                const matches = title.includes(searchTerm) || 
-                               unit.includes(searchTerm) || 
-                               orderNum.includes(searchTerm);
-                
-                row.style.display = matches ? '' : 'none';
-            });
-        });
-    }
-    
     // Create Work Order Modal
     const createBtn = document.getElementById('createWorkOrderBtn');
     const createModal = document.getElementById('createWorkOrderModal');
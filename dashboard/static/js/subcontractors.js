@@ -17,29 +17,6 @@ document.addEventListener('DOMContentLoaded', function() {
         window.location.href = `?status=${currentStatus}&category=${category}`;
     };
 
-    // Real-time search
-const searchInput = document.getElementById('searchInput');
-const tableRows = document.querySelectorAll('.tenants-table tbody tr[data-contractor-id]');
-
-if (searchInput) {
-    searchInput.addEventListener('input', function() {
-        const searchTerm = this.value.toLowerCase().trim();
-        
-        tableRows.forEach(row => {
-            const name = (row.dataset.name || '').toLowerCase();
-            const company = (row.dataset.company || '').toLowerCase();
-            const phone = (row.dataset.phone || '').toLowerCase();
-            const email = (row.dataset.email || '').toLowerCase();
-            
-            const matches = name.includes(searchTerm) || 
-                           company.includes(searchTerm) || 
-                           phone.includes(searchTerm) ||
-                           email.includes(searchTerm);
-            
-            row.style.display = matches ? '' : 'none';
-        });
-    });
-}
     // ========================================
     // ADD SUBCONTRACTOR MODAL
     // ========================================
@@ -0,0 +1,249 @@
+import threading
+from collections import Counter
+from datetime import date, timedelta
+from decimal import Decimal
+from functools import wraps
+
+from django.core.cache import caches
+from django.db.models import Count, F, Max, Min, Q, Sum
+from .models import Resident, Payment, WorkOrder, Unit, ParkingSlot, Subcontractor
+
+# Cache alias from settings.CACHES that holds the stat groups
+STATS_CACHE = 'stats'
+
+# Safety net only; entries are normally dropped by the signals in signals.py
+STATS_TIMEOUT = 60 * 60
+
+# Stat group name -> models whose changes invalidate it
+STAT_GROUPS = {}
+
+_counters = Counter()
+_counters_lock = threading.Lock()
+
+
+def _key(group):
+    # Keyed per day as some counters (e.g. overdue tenants) depend on today's date
+    return f'stats:{group}:{date.today().isoformat()}'
+
+
+def _count(group, outcome):
+    with _counters_lock:
+        _counters[(group, outcome)] += 1
+
+
+def cached_stats(group, depends_on):
+    """Cache a stats function under `group` until one of `depends_on` changes"""
+    def decorator(func):
+        STAT_GROUPS[group] = set(depends_on)
+
+        @wraps(func)
+        def wrapper():
+            cache = caches[STATS_CACHE]
+            stats = cache.get(_key(group))
+            if stats is None:
+                _count(group, 'misses')
+                stats = func()
+                cache.set(_key(group), stats, STATS_TIMEOUT)
+            else:
+                _count(group, 'hits')
+            return stats
+        return wrapper
+    return decorator
+
+
+def invalidate(*models):
+    """Drop every stat group that depends on one of the given models"""
+    keys = [
+        _key(group)
+        for group, depends_on in STAT_GROUPS.items()
+        if depends_on.intersection(models)
+    ]
+    if keys:
+        caches[STATS_CACHE].delete_many(keys)
+
+
+def cache_info():
+    """Hit and miss counters per stat group for this process"""
+    with _counters_lock:
+        return {
+            group: {
+                'hits': _counters[(group, 'hits')],
+                'misses': _counters[(group, 'misses')],
+            }
+            for group in STAT_GROUPS
+        }
+
+
+def count_by(queryset, field, values, total=None):
+    """Count rows per value of `field` in a single grouped query"""
+    aggregates = {
+        value: Count('pk', filter=Q(**{field: value}))
+        for value in values
+    }
+    if total:
+        aggregates[total] = Count('pk')
+    return queryset.aggregate(**aggregates)
+
+
+@cached_stats('dashboard_units', depends_on=[Resident, Unit])
+def unit_stats():
+    """Resident and unit counters shown on the dashboard overview"""
+    counts = Unit.objects.aggregate(
+        total_units=Count('pk'),
+        vacant_units=Count('pk', filter=Q(status='vacant')),
+        upcoming_units=Count('pk', filter=Q(status='upcoming')),
+    )
+    return {
+        'total_residents': Resident.objects.filter(is_active=True).count(),
+        'total_units': counts['total_units'],
+        'vacant_units': counts['vacant_units'],
+        'upcoming_units': counts['upcoming_units'],
+    }
+
+
+@cached_stats('dashboard_work_orders', depends_on=[WorkOrder])
+def work_order_stats():
+    """Work order counts per open status"""
+    return count_by(WorkOrder.objects.all(), 'status', ['new', 'open', 'in_progress', 'delayed'])
+
+
+@cached_stats('tenants', depends_on=[Resident, Payment])
+def tenant_stats():
+    """Tenant counts per status and the number of tenants with overdue payments"""
+    stats = count_by(Resident.objects.all(), 'status', ['active', 'pending', 'moved_out'], total='total')
+    stats['overdue'] = Payment.objects.filter(
+        due_date__lt=date.today(),
+        amount__gt=F('amount_paid')
+    ).values('resident').distinct().count()
+    return stats
+
+
+# Arrears aging buckets: name -> (min, max) days past due, max exclusive
+ARREARS_BUCKETS = {
+    'current': (0, 30),
+    'days_30': (30, 60),
+    'days_60': (60, 90),
+    'days_90': (90, None),
+}
+
+
+@cached_stats('arrears', depends_on=[Resident, Payment])
+def arrears_report():
+    """Outstanding balances per resident aged by days past due, with portfolio totals"""
+    today = date.today()
+    balance = F('amount') - F('amount_paid')
+
+    buckets = {}
+    for name, (min_days, max_days) in ARREARS_BUCKETS.items():
+        condition = Q(due_date__lte=today - timedelta(days=min_days))
+        if max_days is not None:
+            condition &= Q(due_date__gt=today - timedelta(days=max_days))
+        buckets[name] = Sum(balance, filter=condition, default=Decimal('0'))
+
+    rows = Payment.objects.filter(
+        due_date__lte=today,
+        amount__gt=F('amount_paid')
+    ).values(
+        'resident', 'resident__unit_number', 'resident__phone',
+        'resident__user__first_name', 'resident__user__last_name'
+    ).annotate(
+        total=Sum(balance),
+        invoices=Count('pk'),
+        oldest_due_date=Min('due_date'),
+        **buckets
+    ).order_by('-total', 'resident')
+
+    residents = [
+        {
+            'resident_id': row['resident'],
+            'name': f"{row['resident__user__first_name']} {row['resident__user__last_name']}".strip(),
+            'unit_number': row['resident__unit_number'],
+            'phone': row['resident__phone'],
+            'invoices': row['invoices'],
+            'oldest_due_date': row['oldest_due_date'],
+            'total': row['total'],
+            **{name: row[name] for name in ARREARS_BUCKETS},
+        }
+        for row in rows
+    ]
+
+    totals = {name: sum((row[name] for row in residents), Decimal('0')) for name in ARREARS_BUCKETS}
+    totals['total'] = sum((row['total'] for row in residents), Decimal('0'))
+    totals['residents'] = len(residents)
+
+    return {'as_of': today, 'totals': totals, 'residents': residents}
+
+
+@cached_stats('parking', depends_on=[ParkingSlot])
+def parking_stats():
+    """Parking slot counts per status"""
+    return count_by(ParkingSlot.objects.all(), 'status', ['assigned', 'available'], total='total')
+
+
+@cached_stats('services', depends_on=[WorkOrder])
+def services_stats():
+    """Work order counts per status plus urgent orders for the services page"""
+    stats = count_by(
+        WorkOrder.objects.all(),
+        'status',
+        ['new', 'open', 'in_progress', 'completed', 'delayed'],
+        total='total'
+    )
+    stats['urgent'] = WorkOrder.objects.filter(priority='urgent').count()
+    return stats
+
+
+@cached_stats('building', depends_on=[Unit])
+def building_stats():
+    """Unit counts per status, occupancy rate and number of floors"""
+    stats = Unit.objects.aggregate(
+        total_units=Count('pk'),
+        occupied=Count('pk', filter=Q(status='occupied')),
+        vacant=Count('pk', filter=Q(status='vacant')),
+        maintenance=Count('pk', filter=Q(status='maintenance')),
+        total_floors=Max('floor', default=0),
+    )
+
+    # Calculate occupancy rate
+    stats['occupancy_rate'] = 0
+    if stats['total_units'] > 0:
+        stats['occupancy_rate'] = round((stats['occupied'] / stats['total_units']) * 100, 1)
+
+    return stats
+
+
+@cached_stats('subcontractors', depends_on=[Subcontractor, WorkOrder])
+def subcontractor_stats():
+    """Subcontractor counts and the number of open work orders assigned to them"""
+    stats = count_by(Subcontractor.objects.all(), 'status', ['active', 'inactive'], total='total')
+    stats['work_orders'] = WorkOrder.objects.filter(
+        assigned_to__isnull=False,
+        status__in=WorkOrder.OPEN_STATUSES
+    ).count()
+    return stats
+
+
+def payment_summary(resident, month):
+    """Latest payment of each type for a resident in the given month number"""
+    summary = {payment_type: None for payment_type, _ in Payment.PAYMENT_TYPES}
+
+    # One query for all payment types; rows come back in Payment.Meta.ordering
+    payments = Payment.objects.filter(
+        resident=resident,
+        due_date__month=month,
+        payment_type__in=summary.keys()
+    )
+    for payment in payments:
+        if summary[payment.payment_type] is None:
+            summary[payment.payment_type] = payment
+
+    return summary
+
+
+def dashboard_stats(resident, month):
+    """All counters for dashboard_view: stats, work_order_stats and payment_summary"""
+    return {
+        'stats': unit_stats(),
+        'work_order_stats': work_order_stats(),
+        'payment_summary': payment_summary(resident, month),
+    }
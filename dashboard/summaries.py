@@ -0,0 +1,158 @@
+from collections import defaultdict
+from datetime import datetime
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Count, Q, Sum
+
+from .models import Payment, RentMonthSummary
+
+# Payment fields a month summary is computed from
+SUMMARY_FIELDS = ['month', 'payment_type', 'amount', 'amount_paid', 'status']
+
+
+def summary_aggregates():
+    """Aggregates stored on RentMonthSummary, computed over Payment rows"""
+    return {
+        'total_expected': Sum('amount', default=0),
+        'total_collected': Sum('amount_paid', default=0),
+        'paid_count': Count('pk', filter=Q(status='paid')),
+        'pending_count': Count('pk', filter=Q(status='pending')),
+        'overdue_count': Count('pk', filter=Q(status='overdue')),
+        'partial_count': Count('pk', filter=Q(status='partial')),
+    }
+
+
+def month_period(month):
+    """First day of a 'December 2025' style month label, or None"""
+    try:
+        return datetime.strptime(month, '%B %Y').date()
+    except ValueError:
+        return None
+
+
+def set_derived_totals(summary):
+    """Balance and collection rate, from the expected and collected totals"""
+    summary.total_balance = summary.total_expected - summary.total_collected
+    if summary.total_expected > 0:
+        rate = Decimal(summary.total_collected) / Decimal(summary.total_expected) * 100
+        summary.collection_rate = round(rate, 1)
+    else:
+        summary.collection_rate = 0
+
+
+def build_summary(month, payment_type, totals):
+    summary = RentMonthSummary(
+        month=month,
+        period=month_period(month),
+        payment_type=payment_type,
+        **totals
+    )
+    set_derived_totals(summary)
+    return summary
+
+
+def refresh_month_summary(month, payment_type='rent'):
+    """Recompute the summary row of one month and payment type"""
+    totals = Payment.objects.filter(
+        month=month,
+        payment_type=payment_type
+    ).aggregate(**summary_aggregates())
+    summary = build_summary(month, payment_type, totals)
+
+    defaults = {
+        field.name: getattr(summary, field.name)
+        for field in RentMonthSummary._meta.concrete_fields
+        if field.name not in ('id', 'month', 'payment_type', 'updated_at')
+    }
+    summary, _ = RentMonthSummary.objects.update_or_create(
+        month=month,
+        payment_type=payment_type,
+        defaults=defaults
+    )
+    return summary
+
+
+def summary_values(payment):
+    """The values of a payment that its month summary is computed from"""
+    return {field: getattr(payment, field) for field in SUMMARY_FIELDS}
+
+
+def stored_summary_values(payment):
+    """summary_values() of a payment as last loaded or saved, or None when they are not known"""
+    stored = getattr(payment, '_stored_values', {})
+    if all(field in stored for field in SUMMARY_FIELDS):
+        return {field: stored[field] for field in SUMMARY_FIELDS}
+    return None
+
+
+def adjust_month_summaries(old=None, new=None):
+    """
+    Apply the change of one payment to the summary rows, without re-aggregating.
+
+    `old` and `new` are its summary_values() before and after the change,
+    None when it was created or deleted. Each touched row is locked, has
+    the difference added and is saved. A row that does not exist yet, or
+    whose counts would go below zero because it had drifted, is
+    recomputed with refresh_month_summary() instead.
+    """
+    changes = defaultdict(lambda: defaultdict(int))
+    for values, sign in [(old, -1), (new, 1)]:
+        if values is None:
+            continue
+        change = changes[(values['month'], values['payment_type'])]
+        change['total_expected'] += sign * values['amount']
+        change['total_collected'] += sign * values['amount_paid']
+        change[f'{values["status"]}_count'] += sign
+
+    for (month, payment_type), change in changes.items():
+        change = {field: delta for field, delta in change.items() if delta}
+        if not change:
+            continue
+
+        with transaction.atomic():
+            summary = RentMonthSummary.objects.select_for_update().filter(
+                month=month,
+                payment_type=payment_type
+            ).first()
+            if summary is not None:
+                for field, delta in change.items():
+                    setattr(summary, field, getattr(summary, field) + delta)
+            if summary is None or any(getattr(summary, field) < 0 for field in change):
+                refresh_month_summary(month, payment_type)
+                continue
+
+            set_derived_totals(summary)
+            summary.save(update_fields=[*change, 'total_balance', 'collection_rate', 'updated_at'])
+
+
+def refresh_month_summaries(months, payment_types=None):
+    """Refresh the summary rows touched by a bulk change to Payment"""
+    for month in set(months):
+        for payment_type in payment_types or [payment_type for payment_type, _ in Payment.PAYMENT_TYPES]:
+            refresh_month_summary(month, payment_type)
+
+
+def rebuild_month_summaries():
+    """Recompute every summary row from scratch with one grouped query"""
+    rows = Payment.objects.order_by().values('month', 'payment_type').annotate(**summary_aggregates())
+    summaries = [
+        build_summary(
+            row.pop('month'),
+            row.pop('payment_type'),
+            row
+        )
+        for row in rows
+    ]
+    with transaction.atomic():
+        RentMonthSummary.objects.all().delete()
+        RentMonthSummary.objects.bulk_create(summaries, batch_size=500)
+    return len(summaries)
+
+
+def month_summary(month, payment_type='rent'):
+    """Summary row for a month, computed on first use if it does not exist yet"""
+    summary = RentMonthSummary.objects.filter(month=month, payment_type=payment_type).first()
+    if summary is None:
+        summary = refresh_month_summary(month, payment_type)
+    return summary
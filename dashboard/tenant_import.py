@@ -0,0 +1,157 @@
+import csv
+from datetime import date
+from decimal import Decimal, InvalidOperation
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.core.exceptions import ValidationError
+from django.core.validators import validate_email
+from django.db import transaction
+
+from . import search, stats
+from .models import Resident
+
+REQUIRED_COLUMNS = ['first_name', 'last_name', 'email', 'phone', 'unit_number', 'move_in_date']
+OPTIONAL_COLUMNS = ['monthly_rent', 'status']
+
+DEFAULT_PASSWORD = 'password123'  # Same default as add_tenant_view, should be changed
+BATCH_SIZE = 500
+
+
+class ImportResult:
+    def __init__(self):
+        self.valid = 0
+        self.created = 0
+        self.errors = []  # (line number, message)
+
+    def add_error(self, line, message):
+        self.errors.append((line, message))
+
+
+def base_username(first_name, last_name):
+    return f'{first_name.lower()}.{last_name.lower()}'.replace(' ', '')
+
+
+def unique_username(base, taken):
+    """First free `base`, `base1`, `base2`... not in `taken`, which is updated in place"""
+    username = base
+    counter = 1
+    while username in taken:
+        username = f'{base}{counter}'
+        counter += 1
+    taken.add(username)
+    return username
+
+
+def taken_usernames(prefix=''):
+    """Existing usernames, optionally only those starting with `prefix`, in one query"""
+    users = User.objects.all()
+    if prefix:
+        users = users.filter(username__startswith=prefix)
+    return set(users.values_list('username', flat=True))
+
+
+def clean_row(row):
+    """Validate one CSV row and return its cleaned values, or raise ValueError"""
+    values = {key: (row.get(key) or '').strip() for key in REQUIRED_COLUMNS + OPTIONAL_COLUMNS}
+
+    missing = [key for key in REQUIRED_COLUMNS if not values[key]]
+    if missing:
+        raise ValueError(f'missing {", ".join(missing)}')
+
+    try:
+        validate_email(values['email'])
+    except ValidationError:
+        raise ValueError(f'invalid email {values["email"]}')
+
+    # Checked like the User model checks usernames; bulk_create runs no validators
+    values['username'] = base_username(values['first_name'], values['last_name'])
+    try:
+        User.username_validator(values['username'])
+    except ValidationError:
+        raise ValueError(f'name does not make a valid username: {values["username"]}')
+    if len(values['username']) > User._meta.get_field('username').max_length:
+        raise ValueError(f'name makes a username that is too long: {values["username"]}')
+
+    try:
+        values['move_in_date'] = date.fromisoformat(values['move_in_date'])
+    except ValueError:
+        raise ValueError(f'move_in_date must be YYYY-MM-DD, got {values["move_in_date"]}')
+
+    try:
+        values['monthly_rent'] = Decimal(values['monthly_rent'] or '10000')
+    except InvalidOperation:
+        raise ValueError(f'invalid monthly_rent {values["monthly_rent"]}')
+
+    values['status'] = values['status'] or 'active'
+    if values['status'] not in dict(Resident.STATUS_CHOICES):
+        raise ValueError(f'invalid status {values["status"]}')
+
+    if len(values['phone']) > Resident._meta.get_field('phone').max_length:
+        raise ValueError(f'phone {values["phone"]} is too long')
+    if len(values['unit_number']) > Resident._meta.get_field('unit_number').max_length:
+        raise ValueError(f'unit_number {values["unit_number"]} is too long')
+
+    return values
+
+
+def import_tenants(lines, password=DEFAULT_PASSWORD, dry_run=False):
+    """
+    Create users and residents from CSV text lines.
+
+    Rows that fail validation are reported in the result and skipped; the
+    valid ones are created together in one transaction. Usernames are made
+    unique against a single prefetched set. Every user's password is hashed
+    on its own, so each gets its own salt.
+    """
+    result = ImportResult()
+    reader = csv.DictReader(lines)
+
+    missing = [column for column in REQUIRED_COLUMNS if column not in (reader.fieldnames or [])]
+    if missing:
+        result.add_error(1, f'missing columns: {", ".join(missing)}')
+        return result
+
+    rows = []
+    for row in reader:
+        try:
+            rows.append(clean_row(row))
+        except ValueError as e:
+            result.add_error(reader.line_num, str(e))
+
+    result.valid = len(rows)
+    if dry_run or not rows:
+        return result
+
+    taken = taken_usernames()
+
+    with transaction.atomic():
+        users = User.objects.bulk_create([
+            User(
+                username=unique_username(row['username'], taken),
+                email=row['email'],
+                first_name=row['first_name'],
+                last_name=row['last_name'],
+                password=make_password(password)
+            )
+            for row in rows
+        ], batch_size=BATCH_SIZE)
+        residents = Resident.objects.bulk_create([
+            Resident(
+                user=user,
+                unit_number=row['unit_number'],
+                phone=row['phone'],
+                move_in_date=row['move_in_date'],
+                monthly_rent=row['monthly_rent'],
+                status=row['status']
+            )
+            for user, row in zip(users, rows)
+        ], batch_size=BATCH_SIZE)
+
+        # bulk_create sends no signals
+        search.reindex('resident', [resident.pk for resident in residents])
+
+    stats.invalidate(Resident)
+
+    result.created = len(users)
+    return result
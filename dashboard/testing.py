@@ -0,0 +1,26 @@
+from contextlib import contextmanager
+
+from .middleware import DEFAULT_QUERY_BUDGET
+from .querycount import QueryRecorder
+
+
+class QueryBudgetMixin:
+    """TestCase mixin for asserting per-view query budgets"""
+
+    @contextmanager
+    def assertQueryBudget(self, max_queries=DEFAULT_QUERY_BUDGET['MAX_QUERIES'],
+                          duplicate_threshold=DEFAULT_QUERY_BUDGET['DUPLICATE_THRESHOLD']):
+        with QueryRecorder() as recorder:
+            yield recorder
+
+        self.assertLessEqual(
+            recorder.count, max_queries,
+            f'{recorder.count} queries run, budget is {max_queries}'
+        )
+        repeated = recorder.repeated(duplicate_threshold)
+        self.assertFalse(
+            repeated,
+            'Query repeated (possible N+1):\n' + '\n'.join(
+                f'{count}x {sql}' for sql, count in repeated.items()
+            )
+        )
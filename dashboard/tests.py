@@ -1,3 +1,869 @@
-from django.test import TestCase
+from datetime import date, timedelta
+from decimal import Decimal
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.core.cache import caches
+from django.db import IntegrityError, connection, transaction
+from django.db.models.deletion import Collector
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from unittest import mock, skipUnless
+
+from . import search, stats
+from .dispatch import auto_assign, dispatch_backlog
+from .filters import filter_payments, filter_residents
+from .invoices import generate_invoices
+from .models import Resident, Payment, WorkOrder, Unit, ParkingSlot, Subcontractor, MpesaReviewItem, OccupancySnapshot, RentMonthSummary
+from .jobs import mark_overdue_payments, refresh_work_order_lateness
+from .ledger import reconcile_payments, record_transaction
+from .move_out import move_out
+from .mpesa import reconcile_statement
+from .pagination import encode_cursor
+from .occupancy import repair_occupancy
+from .parking import allocate_parking, slot_unit
+from .snapshots import take_occupancy_snapshot
+from .summaries import month_summary, rebuild_month_summaries, refresh_month_summary
+from .sequences import allocate, next_work_order_ids
+from .tenant_import import import_tenants
+from .testing import QueryBudgetMixin
+from .urls import urlpatterns
+
+
+@skipUnless(connection.vendor == 'sqlite', 'EXPLAIN QUERY PLAN is SQLite specific')
+class QueryPlanIndexTests(TestCase):
+    """The main list and stat queries should be served by the composite indexes"""
+
+    @classmethod
+    def setUpTestData(cls):
+        user = User.objects.create_user(username='jane.doe', first_name='Jane', last_name='Doe')
+        cls.resident = Resident.objects.create(
+            user=user,
+            unit_number='101',
+            phone='0700000000',
+            move_in_date=date(2025, 1, 1)
+        )
+        cls.contractor = Subcontractor.objects.create(
+            name='Pipe Pros',
+            category='plumber',
+            phone='0711000000',
+            email='pipes@example.com'
+        )
+
+    def assertUsesIndex(self, queryset, index_name):
+        plan = queryset.explain()
+        self.assertIn(index_name, plan, f'Expected {index_name} in plan:\n{plan}')
+
+    # Aggregates and exists() drop Payment.Meta.ordering, so the stat
+    # queries below are explained without it.
+    def test_rent_month_stats(self):
+        self.assertUsesIndex(
+            Payment.objects.filter(payment_type='rent', month='December 2025', status='paid').order_by(),
+            'payment_type_month_status_idx'
+        )
+
+    def test_unassigned_residents(self):
+        plan = Resident.objects.filter(status='active').unassigned().explain()
+        self.assertIn('resident_status_idx', plan)
+        self.assertIn('COVERING INDEX', plan)
+
+    def test_resident_invoice_lookup(self):
+        self.assertUsesIndex(
+            Payment.objects.filter(resident=self.resident, month='December 2025', payment_type='maintenance').order_by(),
+            'payment_resident_month_idx'
+        )
+        # Rent invoices are found through the one-rent-invoice-per-month constraint
+        self.assertUsesIndex(
+            Payment.objects.filter(resident=self.resident, month='December 2025', payment_type='rent').order_by(),
+            'payment_one_rent_per_month'
+        )
+
+    def test_overdue_scan(self):
+        self.assertUsesIndex(
+            Payment.objects.filter(status='pending', due_date__lt=date(2025, 12, 1)).order_by(),
+            'payment_status_due_idx'
+        )
+
+    def test_rent_ledger_listing(self):
+        self.assertUsesIndex(
+            Payment.objects.filter(payment_type='rent').order_by('-due_date'),
+            'payment_type_due_idx'
+        )
+
+    def test_work_orders_by_status(self):
+        self.assertUsesIndex(
+            WorkOrder.objects.filter(status='new').order_by('-created_at'),
+            'workorder_status_created_idx'
+        )
+
+    def test_contractor_workload(self):
+        self.assertUsesIndex(
+            WorkOrder.objects.filter(assigned_to=self.contractor, status__in=WorkOrder.OPEN_STATUSES),
+            'workorder_assigned_status_idx'
+        )
+
+    def test_units_by_status(self):
+        self.assertUsesIndex(
+            Unit.objects.filter(status='vacant').order_by('unit_number'),
+            'unit_status_number_idx'
+        )
+
+    def test_parking_slots_by_status(self):
+        self.assertUsesIndex(
+            ParkingSlot.objects.filter(status='available').order_by('slot_number'),
+            'parkingslot_status_slot_idx'
+        )
+
+
+class ViewQueryBudgetTests(QueryBudgetMixin, TestCase):
+    """Every page in dashboard/urls.py should stay within the query budget"""
+
+    # Views that take no URL arguments but should not be requested here
+    SKIPPED = {'logout', 'signup'}
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='admin', first_name='Ada', last_name='Admin')
+        today = date.today()
+        for i in range(10):
+            user = cls.user if i == 0 else User.objects.create_user(
+                username=f'tenant{i}', first_name=f'Tenant{i}', last_name='Test'
+            )
+            resident = Resident.objects.create(
+                user=user,
+                unit_number=str(101 + i),
+                phone=f'07000000{i:02d}',
+                move_in_date=today
+            )
+            Payment.objects.create(
+                resident=resident,
+                month=today.strftime('%B %Y'),
+                amount=10000,
+                due_date=today
+            )
+            Unit.objects.create(unit_number=str(101 + i), status='occupied', resident=resident)
+            ParkingSlot.objects.create(slot_number=f'P-{101 + i}A', resident=resident, status='assigned')
+            contractor = Subcontractor.objects.create(
+                name=f'Contractor {i}',
+                category='plumber',
+                phone='0711000000',
+                email=f'contractor{i}@example.com'
+            )
+            WorkOrder.objects.create(
+                order_id=f'WO-{1000 + i}',
+                title='Leaking tap',
+                unit_number=str(101 + i),
+                category='plumbing',
+                priority='normal',
+                status='delayed' if i % 2 else 'new',
+                assigned_to=contractor,
+                resident=resident,
+                due_date=today - timedelta(days=i)
+            )
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def test_views_within_budget(self):
+        for pattern in urlpatterns:
+            if pattern.pattern.converters or pattern.name in self.SKIPPED:
+                continue
+            with self.subTest(view=pattern.name):
+                with self.assertQueryBudget():
+                    response = self.client.get(reverse(pattern.name))
+                self.assertLess(response.status_code, 400)
+
+    @override_settings(QUERY_BUDGET={'SERVER_TIMING': True})
+    def test_server_timing(self):
+        response = self.client.get(reverse('tenants'))
+        self.assertRegex(response['Server-Timing'], r'desc="[1-9]\d* queries"')
+
+    @override_settings(QUERY_BUDGET={'SERVER_TIMING': True}, API_CONCURRENT_STATS=False)
+    async def test_server_timing_async(self):
+        # The async API views run through the middleware without being adapted
+        await self.async_client.aforce_login(self.user)
+        response = await self.async_client.get(reverse('api:units'))
+        self.assertRegex(response['Server-Timing'], r'desc="[1-9]\d* queries"')
+
+
+class StatsCacheTests(TestCase):
+    """Cached stat groups are dropped when one of their models changes"""
+
+    def setUp(self):
+        caches[stats.STATS_CACHE].clear()
+
+    def test_invalidated_on_save(self):
+        Unit.objects.create(unit_number='101', status='vacant')
+        self.assertEqual(stats.building_stats()['vacant'], 1)
+
+        with self.assertNumQueries(0):
+            stats.building_stats()
+
+        Unit.objects.create(unit_number='102', status='vacant')
+        self.assertEqual(stats.building_stats()['vacant'], 2)
+
+
+@skipUnless(connection.vendor == 'sqlite', 'The search index is an SQLite FTS5 table')
+class SearchTests(TestCase):
+    """List searches go through the full-text index, or icontains without it"""
+
+    @classmethod
+    def setUpTestData(cls):
+        for username, first_name, last_name, unit_number in [
+            ('john', 'John', 'Doe', '101'),
+            ('jane', 'Jane', 'Roe', '201'),
+        ]:
+            Resident.objects.create(
+                user=User.objects.create_user(username=username, first_name=first_name, last_name=last_name),
+                unit_number=unit_number, phone='0700000000', move_in_date=date(2025, 1, 1)
+            )
+
+    def search(self, query):
+        residents = filter_residents(Resident.objects.all(), {'search': query})
+        return sorted(residents.values_list('unit_number', flat=True))
+
+    def test_index(self):
+        self.assertEqual(self.search('jo'), ['101'])
+        self.assertEqual(self.search('ja ro'), ['201'])
+        self.assertEqual(self.search('"'), [])
+        # Terms match from the start of a word only
+        self.assertEqual(self.search('01'), [])
+
+    def test_kept_in_sync(self):
+        resident = Resident.objects.get(unit_number='101')
+        resident.user.first_name = 'Johnny'
+        resident.user.save()
+        self.assertEqual(self.search('johnny'), ['101'])
+
+        resident.unit_number = '301'
+        resident.save()
+        self.assertEqual(self.search('301'), ['301'])
+
+        resident.delete()
+        self.assertEqual(self.search('johnny'), [])
+
+    def test_other_models_fast_delete(self):
+        # The index and stats receivers are connected per model only
+        self.assertTrue(Collector(using='default').can_fast_delete(OccupancySnapshot.objects.all()))
+        self.assertFalse(Collector(using='default').can_fast_delete(Subcontractor.objects.all()))
+
+    def test_fallback(self):
+        with mock.patch.object(search, '_enabled', False):
+            self.assertEqual(self.search('01'), ['101', '201'])
+            self.assertEqual(self.search('ohn'), ['101'])
+
+
+class MonthSummaryTests(TestCase):
+    """Month summaries follow every payment change and match a full recompute"""
+
+    def setUp(self):
+        self.resident = Resident.objects.create(
+            user=User.objects.create_user(username='tenant'),
+            unit_number='101', phone='0700000000', move_in_date=date(2025, 1, 1)
+        )
+
+    def summary(self, month):
+        summary = RentMonthSummary.objects.get(month=month, payment_type='rent')
+        return (summary.total_expected, summary.total_collected, summary.paid_count,
+                summary.partial_count, summary.pending_count, summary.overdue_count, summary.collection_rate)
+
+    def assertMatchesRecompute(self, month):
+        kept = self.summary(month)
+        refresh_month_summary(month)
+        self.assertEqual(kept, self.summary(month))
+
+    def test_incremental_updates(self):
+        due_date = date.today() + timedelta(days=5)
+        first = Payment.objects.create(resident=self.resident, month='March 2099', amount=10000, due_date=due_date)
+        self.assertEqual(self.summary('March 2099'), (10000, 0, 0, 0, 1, 0, 0))
+
+        payment = Payment.objects.get(pk=first.pk)
+        payment.amount_paid = 2500
+        payment.save()
+        self.assertEqual(self.summary('March 2099'), (10000, 2500, 0, 1, 0, 0, 25))
+
+        # Moving a payment to another month takes it out of the old one
+        payment.month = 'April 2099'
+        payment.save()
+        self.assertEqual(self.summary('March 2099'), (0, 0, 0, 0, 0, 0, 0))
+        self.assertEqual(self.summary('April 2099'), (10000, 2500, 0, 1, 0, 0, 25))
+        self.assertMatchesRecompute('April 2099')
+
+        Payment.objects.get(pk=first.pk).delete()
+        self.assertEqual(self.summary('April 2099'), (0, 0, 0, 0, 0, 0, 0))
+
+    def test_rebuild(self):
+        for month, amount_paid, due_date in [('January 2026', 10000, date(2026, 1, 5)), ('February 2026', 0, date(2026, 2, 5))]:
+            Payment.objects.create(resident=self.resident, month=month, amount=10000, amount_paid=amount_paid, due_date=due_date)
+        expected = {month: self.summary(month) for month in ['January 2026', 'February 2026']}
+
+        RentMonthSummary.objects.all().delete()
+        self.assertEqual(rebuild_month_summaries(), 2)
+        self.assertEqual({month: self.summary(month) for month in expected}, expected)
+
+    def test_mark_overdue_payments(self):
+        today = date(2099, 3, 10)
+        for month, due_date in [('February 2099', date(2099, 2, 5)), ('March 2099', date(2099, 3, 15))]:
+            Payment.objects.create(resident=self.resident, month=month, amount=10000, due_date=due_date)
+
+        self.assertEqual(mark_overdue_payments(today=today), 1)
+        self.assertEqual(mark_overdue_payments(today=today), 0)
+        self.assertEqual(
+            dict(Payment.objects.values_list('month', 'status')),
+            {'February 2099': 'overdue', 'March 2099': 'pending'}
+        )
+        self.assertEqual(self.summary('February 2099')[4:6], (0, 1))
+        self.assertMatchesRecompute('February 2099')
+
+
+@override_settings(API_CONCURRENT_STATS=False)
+class ApiTests(TestCase):
+    """JSON API endpoints under /api/"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='admin', first_name='Ada', last_name='Admin')
+        for i in range(3):
+            Unit.objects.create(unit_number=str(101 + i), status='vacant')
+
+    def setUp(self):
+        # Test rollbacks send no signals, so cached stats may be left over
+        caches[stats.STATS_CACHE].clear()
+
+    def test_requires_login(self):
+        response = self.client.get(reverse('api:units'))
+        self.assertEqual(response.status_code, 401)
+
+    def test_list_is_paginated(self):
+        self.client.force_login(self.user)
+        first = self.client.get(reverse('api:units'), {'page_size': 2}).json()
+        self.assertEqual([unit['unit_number'] for unit in first['results']], ['101', '102'])
+
+        second = self.client.get(reverse('api:units'), {'page_size': 2, 'after': first['next']}).json()
+        self.assertEqual([unit['unit_number'] for unit in second['results']], ['103'])
+        self.assertIsNone(second['next'])
+
+    def test_invalid_cursor_is_ignored(self):
+        self.client.force_login(self.user)
+        for url, values in [
+            (reverse('tenants'), ['zz']),
+            (reverse('services'), ['zz', 1]),
+            (reverse('api:units'), [['101'], 'zz']),
+        ]:
+            response = self.client.get(url, {'after': encode_cursor(values)})
+            self.assertEqual(response.status_code, 200, url)
+
+    def test_stats(self):
+        self.client.force_login(self.user)
+        stats = self.client.get(reverse('api:stats')).json()
+        self.assertEqual(stats['building']['vacant'], 3)
+        self.assertIn('rent', stats)
+
+
+class ExportTests(TestCase):
+    """CSV exports stream the rows matching the list page filters"""
+
+    def test_payments_csv(self):
+        user = User.objects.create_user(username='admin', first_name='Ada', last_name='Admin')
+        resident = Resident.objects.create(user=user, unit_number='101', phone='0700000000', move_in_date=date(2025, 1, 1))
+        # Payment.save derives the status: one paid, one overdue
+        for month, amount_paid in [('January 2025', 10000), ('February 2025', 0)]:
+            Payment.objects.create(
+                resident=resident,
+                month=month,
+                amount=10000,
+                amount_paid=amount_paid,
+                due_date=date(2025, 1, 5)
+            )
+        self.client.force_login(user)
+
+        response = self.client.get(reverse('export_payments'), {'status': 'overdue', 'from': '2025-01-01'})
+        lines = b''.join(response.streaming_content).decode().splitlines()
+
+        self.assertEqual(response['Content-Type'], 'text/csv')
+        self.assertEqual(len(lines), 2)
+        self.assertIn(',overdue,', lines[1])
+
+
+class TenantImportTests(TestCase):
+    """Bulk CSV import of tenants"""
+
+    def test_import_skips_invalid_rows(self):
+        User.objects.create_user(username='jane.doe')
+        lines = [
+            'first_name,last_name,email,phone,unit_number,move_in_date',
+            'Jane,Doe,jane@example.com,0700000001,301,2026-01-01',
+            'John,Doe,not-an-email,0700000002,302,2026-01-01',
+            'Jo/hn,Doe,john@example.com,0700000003,303,2026-01-01',
+            'Jane,Roe,jane.roe@example.com,0700000004,304,2026-01-01',
+        ]
+
+        result = import_tenants(lines)
+
+        self.assertEqual(result.created, 2)
+        self.assertEqual([line for line, _ in result.errors], [3, 4])
+        users = User.objects.filter(resident__isnull=False).order_by('username')
+        self.assertEqual([user.username for user in users], ['jane.doe1', 'jane.roe'])
+        # Same password, but salted and hashed per user
+        self.assertNotEqual(users[0].password, users[1].password)
+        self.assertTrue(users[0].check_password('password123'))
+        self.assertEqual(
+            list(filter_residents(Resident.objects.all(), {'search': 'roe'}).values_list('unit_number', flat=True)),
+            ['304']
+        )
+
+
+class InvoiceGenerationTests(TestCase):
+    """Rent invoices are generated once per resident and month"""
+
+    def test_rerun_creates_no_duplicates(self):
+        for unit_number in ['101', '102']:
+            Resident.objects.create(
+                user=User.objects.create_user(username=f'tenant{unit_number}'),
+                unit_number=unit_number, phone='0700000000', move_in_date=date(2025, 1, 1), monthly_rent=10000
+            )
+
+        self.assertEqual(generate_invoices(date(2026, 3, 1)), 2)
+        self.assertEqual(generate_invoices(date(2026, 3, 1)), 0)
+        # A concurrent run that read the month before these were inserted skips them
+        with mock.patch('dashboard.invoices.set', return_value=set(), create=True):
+            self.assertEqual(generate_invoices(date(2026, 3, 1)), 0)
+        self.assertEqual(Payment.objects.filter(month='March 2026', payment_type='rent').count(), 2)
+        self.assertEqual(month_summary('March 2026').total_expected, 20000)
+
+        resident = Resident.objects.first()
+        Payment.objects.create(resident=resident, month='March 2026', amount=500, payment_type='maintenance', due_date=date(2026, 3, 5))
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            Payment.objects.create(resident=resident, month='March 2026', amount=10000, due_date=date(2026, 3, 5))
+
+
+class PaymentLedgerTests(TestCase):
+    """Receipts are appended to the ledger and summed into amount_paid"""
+
+    @classmethod
+    def setUpTestData(cls):
+        user = User.objects.create_user(username='jane.doe')
+        resident = Resident.objects.create(user=user, unit_number='101', phone='0700000000', move_in_date=date(2025, 1, 1))
+        cls.payment = Payment.objects.create(
+            resident=resident,
+            month='January 2099',
+            amount=10000,
+            due_date=date(2099, 1, 5)
+        )
+
+    def test_receipts_update_balance_and_status(self):
+        _, payment = record_transaction(self.payment.pk, '4000', 'mpesa', 'QAB1')
+        self.assertEqual((payment.amount_paid, payment.status, payment.paid), (4000, 'partial', False))
+
+        _, payment = record_transaction(self.payment.pk, '6000', 'mpesa', 'QAB2')
+        self.assertEqual((payment.amount_paid, payment.status, payment.paid), (10000, 'paid', True))
+        self.assertEqual(payment.transaction_code, 'QAB2')
+        self.assertEqual(payment.transactions.count(), 2)
+
+        summary = month_summary('January 2099')
+        self.assertEqual((summary.total_collected, summary.paid_count, summary.pending_count), (10000, 1, 0))
+
+    def test_reconcile_resets_from_ledger(self):
+        record_transaction(self.payment.pk, '4000')
+        Payment.objects.filter(pk=self.payment.pk).update(amount_paid=9000)
+
+        self.assertEqual(len(reconcile_payments(fix=True)), 1)
+        self.assertEqual(reconcile_payments(), [])
+        self.payment.refresh_from_db()
+        self.assertEqual((self.payment.amount_paid, self.payment.status), (4000, 'partial'))
+
+
+class MpesaReconciliationTests(TestCase):
+    """Statement lines are matched to open invoices or queued for review"""
+
+    STATEMENT = [
+        'Receipt No.,Completion Time,Transaction Status,Paid In,Other Party Info,A/C No.',
+        'QK1,2099-01-02 10:00:00,Completed,10000.00,254700000001 - JANE DOE,101',
+        'QK2,2099-01-02 11:00:00,Completed,2500.00,254700000002 - JOHN DOE,',
+        'QK3,2099-01-02 12:00:00,Completed,777.00,254799999999 - STRANGER,999',
+    ]
+
+    @classmethod
+    def setUpTestData(cls):
+        for i, unit_number in enumerate(['101', '102'], start=1):
+            user = User.objects.create_user(username=f'tenant{i}')
+            resident = Resident.objects.create(
+                user=user,
+                unit_number=unit_number,
+                phone=f'070000000{i}',
+                move_in_date=date(2025, 1, 1)
+            )
+            Payment.objects.create(resident=resident, month='January 2099', amount=10000, due_date=date(2099, 1, 5))
+
+    def test_reconcile_statement(self):
+        result = reconcile_statement(self.STATEMENT)
+
+        self.assertEqual(result.matched, 2)
+        self.assertEqual(dict(result.queued), {'unmatched': 1})
+        self.assertEqual(
+            set(Payment.objects.values_list('resident__unit_number', 'amount_paid', 'status')),
+            {('101', 10000, 'paid'), ('102', 2500, 'partial')}
+        )
+        self.assertEqual(MpesaReviewItem.objects.get().receipt_no, 'QK3')
+        self.assertEqual(
+            list(filter_payments(Payment.objects.all(), {'search': 'QK2'}).values_list('resident__unit_number', flat=True)),
+            ['102']
+        )
+
+        # Ingesting the same statement again records nothing twice
+        again = reconcile_statement(self.STATEMENT)
+        self.assertEqual((again.matched, again.duplicates), (0, 3))
+        self.assertEqual(reconcile_payments(), [])
+
+
+class ArrearsReportTests(TestCase):
+    """Arrears are aged by days past due, across year boundaries"""
+
+    def setUp(self):
+        caches[stats.STATS_CACHE].clear()
+
+    def test_buckets(self):
+        user = User.objects.create_user(username='jane.doe')
+        resident = Resident.objects.create(user=user, unit_number='101', phone='0700000000', move_in_date=date(2020, 1, 1))
+        today = date.today()
+        # Not rent, so the invoices need no month of their own
+        for days, amount_paid in [(-5, 0), (10, 4000), (40, 0), (75, 0), (400, 0)]:
+            Payment.objects.create(
+                resident=resident,
+                month='',
+                payment_type='additional',
+                amount=10000,
+                amount_paid=amount_paid,
+                due_date=today - timedelta(days=days)
+            )
+
+        report = stats.arrears_report()
+
+        self.assertEqual(
+            {name: report['totals'][name] for name in stats.ARREARS_BUCKETS},
+            {'current': 6000, 'days_30': 10000, 'days_60': 10000, 'days_90': 10000}
+        )
+        self.assertEqual(report['totals']['total'], 36000)
+        self.assertEqual(report['residents'][0]['invoices'], 4)
+        self.assertEqual(stats.tenant_stats()['overdue'], 1)
+
+    def test_rename_refreshes_cached_report(self):
+        user = User.objects.create_user(username='jane.doe', first_name='Jane')
+        resident = Resident.objects.create(user=user, unit_number='101', phone='0700000000', move_in_date=date(2020, 1, 1))
+        Payment.objects.create(
+            resident=resident, month='', payment_type='additional', amount=10000, due_date=date.today()
+        )
+        self.assertEqual(stats.arrears_report()['residents'][0]['name'], 'Jane')
+
+        user.first_name = 'Janet'
+        user.save()
+
+        self.assertEqual(stats.arrears_report()['residents'][0]['name'], 'Janet')
+
+
+class DispatchTests(TestCase):
+    """Work orders go to the least loaded contractor of their trade, best rated first"""
+
+    def contractor(self, name, category, rating, **kwargs):
+        return Subcontractor.objects.create(
+            name=name, category=category, phone='0700000000', email=f'{name}@example.com', rating=rating, **kwargs
+        )
+
+    def work_order(self, order_id, category, **kwargs):
+        return WorkOrder.objects.create(
+            order_id=order_id, title='Leak', description='', unit_number='101', category=category, **kwargs
+        )
+
+    def test_least_loaded_then_best_rated(self):
+        busy = self.contractor('busy', 'plumber', 5)
+        good = self.contractor('good', 'plumber', 4)
+        okay = self.contractor('okay', 'plumber', 3)
+        self.contractor('retired', 'plumber', 5, status='inactive')
+        # Delayed orders are still open work
+        self.work_order('WO-1', 'plumbing', assigned_to=busy, status='delayed')
+
+        self.assertEqual(auto_assign('plumbing'), good)
+
+        for order_id, status in [('WO-2', 'new'), ('WO-3', 'open'), ('WO-4', 'delayed')]:
+            self.work_order(order_id, 'plumbing', status=status)
+        assignments = dispatch_backlog()
+
+        self.assertEqual(
+            {contractor_id: len(ids) for contractor_id, ids in assignments.items()},
+            {good.pk: 1, okay.pk: 1, busy.pk: 1}
+        )
+        self.assertFalse(WorkOrder.objects.filter(assigned_to__isnull=True).exists())
+
+    def test_general_fallback(self):
+        handyman = self.contractor('handyman', 'general', 4)
+        self.work_order('WO-1', 'painting')
+        self.work_order('WO-2', 'painting', status='completed')
+
+        self.assertEqual(dispatch_backlog(), {handyman.pk: [WorkOrder.objects.get(order_id='WO-1').pk]})
+
+
+class WorkOrderLatenessTests(TestCase):
+    """The lateness job works through the table in chunks"""
+
+    def test_refresh(self):
+        today = date(2026, 3, 1)
+        orders = {}
+        for order_id, status, due_date in [
+            ('WO-1', 'new', date(2026, 2, 20)),
+            ('WO-2', 'in_progress', date(2025, 12, 31)),
+            ('WO-3', 'completed', date(2026, 1, 1)),
+            ('WO-4', 'delayed', date(2026, 4, 1)),
+            ('WO-5', 'open', None),
+            ('WO-6', 'open', date(2026, 3, 1)),
+        ]:
+            orders[order_id] = WorkOrder.objects.create(
+                order_id=order_id, unit_number='101', category='general', priority='normal',
+                status=status, due_date=due_date, days_late=3 if status == 'delayed' else 0
+            )
+
+        refresh_work_order_lateness(today=today, chunk_size=2)
+
+        self.assertEqual(
+            {order.order_id: (order.status, order.days_late) for order in WorkOrder.objects.all()},
+            {
+                'WO-1': ('delayed', 9),
+                'WO-2': ('delayed', 60),
+                'WO-3': ('completed', 0),
+                'WO-4': ('open', 0),
+                'WO-5': ('open', 0),
+                'WO-6': ('open', 0),
+            }
+        )
+
+        # Rescheduled orders go back to the status they were delayed from
+        WorkOrder.objects.filter(order_id__in=['WO-1', 'WO-2']).update(due_date=date(2026, 4, 1))
+        refresh_work_order_lateness(today=today)
+        self.assertEqual(
+            dict(WorkOrder.objects.filter(order_id__in=['WO-1', 'WO-2']).values_list('order_id', 'status')),
+            {'WO-1': 'new', 'WO-2': 'in_progress'}
+        )
+
+
+class WorkOrderIdTests(TestCase):
+    """Work order ids come from a per-year counter, never from guessing"""
+
+    def test_allocation(self):
+        self.assertEqual(list(allocate('test', 3)), [1, 2, 3])
+        self.assertEqual(list(allocate('test')), [4])
+        self.assertEqual(next_work_order_ids(2, year=2026), ['WO-2026-000001', 'WO-2026-000002'])
+        self.assertEqual(next_work_order_ids(1, year=2027), ['WO-2027-000001'])
+
+    def test_create_view(self):
+        User.objects.create_user(username='admin', password='secret')
+        self.client.login(username='admin', password='secret')
+        for title in ['Leak', 'Socket']:
+            self.client.post(reverse('create_work_order'), {
+                'title': title, 'description': '', 'unit_number': '101',
+                'category': 'general', 'priority': 'normal', 'contractor_id': '', 'due_date': ''
+            })
+
+        year = date.today().year
+        self.assertEqual(
+            list(WorkOrder.objects.order_by('pk').values_list('order_id', flat=True)),
+            [f'WO-{year}-000001', f'WO-{year}-000002']
+        )
+
+
+class ParkingAllocationTests(TestCase):
+    """Each unit's P-{unit}A/B slots follow its active resident"""
+
+    def test_allocation(self):
+        def resident(username, unit_number, status='active'):
+            user = User.objects.create_user(username=username)
+            return Resident.objects.create(
+                user=user, unit_number=unit_number, phone='0700000000', move_in_date=date(2025, 1, 1), status=status
+            )
+
+        # Slots follow Unit.resident, not the copy in Resident.unit_number
+        jane = resident('jane', '102')
+        moved_out = resident('john', '102', status='moved_out')
+        Unit.objects.create(unit_number='101', status='occupied', resident=jane)
+        Unit.objects.create(unit_number='102', unit_type='1br', floor=1, rent_amount=10000)
+        for slot_number in ['P-101A', 'P-101B', 'P-102A', 'P-V1']:
+            ParkingSlot.objects.create(slot_number=slot_number, resident=moved_out, status='assigned')
+
+        self.assertEqual((slot_unit('P-101A'), slot_unit('P-V1')), ('101', None))
+
+        preview = allocate_parking(dry_run=True)
+        self.assertEqual((len(preview.assigned), len(preview.released)), (2, 1))
+        self.assertEqual(ParkingSlot.objects.filter(resident=moved_out).count(), 4)
+
+        allocate_parking()
+        self.assertEqual(
+            dict(ParkingSlot.objects.values_list('slot_number', 'resident')),
+            {'P-101A': jane.pk, 'P-101B': jane.pk, 'P-102A': None, 'P-V1': moved_out.pk}
+        )
+        self.assertEqual(allocate_parking(dry_run=True).changes, [])
+
+
+class MoveOutTests(TestCase):
+    """Moving out frees everything that still points at the tenant"""
+
+    def test_move_out(self):
+        moving, staying = [
+            Resident.objects.create(
+                user=User.objects.create_user(username=f'tenant{unit_number}'),
+                unit_number=unit_number, phone='0700000000', move_in_date=date(2025, 1, 1)
+            )
+            for unit_number in ['101', '102']
+        ]
+        for resident in [moving, staying]:
+            Unit.objects.create(unit_number=resident.unit_number, status='occupied', resident=resident)
+            ParkingSlot.objects.create(slot_number=f'P-{resident.unit_number}A', resident=resident, status='assigned')
+            WorkOrder.objects.create(
+                order_id=f'WO-{resident.unit_number}', unit_number=resident.unit_number,
+                category='general', priority='normal', resident=resident
+            )
+            for due_date, amount_paid in [(date(2026, 1, 5), 10000), (date(2026, 3, 5), 0), (date(2026, 4, 5), 0)]:
+                Payment.objects.create(
+                    resident=resident, month=due_date.strftime('%B %Y'), amount=10000,
+                    amount_paid=amount_paid, due_date=due_date
+                )
+
+        review_item = MpesaReviewItem.objects.create(
+            receipt_no='QK1', amount=10000, reason='ambiguous',
+            suggested_payment=Payment.objects.get(resident=moving, month='April 2026')
+        )
+        # Resident.unit_number is only a copy: a drifted one frees nothing
+        Resident.objects.filter(pk=moving.pk).update(unit_number='102')
+
+        preview = move_out([moving.pk], move_out_date=date(2026, 2, 28), dry_run=True)
+        self.assertEqual(Payment.objects.count(), 6)
+
+        result = move_out([moving.pk], move_out_date=date(2026, 2, 28))
+
+        for counts in [preview, result]:
+            self.assertEqual(
+                (counts.residents, counts.parking_slots, counts.units, counts.payments, counts.work_orders),
+                (1, 1, 1, 2, 1)
+            )
+        moving.refresh_from_db()
+        self.assertEqual(moving.status, 'moved_out')
+        self.assertEqual(
+            dict(Unit.objects.values_list('unit_number', 'status')),
+            {'101': 'vacant', '102': 'occupied'}
+        )
+        self.assertFalse(ParkingSlot.objects.filter(resident=moving).exists())
+        self.assertFalse(WorkOrder.objects.filter(resident=moving).exists())
+        self.assertEqual(Payment.objects.filter(resident=moving).count(), 1)
+        self.assertEqual(Payment.objects.filter(resident=staying).count(), 3)
+        self.assertEqual(month_summary('March 2026').total_expected, 10000)
+        review_item.refresh_from_db()
+        self.assertIsNone(review_item.suggested_payment)
+
+
+class OccupancyRepairTests(TestCase):
+    """Unit.resident is authoritative; unit status and resident unit numbers follow it"""
+
+    def test_repair(self):
+        def resident(unit_number, status='active'):
+            return Resident.objects.create(
+                user=User.objects.create_user(username=f'tenant{unit_number}{status}'),
+                unit_number=unit_number, phone='0700000000', move_in_date=date(2025, 1, 1), status=status
+            )
+
+        renamed = resident('1O1')
+        Unit.objects.create(unit_number='101', status='vacant', resident=renamed)
+        Unit.objects.create(unit_number='102', status='occupied', resident=resident('102', 'moved_out'))
+        Unit.objects.create(unit_number='103', status='vacant')
+        unlinked = resident('103')
+        Unit.objects.create(unit_number='104', status='occupied')
+
+        expected = {'moved_out': 1, 'unlinked': 1, 'unit_number': 1, 'not_occupied': 1, 'not_vacant': 1}
+        self.assertEqual(repair_occupancy(dry_run=True), expected)
+        self.assertEqual(repair_occupancy(), expected)
+        self.assertEqual(set(repair_occupancy(dry_run=True).values()), {0})
+
+        self.assertEqual(
+            list(Unit.objects.order_by('unit_number').values_list('unit_number', 'status', 'resident')),
+            [('101', 'occupied', renamed.pk), ('102', 'vacant', None), ('103', 'occupied', unlinked.pk), ('104', 'vacant', None)]
+        )
+        renamed.refresh_from_db()
+        self.assertEqual(renamed.unit_number, '101')
+        self.assertEqual(
+            list(filter_residents(Resident.objects.all(), {'search': '101'}).values_list('pk', flat=True)),
+            [renamed.pk]
+        )
+        self.assertEqual(list(Resident.objects.filter(status='active').unassigned()), [])
+
+    def test_assign_view_leaves_no_drift(self):
+        self.client.force_login(User.objects.create_user(username='admin'))
+        first, second = [
+            Resident.objects.create(
+                user=User.objects.create_user(username=f'tenant{i}'),
+                unit_number='101', phone='0700000000', move_in_date=date(2025, 1, 1)
+            )
+            for i in range(2)
+        ]
+        unit = Unit.objects.create(unit_number='101', status='occupied', resident=first, rent_amount=10000)
+
+        self.client.post(reverse('assign_tenant_to_unit', args=[unit.pk]), {'resident_id': second.pk})
+        self.client.post(reverse('assign_tenant_to_unit', args=[unit.pk]), {'resident_id': ''})
+
+        self.assertEqual(dict(Resident.objects.values_list('pk', 'unit_number')), {first.pk: '', second.pk: ''})
+        self.assertEqual(set(repair_occupancy(dry_run=True).values()), {0})
+
+
+class OccupancySnapshotTests(TestCase):
+    """Daily snapshots are aggregated per unit type and floor, and served by range"""
+
+    def test_snapshots(self):
+        resident = Resident.objects.create(
+            user=User.objects.create_user(username='jane'), unit_number='101', phone='0700000000', move_in_date=date(2025, 1, 1)
+        )
+        occupied = Unit.objects.create(unit_number='101', unit_type='1br', floor=1, rent_amount=10000, status='occupied', resident=resident)
+        Unit.objects.create(unit_number='102', unit_type='1br', floor=1, rent_amount=12000, status='vacant')
+        Unit.objects.create(unit_number='201', unit_type='2br', floor=2, rent_amount=20000, status='maintenance')
+        for month, amount_paid in [('March 2026', 4000), ('February 2026', 10000)]:
+            Payment.objects.create(resident=resident, month=month, amount=10000, amount_paid=amount_paid, due_date=date(2026, 3, 5))
+
+        self.assertEqual(take_occupancy_snapshot(date(2026, 3, 1)), 2)
+        occupied.status = 'vacant'
+        occupied.save()
+        take_occupancy_snapshot(date(2026, 3, 2))
+        self.assertEqual(take_occupancy_snapshot(date(2026, 3, 2)), 2)
+
+        self.client.force_login(resident.user)
+        series = self.client.get(reverse('api:occupancy'), {'from': '2026-03-01', 'to': '2026-03-31'}).json()['results']
+        self.assertEqual(
+            [(row['date'], row['occupied'], row['vacant'], row['maintenance'], row['occupancy_rate']) for row in series],
+            [('2026-03-01', 1, 1, 1, 33.3), ('2026-03-02', 0, 2, 1, 0)]
+        )
+        self.assertEqual((Decimal(series[0]['expected_rent']), Decimal(series[0]['collected_rent'])), (10000, 4000))
+
+        by_floor = self.client.get(reverse('api:occupancy'), {'from': '2026-03-01', 'to': '2026-03-01', 'group': 'floor'}).json()
+        self.assertEqual([(row['floor'], row['occupied']) for row in by_floor['results']], [(1, 1), (2, 0)])
+        self.assertEqual(self.client.get(reverse('api:occupancy'), {'group': 'tenant'}).status_code, 400)
+
+
+class RowFragmentCacheTests(TestCase):
+    """List rows are cached per object and re-rendered when it is saved"""
+
+    def setUp(self):
+        caches['template_fragments'].clear()
+        self.user = User.objects.create_user(username='admin', password='secret')
+        self.client.force_login(self.user)
+
+    def test_tenant_row(self):
+        resident = Resident.objects.create(
+            user=User.objects.create_user(username='jane', first_name='Jane', last_name='Doe'),
+            unit_number='101', phone='0700000001', move_in_date=date(2025, 1, 1)
+        )
+        self.assertContains(self.client.get(reverse('tenants')), '0700000001')
+
+        # A set-based change that leaves updated_at alone keeps the cached row
+        Resident.objects.filter(pk=resident.pk).update(phone='0700000002')
+        self.assertContains(self.client.get(reverse('tenants')), '0700000001')
+
+        resident.phone = '0700000003'
+        resident.save()
+        self.assertContains(self.client.get(reverse('tenants')), '0700000003')
+
+        # Names live on the user, whose save touches the resident
+        resident.user.first_name = 'Janet'
+        resident.user.save()
+        self.assertContains(self.client.get(reverse('tenants')), 'Janet Doe')
@@ -8,10 +8,13 @@ urlpatterns = [
     path('logout/', views.logout_view, name='logout'),
     path('tenants/', views.tenants_view, name='tenants'),
     path('tenants/add/', views.add_tenant_view, name='add_tenant'),
+    path('tenants/import/', views.import_tenants_view, name='import_tenants'),
+    path('tenants/arrears/', views.arrears_view, name='arrears'),
     path('tenants/edit/<int:resident_id>/', views.edit_tenant_view, name='edit_tenant'),
     path('tenants/delete/<int:resident_id>/', views.delete_tenant_view, name='delete_tenant'),
     path('parking/', views.parking_view, name='parking'),
     path('parking/assign/', views.assign_parking_view, name='assign_parking'),
+    path('parking/allocate/', views.allocate_parking_view, name='allocate_parking'),
     path('parking/unassign/<int:slot_id>/', views.unassign_parking_view, name='unassign_parking'),
     path('subcontractors/', views.subcontractors_view, name='subcontractors'),
     path('subcontractors/add/', views.add_subcontractor_view, name='add_subcontractor'),
@@ -20,13 +23,19 @@ urlpatterns = [
     path('rent/', views.rent_collection_view, name='rent_collection'),
     path('rent/record/<int:payment_id>/', views.record_payment_view, name='record_payment'),
     path('rent/generate/', views.generate_invoices_view, name='generate_invoices'),
+    path('rent/export/', views.export_payments_view, name='export_payments'),
+    path('rent/mpesa/', views.reconcile_mpesa_view, name='reconcile_mpesa'),
+    path('rent/mpesa/review/<int:item_id>/', views.resolve_mpesa_review_view, name='resolve_mpesa_review'),
     path('services/', views.services_view, name='services'),
     path('services/create/', views.create_work_order_view, name='create_work_order'),
+    path('services/export/', views.export_work_orders_view, name='export_work_orders'),
+    path('services/dispatch/', views.dispatch_work_orders_view, name='dispatch_work_orders'),
     path('services/update/<int:order_id>/', views.update_work_order_view, name='update_work_order'),
     path('services/delete/<int:order_id>/', views.delete_work_order_view, name='delete_work_order'),
     path('building/', views.building_view, name='building'),
     path('building/create/', views.create_unit_view, name='create_unit'),
     path('building/update/<int:unit_id>/', views.update_unit_view, name='update_unit'),
     path('building/assign/<int:unit_id>/', views.assign_tenant_to_unit_view, name='assign_tenant_to_unit'),
-    path('building/delete/<int:unit_id>/', views.delete_unit_view, name='delete_unit')
+    path('building/delete/<int:unit_id>/', views.delete_unit_view, name='delete_unit'),
+    path('stats/cache/', views.stats_cache_view, name='stats_cache'),
 ]
\ No newline at end of file
@@ -2,14 +2,36 @@ from django.shortcuts import render, redirect
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth import authenticate, login, logout
 from django.contrib import messages
-from .models import Resident, Payment, Request, WorkOrder, Unit, ParkingSlot, Subcontractor
-from django.db.models import Count, Q, Max
+from .models import Resident, Payment, Request, WorkOrder, Unit, ParkingSlot, Subcontractor, MpesaReviewItem
+from .stats import (
+    dashboard_stats, tenant_stats, parking_stats, services_stats,
+    building_stats, subcontractor_stats, cache_info,
+    arrears_report, ARREARS_BUCKETS
+)
+from .pagination import paginate
+from .invoices import generate_invoices, invoice_period
+from .filters import (
+    filter_residents, filter_parking_slots, filter_subcontractors,
+    filter_payments, filter_work_orders, filter_units
+)
+from .summaries import month_summary
+from .exports import iter_csv, xlsx_file, XLSX_CONTENT_TYPE
+from .dispatch import auto_assign, dispatch_backlog
+from .ledger import record_transaction
+from .move_out import move_out
+from .mpesa import reconcile_statement, resolve_review_item
+from .parking import allocate_parking
+from .sequences import next_work_order_id
+from .tenant_import import import_tenants, taken_usernames, unique_username
+from django.db import transaction
+from django.db.models import Count, Q, Sum
 from datetime import date, datetime
 from django.contrib.auth.models import User
-from django.http import JsonResponse
-from django.db.models import Q, Sum
+from django.http import JsonResponse, StreamingHttpResponse, FileResponse
+from django.utils import timezone
 from dateutil.relativedelta import relativedelta
 from decimal import Decimal
+import io
 
 @login_required
 def dashboard_view(request):
@@ -20,56 +42,30 @@ def dashboard_view(request):
         messages.error(request, "Resident profile not found")
         return redirect('login')
     
-    # Get payment summary
+    # Get payment summary and statistics (one grouped query per model)
     current_month = date.today().month
-    payments = Payment.objects.filter(
-        resident=resident,
-        due_date__month=current_month
-    )
-    
-    payment_summary = {
-        'rent': payments.filter(payment_type='rent').first(),
-        'additional': payments.filter(payment_type='additional').first(),
-        'maintenance': payments.filter(payment_type='maintenance').first(),
-        'debt': payments.filter(payment_type='debt').first(),
-    }
+    dashboard = dashboard_stats(resident, current_month)
     
     # Get new requests
     new_requests = Request.objects.filter(
         status='pending'
     ).order_by('-created_at')[:3]
     
-    # Get delayed work orders
+    # Get delayed work orders (status and days_late are kept current by refresh_work_order_lateness)
     delayed_orders = WorkOrder.objects.filter(
         status='delayed'
     ).order_by('-days_late')[:3]
     
-    # Get statistics
-    stats = {
-        'total_residents': Resident.objects.filter(is_active=True).count(),
-        'total_units': Unit.objects.count(),
-        'vacant_units': Unit.objects.filter(status='vacant').count(),
-        'upcoming_units': Unit.objects.filter(status='upcoming').count(),
-    }
-    
-    # Get work order statistics
-    work_order_stats = {
-        'new': WorkOrder.objects.filter(status='new').count(),
-        'open': WorkOrder.objects.filter(status='open').count(),
-        'in_progress': WorkOrder.objects.filter(status='in_progress').count(),
-        'delayed': WorkOrder.objects.filter(status='delayed').count(),
-    }
-    
     # Get upcoming units
     upcoming_units = Unit.objects.filter(status='vacant')[:3]
     
     context = {
         'resident': resident,
-        'payment_summary': payment_summary,
+        'payment_summary': dashboard['payment_summary'],
         'new_requests': new_requests,
         'delayed_orders': delayed_orders,
-        'stats': stats,
-        'work_order_stats': work_order_stats,
+        'stats': dashboard['stats'],
+        'work_order_stats': dashboard['work_order_stats'],
         'upcoming_units': upcoming_units,
     }
     
@@ -109,51 +105,46 @@ def tenants_view(request):
     filter_status = request.GET.get('status', 'all')
     search_query = request.GET.get('search', '')
     
-    # Filter by status
-    if filter_status == 'active':
-        residents = all_residents.filter(status='active')
-    elif filter_status == 'pending':
-        residents = all_residents.filter(status='pending')
-    elif filter_status == 'moved_out':
-        residents = all_residents.filter(status='moved_out')
-    else:
-        residents = all_residents
-    
-    # Search functionality
-    if search_query:
-        residents = residents.filter(
-            Q(user__first_name__icontains=search_query) |
-            Q(user__last_name__icontains=search_query) |
-            Q(unit_number__icontains=search_query) |
-            Q(phone__icontains=search_query)
-        )
+    # Filter by status and search
+    residents = filter_residents(all_residents, request.GET)
     
-    # Calculate stats
-    stats = {
-        'total': all_residents.count(),
-        'active': all_residents.filter(status='active').count(),
-        'pending': all_residents.filter(status='pending').count(),
-        'moved_out': all_residents.filter(status='moved_out').count(),
-    }
+    # Calculate stats, including the overdue payments count
+    stats = tenant_stats()
     
-    # Get overdue payments count
-    from datetime import date
-    current_month = date.today().month
-    overdue = Payment.objects.filter(
-        due_date__month__lt=current_month,
-        paid=False
-    ).values('resident').distinct().count()
+    # Paginate newest tenants first
+    page = paginate(request, residents, ['-id'])
     
     context = {
-        'residents': residents,
+        'residents': page.object_list,
+        'page': page,
         'stats': stats,
-        'overdue': overdue,
+        'overdue': stats['overdue'],
         'filter_status': filter_status,
         'search_query': search_query,
     }
     
     return render(request, 'dashboard/tenants.html', context)
 
+@login_required
+def arrears_view(request):
+    # Get the aging report, cached for the day until a payment changes
+    report = arrears_report()
+    
+    # Optionally only show residents with a balance in one bucket
+    filter_bucket = request.GET.get('bucket', 'all')
+    residents = report['residents']
+    if filter_bucket in ARREARS_BUCKETS:
+        residents = [row for row in residents if row[filter_bucket] > 0]
+    
+    context = {
+        'residents': residents,
+        'totals': report['totals'],
+        'as_of': report['as_of'],
+        'filter_bucket': filter_bucket,
+    }
+    
+    return render(request, 'dashboard/arrears.html', context)
+
 @login_required
 def add_tenant_view(request):
     if request.method == 'POST':
@@ -168,15 +159,9 @@ def add_tenant_view(request):
             move_in_date = request.POST.get('move_in_date')
             status = request.POST.get('status', 'active')
             
-            # Create username from name
+            # Create username from name, adding a number if it is taken
             username = f"{first_name.lower()}.{last_name.lower()}"
-            
-            # Check if username exists, add number if needed
-            base_username = username
-            counter = 1
-            while User.objects.filter(username=username).exists():
-                username = f"{base_username}{counter}"
-                counter += 1
+            username = unique_username(username, taken_usernames(username))
             
             # Create user
             user = User.objects.create_user(
@@ -206,6 +191,31 @@ def add_tenant_view(request):
     
     return redirect('tenants')
 
+@login_required
+def import_tenants_view(request):
+    """Create tenants in bulk from an uploaded CSV file"""
+    if request.method == 'POST':
+        csv_file = request.FILES.get('csv_file')
+        if not csv_file:
+            messages.error(request, 'Choose a CSV file to import')
+            return redirect('tenants')
+        
+        try:
+            lines = io.TextIOWrapper(csv_file, encoding='utf-8-sig')
+            result = import_tenants(lines)
+        except Exception as e:
+            messages.error(request, f'Error importing tenants: {str(e)}')
+            return redirect('tenants')
+        
+        if result.created:
+            messages.success(request, f'Successfully imported {result.created} tenants')
+        for line, error in result.errors[:10]:
+            messages.error(request, f'Line {line}: {error}')
+        if len(result.errors) > 10:
+            messages.error(request, f'...and {len(result.errors) - 10} more rows with errors')
+    
+    return redirect('tenants')
+
 @login_required
 def edit_tenant_view(request, resident_id):
     if request.method == 'POST':
@@ -224,17 +234,14 @@ def edit_tenant_view(request, resident_id):
             resident.unit_number = request.POST.get('unit_number')
             resident.monthly_rent = request.POST.get('monthly_rent')
             resident.move_in_date = request.POST.get('move_in_date')
-            resident.status = request.POST.get('status')
+            new_status = request.POST.get('status')
+            moving_out = old_status != 'moved_out' and new_status == 'moved_out'
+            resident.status = old_status if moving_out else new_status
             resident.save()
 
-            # Auto-unassign parking if tenant moved out
-            if old_status != 'moved_out' and resident.status == 'moved_out':
-            # Unassign all parking slots for this resident
-                ParkingSlot.objects.filter(resident=resident).update(
-                    resident=None,
-                    status='available',
-                    assigned_date=None
-    )
+            # Free the tenant's parking, unit and future invoices if they moved out
+            if moving_out:
+                move_out([resident.pk])
             
             messages.success(request, f'Successfully updated {resident.user.get_full_name()}!')
             return redirect('tenants')
@@ -276,27 +283,11 @@ def parking_view(request):
     filter_status = request.GET.get('status', 'all')
     search_query = request.GET.get('search', '')
     
-    # Filter by status
-    if filter_status == 'assigned':
-        slots = all_slots.filter(status='assigned')
-    elif filter_status == 'available':
-        slots = all_slots.filter(status='available')
-    else:
-        slots = all_slots
-    
-    # Search
-    if search_query:
-        slots = slots.filter(
-            Q(slot_number__icontains=search_query) |
-            Q(resident__unit_number__icontains=search_query)
-        )
+    # Filter by status and search
+    slots = filter_parking_slots(all_slots, request.GET)
     
     # Calculate stats
-    stats = {
-        'total': all_slots.count(),
-        'assigned': all_slots.filter(status='assigned').count(),
-        'available': all_slots.filter(status='available').count(),
-    }
+    stats = parking_stats()
     
     # Parking rules
     parking_rules = [
@@ -316,8 +307,12 @@ def parking_view(request):
     # Get available slots for assignment dropdown
     available_slots = all_slots.filter(status='available').order_by('slot_number')
     
+    # Paginate slots in the same order as the full list
+    page = paginate(request, slots, ['-assigned_date', 'slot_number'])
+    
     context = {
-        'slots': slots,
+        'slots': page.object_list,
+        'page': page,
         'stats': stats,
         'filter_status': filter_status,
         'search_query': search_query,
@@ -361,6 +356,33 @@ def assign_parking_view(request):
     return redirect('parking')
 
 
+@login_required
+def allocate_parking_view(request):
+    """Re-allocate every unit's slots to its active resident, or preview the changes"""
+    if request.method == 'POST':
+        dry_run = request.POST.get('dry_run') == '1'
+        try:
+            plan = allocate_parking(dry_run=dry_run)
+        except Exception as e:
+            messages.error(request, f'Error allocating parking: {str(e)}')
+            return redirect('parking')
+        
+        summary = f'{len(plan.assigned)} slots assigned, {len(plan.released)} released, {plan.unchanged} unchanged'
+        if dry_run:
+            messages.info(request, f'Preview: {summary}')
+            for change in plan.changes[:10]:
+                action = f'assign to the tenant of Unit {change.unit_number}' if change.new_resident_id else 'release'
+                messages.info(request, f'{change.slot_number}: {action}')
+            if len(plan.changes) > 10:
+                messages.info(request, f'...and {len(plan.changes) - 10} more changes')
+        else:
+            messages.success(request, f'Parking re-allocated: {summary}')
+        if plan.units_without_slots:
+            messages.warning(request, f'{len(plan.units_without_slots)} occupied units have no parking slots')
+    
+    return redirect('parking')
+
+
 @login_required
 def unassign_parking_view(request, slot_id):
     try:
@@ -385,48 +407,26 @@ def unassign_parking_view(request, slot_id):
     
 @login_required
 def subcontractors_view(request):
-    # Get all subcontractors
-    all_subcontractors = Subcontractor.objects.order_by('-id')
+    # Get all subcontractors with their work order counts
+    all_subcontractors = Subcontractor.objects.with_work_order_stats().order_by('-id')
     
     # Get filter and search
     filter_category = request.GET.get('category', 'all')
     filter_status = request.GET.get('status', 'all')
     search_query = request.GET.get('search', '')
     
-    # Filter by category
-    if filter_category != 'all':
-        subcontractors = all_subcontractors.filter(category=filter_category)
-    else:
-        subcontractors = all_subcontractors
-    
-    # Filter by status
-    if filter_status == 'active':
-        subcontractors = subcontractors.filter(status='active')
-    elif filter_status == 'inactive':
-        subcontractors = subcontractors.filter(status='inactive')
-    
-    # Search functionality
-    if search_query:
-        subcontractors = subcontractors.filter(
-            Q(name__icontains=search_query) |
-            Q(company_name__icontains=search_query) |
-            Q(phone__icontains=search_query) |
-            Q(email__icontains=search_query)
-        )
+    # Filter by category and status, then search
+    subcontractors = filter_subcontractors(all_subcontractors, request.GET)
     
     # Calculate stats
-    stats = {
-        'total': all_subcontractors.count(),
-        'active': all_subcontractors.filter(status='active').count(),
-        'inactive': all_subcontractors.filter(status='inactive').count(),
-        'work_orders': sum([s.active_work_orders_count() for s in all_subcontractors]),
-    }
+    stats = subcontractor_stats()
     
     # Order by name
-    subcontractors = subcontractors.order_by('name')
+    page = paginate(request, subcontractors, ['name'])
     
     context = {
-        'subcontractors': subcontractors,
+        'subcontractors': page.object_list,
+        'page': page,
         'stats': stats,
         'filter_category': filter_category,
         'filter_status': filter_status,
@@ -522,48 +522,23 @@ def rent_collection_view(request):
     
     # Get current month for stats
     current_month = date.today().strftime('%B %Y')
-    current_month_payments = all_payments.filter(month=current_month)
     
     # Get filter parameters
     filter_status = request.GET.get('status', 'all')
     search_query = request.GET.get('search', '')
     
     # Apply filters
-    payments = all_payments
-    
-    if filter_status != 'all':
-        payments = payments.filter(status=filter_status)
-    
-    if search_query:
-        payments = payments.filter(
-            Q(resident__user__first_name__icontains=search_query) |
-            Q(resident__user__last_name__icontains=search_query) |
-            Q(resident__unit_number__icontains=search_query) |
-            Q(transaction_code__icontains=search_query)
-        )
+    payments = filter_payments(all_payments, request.GET)
     
-    # Calculate statistics
-    total_expected = current_month_payments.aggregate(Sum('amount'))['amount__sum'] or 0
-    total_collected = current_month_payments.aggregate(Sum('amount_paid'))['amount_paid__sum'] or 0
-    
-    stats = {
-        'total_expected': total_expected,
-        'total_collected': total_collected,
-        'total_balance': total_expected - total_collected,
-        'paid_count': current_month_payments.filter(status='paid').count(),
-        'pending_count': current_month_payments.filter(status='pending').count(),
-        'overdue_count': current_month_payments.filter(status='overdue').count(),
-        'partial_count': current_month_payments.filter(status='partial').count(),
-    }
+    # Statistics come from the pre-aggregated month summary
+    stats = month_summary(current_month).as_stats()
     
-    # Calculate collection rate
-    if stats['total_expected'] > 0:
-        stats['collection_rate'] = round((stats['total_collected'] / stats['total_expected']) * 100, 1)
-    else:
-        stats['collection_rate'] = 0
+    # Paginate latest invoices first
+    page = paginate(request, payments, ['-due_date', 'resident__unit_number'])
     
     context = {
-        'payments': payments.order_by('-due_date', 'resident__unit_number'),
+        'payments': page.object_list,
+        'page': page,
         'stats': stats,
         'filter_status': filter_status,
         'search_query': search_query,
@@ -577,21 +552,22 @@ def rent_collection_view(request):
 def record_payment_view(request, payment_id):
     if request.method == 'POST':
         try:
-            payment = Payment.objects.get(id=payment_id)
-            
             amount_paid = Decimal(request.POST.get('amount_paid'))
             payment_method = request.POST.get('payment_method')
             transaction_code = request.POST.get('transaction_code', '')
             payment_date = request.POST.get('payment_date')
             notes = request.POST.get('notes', '')
             
-            # Update payment
-            payment.amount_paid += amount_paid
-            payment.payment_method = payment_method
-            payment.transaction_code = transaction_code
-            payment.paid_date = payment_date
-            payment.notes = notes
-            payment.save()  # This will auto-update status
+            # Append to the ledger and update the balance and status atomically
+            record_transaction(
+                payment_id,
+                amount_paid,
+                payment_method=payment_method,
+                transaction_code=transaction_code,
+                paid_date=payment_date or None,
+                notes=notes,
+                recorded_by=request.user
+            )
             
             messages.success(request, f'Payment of Ksh.{amount_paid} recorded successfully!')
             return redirect('rent_collection')
@@ -610,34 +586,11 @@ def generate_invoices_view(request):
     if request.method == 'POST':
         try:
             # Get next month
-            from datetime import datetime
-            from dateutil.relativedelta import relativedelta
-            
             next_month_date = date.today() + relativedelta(months=1)
-            month_str = next_month_date.strftime('%B %Y')
-            due_date = next_month_date.replace(day=5)
-            
-            # Get all active residents
-            active_residents = Resident.objects.filter(status='active')
-            
-            created_count = 0
-            for resident in active_residents:
-                # Check if payment already exists for this month
-                if not Payment.objects.filter(
-                    resident=resident, 
-                    month=month_str,
-                    payment_type='rent'
-                ).exists():
-                    Payment.objects.create(
-                        resident=resident,
-                        month=month_str,
-                        amount=resident.monthly_rent,
-                        amount_paid=0,
-                        payment_type='rent',
-                        due_date=due_date,
-                        status='pending'
-                    )
-                    created_count += 1
+            month_str, _ = invoice_period(next_month_date)
+            
+            # Create any missing invoices in one batch
+            created_count = generate_invoices(next_month_date)
             
             messages.success(request, f'Successfully generated {created_count} invoices for {month_str}')
             return redirect('rent_collection')
@@ -647,6 +600,100 @@ def generate_invoices_view(request):
     
     return redirect('rent_collection')
 
+
+@login_required
+def reconcile_mpesa_view(request):
+    """Match an uploaded M-Pesa statement against open invoices"""
+    if request.method == 'POST':
+        statement = request.FILES.get('statement')
+        if not statement:
+            messages.error(request, 'Choose an M-Pesa statement to upload')
+            return redirect('rent_collection')
+        
+        try:
+            result = reconcile_statement(io.TextIOWrapper(statement, encoding='utf-8-sig'))
+        except Exception as e:
+            messages.error(request, f'Error reconciling statement: {str(e)}')
+            return redirect('rent_collection')
+        
+        queued = sum(result.queued.values())
+        messages.success(
+            request,
+            f'Matched {result.matched} M-Pesa transactions, {queued} queued for review, '
+            f'{result.duplicates} already recorded'
+        )
+        for line, error in result.errors[:10]:
+            messages.error(request, f'Line {line}: {error}')
+    
+    return redirect('rent_collection')
+
+
+@login_required
+def resolve_mpesa_review_view(request, item_id):
+    """Apply a queued M-Pesa transaction to an invoice, or ignore it"""
+    if request.method == 'POST':
+        try:
+            item = MpesaReviewItem.objects.get(id=item_id, status='open')
+            
+            if request.POST.get('action') == 'ignore':
+                item.status = 'ignored'
+                item.save(update_fields=['status'])
+                messages.success(request, f'Ignored M-Pesa transaction {item.receipt_no}')
+            else:
+                payment_id = request.POST.get('payment_id') or item.suggested_payment_id
+                if not payment_id:
+                    messages.error(request, 'Choose the invoice this transaction pays')
+                    return redirect('rent_collection')
+                resolve_review_item(item, int(payment_id), recorded_by=request.user)
+                messages.success(request, f'Recorded M-Pesa transaction {item.receipt_no}')
+            
+        except MpesaReviewItem.DoesNotExist:
+            messages.error(request, 'Review item not found')
+        except Exception as e:
+            messages.error(request, f'Error resolving transaction: {str(e)}')
+    
+    return redirect('rent_collection')
+
+
+def export_response(request, name, redirect_to):
+    """
+    Stream an export as CSV, or send it as XLSX with ?format=xlsx.
+
+    CSV rows are streamed as they are fetched. XLSX is a zip archive that
+    is only complete once saved, so the workbook is written to a temporary
+    file on disk first and then sent from there in blocks.
+    """
+    filename = f'{name}-{date.today().isoformat()}'
+    
+    if request.GET.get('format') == 'xlsx':
+        try:
+            output = xlsx_file(name, request.GET)
+        except RuntimeError as e:
+            messages.error(request, str(e))
+            return redirect(redirect_to)
+        return FileResponse(
+            output,
+            as_attachment=True,
+            filename=f'{filename}.xlsx',
+            content_type=XLSX_CONTENT_TYPE
+        )
+    
+    response = StreamingHttpResponse(iter_csv(name, request.GET), content_type='text/csv')
+    response['Content-Disposition'] = f'attachment; filename="{filename}.csv"'
+    return response
+
+
+@login_required
+def export_payments_view(request):
+    """Rent ledger export, filtered like the rent collection page"""
+    return export_response(request, 'payments', 'rent_collection')
+
+
+@login_required
+def export_work_orders_view(request):
+    """Work order export, filtered like the services page"""
+    return export_response(request, 'work_orders', 'services')
+
 @login_required
 def services_view(request):
     # Get all work orders
@@ -659,44 +706,23 @@ def services_view(request):
     search_query = request.GET.get('search', '')
     
     # Apply filters
-    work_orders = all_work_orders
-    
-    if filter_status != 'all':
-        work_orders = work_orders.filter(status=filter_status)
-    
-    if filter_priority != 'all':
-        work_orders = work_orders.filter(priority=filter_priority)
-    
-    if filter_category != 'all':
-        work_orders = work_orders.filter(category=filter_category)
-    
-    if search_query:
-        work_orders = work_orders.filter(
-            Q(order_id__icontains=search_query) |
-            Q(title__icontains=search_query) |
-            Q(unit_number__icontains=search_query) |
-            Q(description__icontains=search_query)
-        )
+    work_orders = filter_work_orders(all_work_orders, request.GET)
     
     # Calculate statistics
-    stats = {
-        'total': all_work_orders.count(),
-        'new': all_work_orders.filter(status='new').count(),
-        'open': all_work_orders.filter(status='open').count(),
-        'in_progress': all_work_orders.filter(status='in_progress').count(),
-        'completed': all_work_orders.filter(status='completed').count(),
-        'delayed': all_work_orders.filter(status='delayed').count(),
-        'urgent': all_work_orders.filter(priority='urgent').count(),
-    }
+    stats = services_stats()
     
     # Get available contractors
     contractors = Subcontractor.objects.filter(status='active')
     
     # Get available units
-    residents = Resident.objects.filter(status='active')
+    residents = Resident.objects.filter(status='active').select_related('user')
+    
+    # Paginate newest work orders first
+    page = paginate(request, work_orders, ['-created_at'])
     
     context = {
-        'work_orders': work_orders.order_by('-created_at'),
+        'work_orders': page.object_list,
+        'page': page,
         'stats': stats,
         'filter_status': filter_status,
         'filter_priority': filter_priority,
@@ -713,11 +739,8 @@ def services_view(request):
 def create_work_order_view(request):
     if request.method == 'POST':
         try:
-            # Generate unique order ID
-            import random
-            order_id = f"WO-{random.randint(1000, 9999)}"
-            while WorkOrder.objects.filter(order_id=order_id).exists():
-                order_id = f"WO-{random.randint(1000, 9999)}"
+            # Reserve the next order ID
+            order_id = next_work_order_id()
             
             title = request.POST.get('title')
             description = request.POST.get('description')
@@ -729,7 +752,9 @@ def create_work_order_view(request):
             
             # Get contractor and resident
             contractor = None
-            if contractor_id:
+            if contractor_id == 'auto':
+                contractor = auto_assign(category)
+            elif contractor_id:
                 contractor = Subcontractor.objects.get(id=contractor_id)
             
             resident = Resident.objects.filter(unit_number=unit_number).first()
@@ -748,6 +773,8 @@ def create_work_order_view(request):
                 status='new'
             )
             
+            if contractor_id == 'auto' and contractor is None:
+                messages.warning(request, f'No active contractor for {work_order.get_category_display()}; {order_id} is unassigned')
             messages.success(request, f'Work order {order_id} created successfully!')
             return redirect('services')
             
@@ -757,6 +784,23 @@ def create_work_order_view(request):
     return redirect('services')
 
 
+@login_required
+def dispatch_work_orders_view(request):
+    """Assign every unassigned open work order to the least loaded contractor"""
+    if request.method == 'POST':
+        try:
+            assignments = dispatch_backlog()
+            assigned_count = sum(len(ids) for ids in assignments.values())
+            messages.success(
+                request,
+                f'Dispatched {assigned_count} work orders to {len(assignments)} contractors'
+            )
+        except Exception as e:
+            messages.error(request, f'Error dispatching work orders: {str(e)}')
+    
+    return redirect('services')
+
+
 @login_required
 def update_work_order_view(request, order_id):
     if request.method == 'POST':
@@ -780,6 +824,10 @@ def update_work_order_view(request, order_id):
             if cost:
                 work_order.cost = cost
             
+            # A status set by hand replaces the one the lateness job delayed the order from
+            if work_order.status != 'delayed':
+                work_order.status_before_delay = ''
+
             # If status is completed, set completed_date
             if work_order.status == 'completed' and not work_order.completed_date:
                 work_order.completed_date = date.today()
@@ -825,52 +873,20 @@ def building_view(request):
     search_query = request.GET.get('search', '')
     
     # Apply filters
-    units = all_units
+    units = filter_units(all_units, request.GET)
     
-    if filter_status != 'all':
-        units = units.filter(status=filter_status)
+    # Calculate statistics, occupancy rate and total floors
+    stats = building_stats()
     
-    if filter_type != 'all':
-        units = units.filter(unit_type=filter_type)
+    # Get active residents without a unit for assignment
+    available_residents = Resident.objects.filter(status='active').unassigned().select_related('user')
     
-    if search_query:
-        units = units.filter(
-            Q(unit_number__icontains=search_query) |
-            Q(resident__user__first_name__icontains=search_query) |
-            Q(resident__user__last_name__icontains=search_query)
-        )
-    
-    # Calculate statistics
-    total_units = all_units.count()
-    occupied_units = all_units.filter(status='occupied').count()
-    vacant_units = all_units.filter(status='vacant').count()
-    maintenance_units = all_units.filter(status='maintenance').count()
-    
-    # Calculate occupancy rate
-    occupancy_rate = 0
-    if total_units > 0:
-        occupancy_rate = round((occupied_units / total_units) * 100, 1)
-    
-    # Get total floors
-    total_floors = all_units.aggregate(Max('floor'))['floor__max'] or 0
-    
-    # Get available residents for assignment
-    available_residents = Resident.objects.filter(
-    is_active=True,  # or status='active' if that's your field
-    unit_number__in=['', None]  # tenants with no unit assigned
-).select_related('user')
-    
-    stats = {
-        'total_units': total_units,
-        'occupied': occupied_units,
-        'vacant': vacant_units,
-        'maintenance': maintenance_units,
-        'occupancy_rate': occupancy_rate,
-        'total_floors': total_floors,
-    }
+    # Paginate units by unit number
+    page = paginate(request, units, ['unit_number'])
     
     context = {
-        'units': units.order_by('unit_number'),
+        'units': page.object_list,
+        'page': page,
         'stats': stats,
         'filter_status': filter_status,
         'filter_type': filter_type,
@@ -947,35 +963,45 @@ def assign_tenant_to_unit_view(request, unit_id):
             unit = Unit.objects.get(id=unit_id)
             resident_id = request.POST.get('resident_id')
             
-            if resident_id:
-                resident = Resident.objects.get(id=resident_id)
-                
-                # Unassign any previous unit for this resident
-                if hasattr(resident, 'assigned_unit') and resident.assigned_unit:
-                    old_unit = resident.assigned_unit
-                    old_unit.resident = None
-                    old_unit.status = 'vacant'
-                    old_unit.save()
-                
-                # Assign to new unit
-                unit.resident = resident
-                unit.status = 'occupied'
-                
-                # Update resident's unit_number
-                resident.unit_number = unit.unit_number
-                resident.monthly_rent = unit.rent_amount
-                resident.save()
-                
-                unit.save()
-                
-                messages.success(request, f'{resident.user.get_full_name()} assigned to Unit {unit.unit_number}!')
-            else:
-                # Unassign tenant
-                if unit.resident:
-                    unit.resident = None
-                    unit.status = 'vacant'
+            # Unit.resident is the occupancy link; Resident.unit_number follows it
+            with transaction.atomic():
+                if resident_id:
+                    resident = Resident.objects.get(id=resident_id)
+                    
+                    # Unassign any previous unit for this resident
+                    Unit.objects.filter(resident=resident).exclude(pk=unit.pk).update(
+                        resident=None, status='vacant', updated_at=timezone.now()
+                    )
+                    
+                    # The previous occupant no longer lives here
+                    previous = unit.resident
+                    if previous and previous.pk != resident.pk:
+                        previous.unit_number = ''
+                        previous.save()
+                    
+                    # Assign to new unit
+                    unit.resident = resident
+                    unit.status = 'occupied'
+                    
+                    # Update resident's unit_number
+                    resident.unit_number = unit.unit_number
+                    resident.monthly_rent = unit.rent_amount
+                    resident.save()
+                    
                     unit.save()
-                    messages.success(request, f'Unit {unit.unit_number} is now vacant')
+                    
+                    messages.success(request, f'{resident.user.get_full_name()} assigned to Unit {unit.unit_number}!')
+                else:
+                    # Unassign tenant
+                    if unit.resident:
+                        previous = unit.resident
+                        unit.resident = None
+                        unit.status = 'vacant'
+                        unit.save()
+                        
+                        previous.unit_number = ''
+                        previous.save()
+                        messages.success(request, f'Unit {unit.unit_number} is now vacant')
             
             return redirect('building')
             
@@ -1004,4 +1030,10 @@ def delete_unit_view(request, unit_id):
     except Exception as e:
         messages.error(request, f'Error deleting unit: {str(e)}')
     
-    return redirect('building')
\ No newline at end of file
+    return redirect('building')
+
+
+@login_required
+def stats_cache_view(request):
+    """Hit and miss counters of the stats cache for this worker process"""
+    return JsonResponse({'groups': cache_info()})
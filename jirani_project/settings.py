@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -48,8 +49,20 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'dashboard.middleware.QueryBudgetMiddleware',
 ]
 
+# Per-request SQL query budget, see dashboard.middleware.QueryBudgetMiddleware
+QUERY_BUDGET = {
+    'MAX_QUERIES': 30,
+    'DUPLICATE_THRESHOLD': 5,
+    'SERVER_TIMING': False,
+}
+
+# Run the independent stat queries of /api/stats/ in parallel threads, each on
+# its own database connection. Serve the API through jirani_project.asgi.
+API_CONCURRENT_STATS = True
+
 ROOT_URLCONF = 'jirani_project.urls'
 
 TEMPLATES = [
@@ -81,6 +94,45 @@ DATABASES = {
 }
 
 
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+
+# The 'stats' cache holds the dashboard stat cards (see dashboard/stats.py).
+# Local memory is per process; with several workers set JIRANI_STATS_CACHE
+# to 'file' or 'db' (run `manage.py createcachetable` first) so that
+# invalidation reaches every worker.
+STATS_CACHE_BACKENDS = {
+    'locmem': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'jirani-stats',
+    },
+    'file': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': BASE_DIR / 'cache' / 'stats',
+    },
+    'db': {
+        'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+        'LOCATION': 'dashboard_stats_cache',
+    },
+}
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'stats': STATS_CACHE_BACKENDS[os.environ.get('JIRANI_STATS_CACHE', 'locmem')],
+    # Row fragments of the list pages ({% cache %} in the templates). Their keys
+    # include the row's updated_at, so an edit simply makes a new key and a
+    # per-process cache never serves a stale row.
+    'template_fragments': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'jirani-fragments',
+        'TIMEOUT': 86400,
+        'OPTIONS': {'MAX_ENTRIES': 20000},
+    },
+}
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -122,8 +174,6 @@ STATIC_URL = 'static/'
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
-import os
-
 STATIC_URL = '/static/'
 STATIC_ROOT = BASE_DIR / 'staticfiles'
 STATICFILES_DIRS = [BASE_DIR / 'dashboard' / 'static']